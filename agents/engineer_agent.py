@@ -1,15 +1,27 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import re
 from pathlib import Path
-
-from google import genai
+from typing import TYPE_CHECKING, Callable
 
 from schemas.plan_schema import Task
 from schemas.engineering_schema import EngineeringResult, FileArtifact
+from utils.memory_budget import memory_stage
 from utils.offline_engineer_scaffold import build_vite_react_ts_scaffold
+from utils.rate_limiter import RateLimiter, estimate_tokens, get_default_rate_limiter, limit_key
+from utils.response_cache import ResponseCache, get_default_response_cache, response_cache_key
+from utils.stream_json import StreamingArrayParser
+from utils.usage_ledger import model_call
+
+if TYPE_CHECKING:
+    from google import genai
+
+
+MODEL = "gemini-2.5-flash"
+TEMPERATURE = 0.2
 
 
 def _is_offline_mode() -> bool:
@@ -20,10 +32,21 @@ def _is_offline_mode() -> bool:
     return os.getenv("OFFLINE_MODE", "").strip().lower() in {"1", "true", "yes", "y", "on"}
 
 
-def _build_offline_engineering_result(task_id: str) -> EngineeringResult:
+SUPPORTED_TASK_TYPES = ("scaffold", "single_file", "doc")
+
+
+def _build_offline_engineering_result(task_id: str, task_type: str = "scaffold") -> EngineeringResult:
     """
     Convert deterministic offline scaffold into EngineeringResult.
+    Only scaffold tasks have deterministic offline output; other task types produce no files.
     """
+    if task_type != "scaffold":
+        return EngineeringResult(
+            task_id=task_id,
+            summary=f"OFFLINE: no deterministic output for {task_type} tasks",
+            files=[],
+        )
+
     scaffold = build_vite_react_ts_scaffold(app_dir="apps/offline-vite-react")
 
     files = [
@@ -39,28 +62,28 @@ def _build_offline_engineering_result(task_id: str) -> EngineeringResult:
 
 
 class EngineerAgent:
-    def __init__(self, client: genai.Client | None):
+    def __init__(
+        self,
+        client: genai.Client | None,
+        response_cache: ResponseCache | None = None,
+        rate_limiter: RateLimiter | None = None,
+    ):
         self.client = client
+        self.response_cache = response_cache or get_default_response_cache()
+        self.rate_limiter = rate_limiter or get_default_rate_limiter()
 
-    def run(self, task: Task) -> EngineeringResult:
+    def _check_task(self, task: Task) -> None:
         # Safety gates
         if task.execution_hint != "engineer":
             raise ValueError("EngineerAgent called with non-executable task")
 
-        if task.task_type != "scaffold":
+        if task.task_type not in SUPPORTED_TASK_TYPES:
             raise ValueError(f"Unsupported task_type: {task.task_type}")
 
-        # OFFLINE branch
-        if _is_offline_mode() or str(task.id).startswith("OFFLINE-"):
-            return _build_offline_engineering_result(task_id=str(task.id))
-
-        if self.client is None:
-            raise RuntimeError("EngineerAgent: client is None in ONLINE mode")
-
-        # ONLINE branch
+    def _contents(self, task: Task) -> str:
         prompt = Path("prompts/engineer.txt").read_text(encoding="utf-8")
 
-        contents = (
+        return (
             f"{prompt}\n\n"
             f"--- TASK START ---\n"
             f"id: {task.id}\n"
@@ -72,17 +95,168 @@ class EngineerAgent:
             f"--- TASK END ---"
         )
 
-        response = self.client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=contents,
-            config={
-                "response_schema": EngineeringResult,
-                "temperature": 0.2,
-            },
+    def _cache_key(self, contents: str) -> str:
+        return response_cache_key(
+            provider="gemini",
+            model=MODEL,
+            prompt=contents,
+            schema=EngineeringResult,
+            temperature=TEMPERATURE,
         )
 
+    def _config(self) -> dict:
+        return {
+            "response_schema": EngineeringResult,
+            "temperature": TEMPERATURE,
+        }
+
+    def run(self, task: Task) -> EngineeringResult:
+        with memory_stage("engineer.run"):
+            return self._run(task)
+
+    def _run(self, task: Task) -> EngineeringResult:
+        self._check_task(task)
+
+        # OFFLINE branch
+        if _is_offline_mode() or str(task.id).startswith("OFFLINE-"):
+            return _build_offline_engineering_result(task_id=str(task.id), task_type=str(task.task_type))
+
+        if self.client is None:
+            raise RuntimeError("EngineerAgent: client is None in ONLINE mode")
+
+        # ONLINE branch
+        contents = self._contents(task)
+
+        cache_key = self._cache_key(contents)
+        with model_call("engineer", "gemini", MODEL) as call:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                call.cache_hit = True
+                return EngineeringResult.model_validate_json(cached)
+
+            self.rate_limiter.acquire(limit_key("gemini", MODEL), estimate_tokens(contents))
+            call.attempts += 1
+            response = self.client.models.generate_content(
+                model=MODEL,
+                contents=contents,
+                config=self._config(),
+            )
+            call.set_usage(response)
+            return self._parse_response(response, cache_key)
+
+    async def arun(self, task: Task) -> EngineeringResult:
+        """
+        Async variant of run using the client's aio surface.
+        The SQLite response-cache lookup and store run in worker threads, off the event loop.
+        """
+        self._check_task(task)
+
+        # OFFLINE branch
+        if _is_offline_mode() or str(task.id).startswith("OFFLINE-"):
+            return _build_offline_engineering_result(task_id=str(task.id), task_type=str(task.task_type))
+
+        if self.client is None:
+            raise RuntimeError("EngineerAgent: client is None in ONLINE mode")
+
+        # ONLINE branch
+        contents = self._contents(task)
+
+        cache_key = self._cache_key(contents)
+        with model_call("engineer", "gemini", MODEL) as call:
+            cached = await asyncio.to_thread(self.response_cache.get, cache_key)
+            if cached is not None:
+                call.cache_hit = True
+                return EngineeringResult.model_validate_json(cached)
+
+            await self.rate_limiter.aacquire(limit_key("gemini", MODEL), estimate_tokens(contents))
+            call.attempts += 1
+            response = await self.client.aio.models.generate_content(
+                model=MODEL,
+                contents=contents,
+                config=self._config(),
+            )
+            call.set_usage(response)
+            return await asyncio.to_thread(self._parse_response, response, cache_key)
+
+    def run_stream(self, task: Task, on_file: Callable[[FileArtifact], None]) -> EngineeringResult:
+        """
+        Streaming variant of run: ONLINE output comes from generate_content_stream and is parsed
+        incrementally, so each FileArtifact is validated and passed to on_file as soon as its object
+        closes (time-to-first-file no longer waits for the whole scaffold).
+        OFFLINE and cached results are replayed through on_file in order.
+        """
+        with memory_stage("engineer.run_stream"):
+            return self._run_stream(task, on_file)
+
+    def _run_stream(self, task: Task, on_file: Callable[[FileArtifact], None]) -> EngineeringResult:
+        self._check_task(task)
+
+        # OFFLINE branch
+        if _is_offline_mode() or str(task.id).startswith("OFFLINE-"):
+            result = _build_offline_engineering_result(task_id=str(task.id), task_type=str(task.task_type))
+            for f in result.files:
+                on_file(f)
+            return result
+
+        if self.client is None:
+            raise RuntimeError("EngineerAgent: client is None in ONLINE mode")
+
+        # ONLINE branch
+        contents = self._contents(task)
+
+        cache_key = self._cache_key(contents)
+        with model_call("engineer", "gemini", MODEL) as call:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                call.cache_hit = True
+                result = EngineeringResult.model_validate_json(cached)
+                for f in result.files:
+                    on_file(f)
+                return result
+
+            self.rate_limiter.acquire(limit_key("gemini", MODEL), estimate_tokens(contents))
+            call.attempts += 1
+            stream = self.client.models.generate_content_stream(
+                model=MODEL,
+                contents=contents,
+                config=self._config(),
+            )
+
+            parser = StreamingArrayParser("files")
+            files: list[FileArtifact] = []
+            tail = ""
+            try:
+                for chunk in stream:
+                    # Token counts arrive on the stream's chunks; the last one carries the totals, so
+                    # the stream is always read to the end even once the JSON object has closed.
+                    call.set_usage(chunk)
+                    if parser.done:
+                        continue
+                    text = getattr(chunk, "text", None) or ""
+                    tail = (tail + text)[-2000:]
+                    for obj in parser.feed(text):
+                        artifact = FileArtifact.model_validate(obj)
+                        on_file(artifact)
+                        files.append(artifact)
+                top = parser.finish()
+            except ValueError as e:
+                raise RuntimeError(
+                    f"EngineerAgent: streamed JSON could not be parsed ({e}).\n\n"
+                    f"Last output received:\n{tail}"
+                ) from e
+
+            result = EngineeringResult(
+                task_id=top.get("task_id", str(task.id)),
+                summary=top.get("summary", ""),
+                files=files,
+            )
+            self.response_cache.put(cache_key, result.model_dump_json())
+            return result
+
+    def _parse_response(self, response, cache_key: str) -> EngineeringResult:
         # Primary path
         if response.parsed is not None:
+            self.response_cache.put(cache_key, response.parsed.model_dump_json())
             return response.parsed
 
         # -------- FALLBACK REPAIR PATH --------
@@ -118,4 +292,6 @@ class EngineerAgent:
                 f"Candidate JSON:\n{candidate}"
             ) from e
 
-        return EngineeringResult.model_validate(data)
+        result = EngineeringResult.model_validate(data)
+        self.response_cache.put(cache_key, result.model_dump_json())
+        return result
@@ -1,44 +1,117 @@
 from __future__ import annotations
+import asyncio
 import json
 from pathlib import Path
-from google import genai
+from typing import TYPE_CHECKING
 from schemas.plan_schema import Plan
 from schemas.prd_schema import PRDArtifact
-from utils.genai_retry import call_with_retry
+from utils.genai_retry import acall_with_retry, call_with_retry
+from utils.rate_limiter import RateLimiter, estimate_tokens, get_default_rate_limiter, limit_key
+from utils.response_cache import ResponseCache, get_default_response_cache, response_cache_key
+from utils.usage_ledger import model_call
+
+if TYPE_CHECKING:
+    from google import genai
+
+
+MODEL = "gemini-2.5-flash"
+TEMPERATURE = 0.2
 
 
 class PlannerAgent:
-    def __init__(self, client: genai.Client):
+    def __init__(
+        self,
+        client: genai.Client,
+        response_cache: ResponseCache | None = None,
+        rate_limiter: RateLimiter | None = None,
+    ):
         self.client = client
+        self.response_cache = response_cache or get_default_response_cache()
+        self.rate_limiter = rate_limiter or get_default_rate_limiter()
     
-    def run_from_prd_text(self, prd_text: str) -> Plan:
-        """
-        Legacy method: Generate plan from PRD text.
-        Kept for backward compatibility.
-        """
+    def _contents(self, prd_text: str) -> str:
         prompt = Path("prompts/planner.txt").read_text(encoding="utf-8")
-        contents = f"{prompt}\n\n--- PRD START ---\n{prd_text}\n--- PRD END ---"
-        
-        def _call():
-            return self.client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=contents,
-                config={
-                    "response_schema": Plan,
-                    "temperature": 0.2,
-                },
-            )
-        
-        response = call_with_retry(_call, max_retries=2)
-        
+        return f"{prompt}\n\n--- PRD START ---\n{prd_text}\n--- PRD END ---"
+
+    def _cache_key(self, contents: str) -> str:
+        return response_cache_key(
+            provider="gemini",
+            model=MODEL,
+            prompt=contents,
+            schema=Plan,
+            temperature=TEMPERATURE,
+        )
+
+    def _config(self) -> dict:
+        return {
+            "response_schema": Plan,
+            "temperature": TEMPERATURE,
+        }
+
+    def _parse_response(self, response, cache_key: str) -> Plan:
         if response.parsed is None:
             raw = getattr(response, "text", None)
             raise RuntimeError(
                 "PlannerAgent: schema parse failed (response.parsed is None).\n\n"
                 f"Raw model output:\n{raw}"
             )
-        
+
+        self.response_cache.put(cache_key, response.parsed.model_dump_json())
         return response.parsed
+
+    def run_from_prd_text(self, prd_text: str) -> Plan:
+        """
+        Legacy method: Generate plan from PRD text.
+        Kept for backward compatibility.
+        """
+        contents = self._contents(prd_text)
+
+        cache_key = self._cache_key(contents)
+        with model_call("planner", "gemini", MODEL) as call:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                call.cache_hit = True
+                return Plan.model_validate_json(cached)
+
+            def _call():
+                call.attempts += 1
+                self.rate_limiter.acquire(limit_key("gemini", MODEL), estimate_tokens(contents))
+                return self.client.models.generate_content(
+                    model=MODEL,
+                    contents=contents,
+                    config=self._config(),
+                )
+
+            response = call_with_retry(_call, max_retries=2)
+            call.set_usage(response)
+            return self._parse_response(response, cache_key)
+
+    async def arun_from_prd_text(self, prd_text: str) -> Plan:
+        """
+        Async variant of run_from_prd_text using the client's aio surface.
+        The SQLite response-cache lookup and store run in worker threads, off the event loop.
+        """
+        contents = self._contents(prd_text)
+
+        cache_key = self._cache_key(contents)
+        with model_call("planner", "gemini", MODEL) as call:
+            cached = await asyncio.to_thread(self.response_cache.get, cache_key)
+            if cached is not None:
+                call.cache_hit = True
+                return Plan.model_validate_json(cached)
+
+            async def _call():
+                call.attempts += 1
+                await self.rate_limiter.aacquire(limit_key("gemini", MODEL), estimate_tokens(contents))
+                return await self.client.aio.models.generate_content(
+                    model=MODEL,
+                    contents=contents,
+                    config=self._config(),
+                )
+
+            response = await acall_with_retry(_call, max_retries=2)
+            call.set_usage(response)
+            return await asyncio.to_thread(self._parse_response, response, cache_key)
     
     def run_from_prd_artifact(self, prd_artifact_path: Path) -> Plan:
         """
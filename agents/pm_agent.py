@@ -1,8 +1,20 @@
 from __future__ import annotations
+import asyncio
 import os
 from datetime import datetime, timezone
-from openai import OpenAI
+from typing import TYPE_CHECKING
 from schemas.prd_schema import PRD, PRDArtifact
+from utils.clients import get_openai_client
+from utils.rate_limiter import RateLimiter, estimate_tokens, get_default_rate_limiter, limit_key
+from utils.response_cache import ResponseCache, get_default_response_cache, response_cache_key
+from utils.usage_ledger import model_call
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+
+MODEL = "gpt-4o-mini"  # Cheap and fast for PRD generation
+TEMPERATURE = 0.2  # Low temperature for consistency
 
 
 def _utc_now_iso() -> str:
@@ -37,12 +49,21 @@ class PMAgent:
     Product Manager agent that generates PRDs from user requirements using OpenAI.
     """
     
-    def __init__(self, api_key: str | None = None):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        response_cache: ResponseCache | None = None,
+        rate_limiter: RateLimiter | None = None,
+    ):
         """
         Initialize PM agent with OpenAI client.
         
         Args:
             api_key: OpenAI API key. If None, reads from OPENAI_API_KEY env var.
+            response_cache: Response cache to consult before calling the model.
+                If None, the process-wide default cache is used.
+            rate_limiter: Shared requests/tokens-per-minute limiter awaited before each call.
+                If None, the process-wide default limiter is used.
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
@@ -50,8 +71,45 @@ class PMAgent:
                 "OpenAI API key required. Set OPENAI_API_KEY environment variable "
                 "or pass api_key parameter."
             )
-        self.client = OpenAI(api_key=self.api_key)
+        # Pooled per API key: PM agents created per run reuse warm connections.
+        self.client = get_openai_client(self.api_key)
+        self.async_client: AsyncOpenAI | None = None
+        self.response_cache = response_cache or get_default_response_cache()
+        self.rate_limiter = rate_limiter or get_default_rate_limiter()
     
+    def _messages(self, user_requirements: str) -> list[dict]:
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"Client requirements:\n\n{user_requirements}"}
+        ]
+
+    def _cache_key(self, messages: list[dict]) -> str:
+        return response_cache_key(
+            provider="openai",
+            model=MODEL,
+            prompt=messages,
+            schema=PRD,
+            temperature=TEMPERATURE,
+        )
+
+    def _cached_artifact(self, cache_key: str) -> PRDArtifact | None:
+        cached = self.response_cache.get(cache_key)
+        if cached is None:
+            return None
+        return PRDArtifact(
+            prd=PRD.model_validate_json(cached),
+            created_at=_utc_now_iso(),
+        )
+
+    def _artifact_from_response(self, response, cache_key: str) -> PRDArtifact:
+        prd = response.choices[0].message.parsed
+        self.response_cache.put(cache_key, prd.model_dump_json())
+        
+        return PRDArtifact(
+            prd=prd,
+            created_at=_utc_now_iso(),
+        )
+
     def generate_prd(self, user_requirements: str) -> PRDArtifact:
         """
         Generate a PRD from user requirements.
@@ -62,19 +120,50 @@ class PMAgent:
         Returns:
             PRDArtifact with structured PRD data
         """
-        response = self.client.beta.chat.completions.parse(
-            model="gpt-4o-mini",  # Cheap and fast for PRD generation
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": f"Client requirements:\n\n{user_requirements}"}
-            ],
-            response_format=PRD,  # Structured output
-            temperature=0.2,  # Low temperature for consistency
-        )
-        
-        prd = response.choices[0].message.parsed
-        
-        return PRDArtifact(
-            prd=prd,
-            created_at=_utc_now_iso(),
-        )
\ No newline at end of file
+        messages = self._messages(user_requirements)
+        cache_key = self._cache_key(messages)
+        with model_call("pm", "openai", MODEL) as call:
+            cached = self._cached_artifact(cache_key)
+            if cached is not None:
+                call.cache_hit = True
+                return cached
+
+            self.rate_limiter.acquire(limit_key("openai", MODEL), estimate_tokens(messages))
+            call.attempts += 1
+            response = self.client.beta.chat.completions.parse(
+                model=MODEL,
+                messages=messages,
+                response_format=PRD,  # Structured output
+                temperature=TEMPERATURE,
+            )
+            call.set_usage(response)
+            return self._artifact_from_response(response, cache_key)
+
+    async def agenerate_prd(self, user_requirements: str) -> PRDArtifact:
+        """
+        Async variant of generate_prd using AsyncOpenAI (created on first use).
+        The SQLite response-cache lookup and store run in worker threads, off the event loop.
+        """
+        messages = self._messages(user_requirements)
+        cache_key = self._cache_key(messages)
+        with model_call("pm", "openai", MODEL) as call:
+            cached = await asyncio.to_thread(self._cached_artifact, cache_key)
+            if cached is not None:
+                call.cache_hit = True
+                return cached
+
+            if self.async_client is None:
+                from openai import AsyncOpenAI
+
+                self.async_client = AsyncOpenAI(api_key=self.api_key)
+
+            await self.rate_limiter.aacquire(limit_key("openai", MODEL), estimate_tokens(messages))
+            call.attempts += 1
+            response = await self.async_client.beta.chat.completions.parse(
+                model=MODEL,
+                messages=messages,
+                response_format=PRD,  # Structured output
+                temperature=TEMPERATURE,
+            )
+            call.set_usage(response)
+            return await asyncio.to_thread(self._artifact_from_response, response, cache_key)
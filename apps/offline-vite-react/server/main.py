@@ -1,15 +1,34 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, Field
 
+# server/ lives at apps/offline-vite-react/server; shared helpers live at the repo root.
+REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.consume_execution_request import EXECUTED_BY_SERVER, execute_and_evaluate, publish_result  # noqa: E402
+from utils.metrics import CONTENT_TYPE, MetricsRegistry  # noqa: E402
+from utils.ndjson_index import NdjsonIndex  # noqa: E402
+from utils.request_hash import compute_request_hash  # noqa: E402
+
 
 class ExecutionRequest(BaseModel):
     """
@@ -25,6 +44,37 @@ class ExecutionRequest(BaseModel):
     payload: Dict[str, Any] = Field(default_factory=dict)
 
 
+# ------------------------
+# Metrics (GET /metrics)
+# ------------------------
+METRICS = MetricsRegistry()
+# Disk latencies sit well below the HTTP defaults: start at 0.1 ms.
+_DISK_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+HTTP_REQUESTS = METRICS.counter(
+    "artifact_server_http_requests_total", "HTTP requests by route and status.", ("method", "path", "status")
+)
+HTTP_LATENCY = METRICS.histogram(
+    "artifact_server_http_request_duration_seconds", "HTTP request latency by route.", ("method", "path")
+)
+NDJSON_APPEND_SECONDS = METRICS.histogram(
+    "artifact_server_ndjson_append_duration_seconds",
+    "Time to append one group-commit batch to the NDJSON log (write + fsync + index).",
+    buckets=_DISK_BUCKETS,
+)
+FSYNC_SECONDS = METRICS.histogram(
+    "artifact_server_fsync_duration_seconds", "fsync latency per written file.", ("file",), buckets=_DISK_BUCKETS
+)
+BATCH_SIZE = METRICS.histogram(
+    "artifact_server_group_commit_batch_size",
+    "Requests committed per group-commit flush.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+BYTES_WRITTEN = METRICS.counter("artifact_server_bytes_written_total", "Bytes written per file.", ("file",))
+ERRORS = METRICS.counter("artifact_server_errors_total", "Failures by kind.", ("kind",))
+QUEUE_DEPTH = METRICS.gauge("artifact_server_queue_depth", "Items waiting in each in-process queue.", ("queue",))
+
+
 def utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
@@ -49,20 +99,265 @@ def atomic_write_text(path: Path, text: str) -> None:
     with open(tmp, "w", encoding="utf-8", newline="\n") as f:
         f.write(text)
         f.flush()
-        os.fsync(f.fileno())
+        with FSYNC_SECONDS.time(file=path.name):
+            os.fsync(f.fileno())
+    BYTES_WRITTEN.inc(len(text.encode("utf-8")), file=path.name)
     tmp.replace(path)
 
 
-def append_ndjson(path: Path, line_obj: Dict[str, Any]) -> None:
+def append_ndjson_batch(path: Path, line_objs: List[Dict[str, Any]]) -> None:
     """
     Append-only NDJSON log. Ensures exactly one JSON object per line.
+    All lines are written with a single fsync, then their byte offsets + request hashes are recorded
+    in the sidecar index (<log>.idx) so replay can seek straight to them. The index is derived data
+    (rebuildable), so it is not fsynced.
     """
+    if not line_objs:
+        return
+    t0 = time.perf_counter()
     path.parent.mkdir(parents=True, exist_ok=True)
-    line = json.dumps(line_obj, ensure_ascii=False, separators=(",", ":")) + "\n"
-    with open(path, "a", encoding="utf-8", newline="\n") as f:
-        f.write(line)
+    lines = [
+        (json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        for obj in line_objs
+    ]
+    data = b"".join(lines)
+    with open(path, "ab") as f:
+        offset = f.seek(0, os.SEEK_END)
+        f.write(data)
         f.flush()
-        os.fsync(f.fileno())
+        with FSYNC_SECONDS.time(file=path.name):
+            os.fsync(f.fileno())
+    BYTES_WRITTEN.inc(len(data), file=path.name)
+
+    NdjsonIndex(path).append_many(
+        offset,
+        [(len(line), compute_request_hash(obj)) for obj, line in zip(line_objs, lines)],
+    )
+    NDJSON_APPEND_SECONDS.observe(time.perf_counter() - t0)
+
+
+def append_ndjson(path: Path, line_obj: Dict[str, Any]) -> None:
+    append_ndjson_batch(path, [line_obj])
+
+
+class GroupCommitWriter:
+    """
+    Group commit for POST /execution-request.
+
+    Handlers enqueue their request and await an acknowledgement. A single background task drains
+    whatever is pending (up to max_batch, waiting at most interval_s for stragglers), then off the
+    event loop:
+      - appends every line to the NDJSON log with ONE fsync
+      - rewrites last_execution_request.json ONCE with the newest request in the batch
+    and only then acknowledges the waiting handlers. A request is acknowledged only after its line
+    is durable, exactly as before; bursts just share the flushes.
+    """
+
+    def __init__(
+        self,
+        log_path: Path,
+        last_path: Path,
+        max_batch: int = 256,
+        interval_s: float = 0.005,
+    ):
+        self.log_path = log_path
+        self.last_path = last_path
+        self.max_batch = max(1, max_batch)
+        self.interval_s = max(0.0, interval_s)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        # Drain: everything already submitted still gets committed before shutdown.
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, obj: Dict[str, Any]) -> None:
+        await self.start()
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((obj, fut))
+        await fut
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+
+            deadline = loop.time() + self.interval_s
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            objs = [obj for obj, _ in batch]
+            BATCH_SIZE.observe(len(objs))
+            try:
+                await asyncio.to_thread(self._commit, objs)
+            except Exception as e:
+                ERRORS.inc(kind="group_commit")
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+            else:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_result(None)
+
+    def _commit(self, objs: List[Dict[str, Any]]) -> None:
+        append_ndjson_batch(self.log_path, objs)
+        pretty = json.dumps(objs[-1], ensure_ascii=False, indent=2) + "\n"
+        atomic_write_text(self.last_path, pretty)
+
+
+@dataclass
+class Job:
+    job_id: str
+    request_hash: str
+    request: Dict[str, Any]
+    status: str = "queued"  # queued | running | done | error
+    submitted_at: str = field(default_factory=utc_now_iso)
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    evaluation: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "request_hash": self.request_hash,
+            "task_id": self.request.get("task_id"),
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result_status": (self.result or {}).get("status"),
+            "evaluation_status": (self.evaluation or {}).get("status"),
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """
+    In-process execution: accepted requests go into a bounded queue drained by `workers` tasks.
+    Each worker runs the consumer (build_execution_result + evaluator) in a thread and publishes
+    the artifacts, so no extra process (or interpreter start-up) is paid per request.
+
+    Finished jobs are kept in memory (newest `max_finished`) for GET /jobs/{job_id}.
+    """
+
+    def __init__(self, public_dir: Path, workers: int = 2, max_queued: int = 100, max_finished: int = 1000):
+        self.public_dir = public_dir
+        self.workers = max(1, workers)
+        self.max_queued = max(1, max_queued)
+        self.max_finished = max(1, max_finished)
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # Slots claimed by reserve() whose job has not been submitted yet (event loop only).
+        self._reserved = 0
+        # Artifact publication (last_*.json + NDJSON appends) must not interleave between workers.
+        self._publish_lock = threading.Lock()
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def full(self) -> bool:
+        return self.depth() + self._reserved >= self.max_queued
+
+    def reserve(self) -> bool:
+        """
+        Claim a queue slot ahead of submit(reserved=True), so no other request can take it while the
+        caller awaits in between (the durable log write). Returns False when the queue is full.
+        """
+        if self.full():
+            return False
+        self._reserved += 1
+        return True
+
+    def release(self) -> None:
+        self._reserved = max(0, self._reserved - 1)
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, obj: Dict[str, Any], reserved: bool = False) -> Job:
+        """
+        Raises asyncio.QueueFull when the queue is at capacity (never for a reserved slot).
+        """
+        if reserved:
+            self.release()
+        await self.start()
+        job = Job(job_id=uuid.uuid4().hex, request_hash=compute_request_hash(obj), request=obj)
+        self._queue.put_nowait(job)
+        self.jobs[job.job_id] = job
+        return job
+
+    def _run(self, job: Job) -> None:
+        result, evaluation = execute_and_evaluate(self.public_dir, job.request)
+        with self._publish_lock:
+            publish_result(self.public_dir, result, evaluation)
+        job.result = result
+        job.evaluation = evaluation
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = utc_now_iso()
+            try:
+                await asyncio.to_thread(self._run, job)
+            except Exception as e:
+                ERRORS.inc(kind="job")
+                job.status = "error"
+                job.error = f"{e.__class__.__name__}: {e}"
+            else:
+                job.status = "done"
+            finally:
+                job.finished_at = utc_now_iso()
+                self._queue.task_done()
+                self._trim()
+
+    def _trim(self) -> None:
+        finished = [jid for jid, j in self.jobs.items() if j.status in ("done", "error")]
+        for jid in finished[: max(0, len(finished) - self.max_finished)]:
+            self.jobs.pop(jid, None)
 
 
 def get_public_dir() -> Path:
@@ -74,7 +369,86 @@ PUBLIC_DIR = get_public_dir()
 LAST_REQ_PATH = (PUBLIC_DIR / "last_execution_request.json").resolve()
 LOG_PATH = (PUBLIC_DIR / "execution_requests.ndjson").resolve()
 
-app = FastAPI(title="ai-dev-team local artifact server", version="0.1.0")
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, "") or default)
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, "") or default)
+    except ValueError:
+        return default
+
+
+WRITER = GroupCommitWriter(
+    LOG_PATH,
+    LAST_REQ_PATH,
+    max_batch=_env_int("NDJSON_GROUP_COMMIT_MAX_BATCH", 256),
+    interval_s=_env_float("NDJSON_GROUP_COMMIT_INTERVAL_MS", 5) / 1000.0,
+)
+
+
+JOBS = JobQueue(
+    PUBLIC_DIR,
+    workers=_env_int("EXECUTION_JOB_WORKERS", 2),
+    max_queued=_env_int("EXECUTION_JOB_QUEUE_SIZE", 100),
+)
+
+
+# Read at scrape time through the module globals, so a swapped WRITER / JOBS is still reported.
+QUEUE_DEPTH.set_function(lambda: WRITER.depth(), queue="group_commit")
+QUEUE_DEPTH.set_function(lambda: JOBS.depth(), queue="jobs")
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no per-request task or body buffering, unlike BaseHTTPMiddleware):
+    counts every HTTP request and times it, labelled by route template so /jobs/{job_id}
+    stays one series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        t0 = time.perf_counter()
+        status = 500
+
+        async def _send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUESTS.inc(method=scope["method"], path=path, status=str(status))
+            HTTP_LATENCY.observe(time.perf_counter() - t0, method=scope["method"], path=path)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    await WRITER.start()
+    await JOBS.start()
+    try:
+        yield
+    finally:
+        await JOBS.stop()
+        await WRITER.stop()
+
+
+app = FastAPI(title="ai-dev-team local artifact server", version="0.1.0", lifespan=lifespan)
 
 # Dev-only CORS: allow Vite dev server
 app.add_middleware(
@@ -84,6 +458,7 @@ app.add_middleware(
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/health")
@@ -95,12 +470,16 @@ def health() -> Dict[str, Any]:
     }
 
 
-@app.post("/execution-request")
-async def execution_request(req: ExecutionRequest, request: Request) -> Dict[str, Any]:
-    # Ensure allowlisted paths
-    ensure_within_dir(LAST_REQ_PATH, PUBLIC_DIR)
-    ensure_within_dir(LOG_PATH, PUBLIC_DIR)
+@app.get("/metrics")
+def metrics() -> PlainTextResponse:
+    """
+    Prometheus text exposition: request counts and latency per route, NDJSON append / fsync
+    durations, group-commit batch sizes, queue depths, bytes written and error counts.
+    """
+    return PlainTextResponse(METRICS.render(), media_type=CONTENT_TYPE)
 
+
+def _enrich_request(req: ExecutionRequest, request: Request, executed_by: Optional[str] = None) -> Dict[str, Any]:
     # Enrich deterministically (without mutating caller payload in weird ways)
     obj = req.model_dump()
     if not obj.get("created_at"):
@@ -111,9 +490,66 @@ async def execution_request(req: ExecutionRequest, request: Request) -> Dict[str
         "source_ip": request.client.host if request.client else None,
         "received_at": utc_now_iso(),
     }
+    if executed_by:
+        obj["_meta"]["executed_by"] = executed_by
+    return obj
+
 
-    pretty = json.dumps(obj, ensure_ascii=False, indent=2) + "\n"
-    atomic_write_text(LAST_REQ_PATH, pretty)
-    append_ndjson(LOG_PATH, obj)
+@app.post("/execution-request")
+async def execution_request(req: ExecutionRequest, request: Request) -> Dict[str, Any]:
+    # Ensure allowlisted paths
+    ensure_within_dir(LAST_REQ_PATH, PUBLIC_DIR)
+    ensure_within_dir(LOG_PATH, PUBLIC_DIR)
+
+    obj = _enrich_request(req, request)
+
+    # Durable (fsynced) before we acknowledge; fsyncs are shared with concurrent requests.
+    await WRITER.submit(obj)
 
     return {"ok": True, "written": {"last": str(LAST_REQ_PATH), "log": str(LOG_PATH)}}
+
+
+@app.post("/execute", status_code=202)
+async def execute(req: ExecutionRequest, request: Request) -> Dict[str, Any]:
+    """
+    Persist the request like /execution-request, then run it in-process on the job queue.
+    Poll GET /jobs/{job_id} for the ExecutionResult + EvaluationResult.
+
+    The logged line is marked _meta.executed_by="server", so `consume --queue` skips it instead of
+    running it a second time.
+    """
+    ensure_within_dir(LAST_REQ_PATH, PUBLIC_DIR)
+    ensure_within_dir(LOG_PATH, PUBLIC_DIR)
+
+    # The slot is held across the log write, so a request that is logged always gets executed and a
+    # rejected one leaves no trace in the history.
+    if not JOBS.reserve():
+        ERRORS.inc(kind="queue_full")
+        raise HTTPException(status_code=503, detail="Execution queue is full; retry later")
+
+    obj = _enrich_request(req, request, executed_by=EXECUTED_BY_SERVER)
+    try:
+        await WRITER.submit(obj)
+    except BaseException:
+        JOBS.release()
+        raise
+
+    job = await JOBS.submit(obj, reserved=True)
+
+    return {"ok": True, "job_id": job.job_id, "status": job.status, "request_hash": job.request_hash}
+
+
+@app.get("/jobs")
+def list_jobs() -> Dict[str, Any]:
+    return {
+        "queue_depth": JOBS.depth(),
+        "jobs": [j.summary() for j in reversed(JOBS.jobs.values())],
+    }
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str) -> Dict[str, Any]:
+    job = JOBS.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return {**job.summary(), "result": job.result, "evaluation": job.evaluation}
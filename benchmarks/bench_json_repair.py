@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+# Add repo root to path
+repo_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repo_root))
+
+from utils.json_repair import repair_json_newlines_in_strings, repair_json_stream
+
+
+def legacy_repair_json_newlines_in_strings(s: str) -> str:
+    """
+    The original per-character implementation, kept as the benchmark baseline and equivalence oracle.
+    """
+    out: list[str] = []
+    in_string = False
+    escape = False
+
+    for ch in s:
+        if in_string:
+            if escape:
+                out.append(ch)
+                escape = False
+                continue
+            if ch == "\\":
+                out.append(ch)
+                escape = True
+                continue
+            if ch == '"':
+                out.append(ch)
+                in_string = False
+                continue
+            if ch == "\n" or ch == "\r" or ch == "\t":
+                out.append(" ")
+                continue
+            out.append(ch)
+            continue
+
+        if ch == '"':
+            out.append(ch)
+            in_string = True
+            continue
+
+        out.append(ch)
+
+    return "".join(out)
+
+
+def synthetic_pasted_plan(target_bytes: int, seed: int = 0) -> str:
+    """
+    Plan-shaped JSON (pretty-printed, unicode, occasional escapes) with literal newlines/tabs pasted
+    into long description strings.
+    """
+    rng = random.Random(seed)
+    words = [
+        "scaffold", "the", "vite", "react", "component", "milestone", "should", "render", "tests",
+        "tâche", "☃", "{brace}", "[list]", "config", "deterministic", "offline", "frontend",
+    ]
+    rare = ['say \\"hi\\"', "path\\\\to"]
+    tasks = []
+    size = 0
+    i = 0
+    while size < target_bytes:
+        desc = " ".join(
+            rng.choice(rare) if rng.random() < 0.02 else rng.choice(words) for _ in range(rng.randint(20, 120))
+        )
+        desc = desc.replace(" ", "\n", rng.randint(0, 3)).replace(" ", "\t", rng.randint(0, 1))
+        task = {"id": f"T{i}", "description": "@@DESC@@", "outputs": ["src/app.tsx"], "depends_on": []}
+        text = json.dumps(task, ensure_ascii=False, indent=2).replace("@@DESC@@", desc)
+        tasks.append(text)
+        size += len(text.encode("utf-8"))
+        i += 1
+    return '{\n  "milestones": [{"id": "M1", "tasks": [\n' + ",\n".join(tasks) + "\n]}]\n}\n"
+
+
+def _best_of(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(sizes_mb: List[float], repeat: int) -> List[Tuple[str, float, float]]:
+    """
+    Returns [(case, input_mb, MB/s)].
+    """
+    rows = []
+    for mb in sizes_mb:
+        text = synthetic_pasted_plan(int(mb * 1024 * 1024))
+        text_mb = len(text.encode("utf-8")) / (1024 * 1024)
+
+        expected = legacy_repair_json_newlines_in_strings(text)
+        assert repair_json_newlines_in_strings(text) == expected
+        json.loads(expected)
+
+        def _stream() -> None:
+            repair_json_stream(io.StringIO(text), io.StringIO(), chunk_chars=64 * 1024)
+
+        cases = {
+            "legacy": lambda: legacy_repair_json_newlines_in_strings(text),
+            "repair_json_newlines_in_strings": lambda: repair_json_newlines_in_strings(text),
+            "repair_json_stream(64K chunks)": _stream,
+        }
+        for name, fn in cases.items():
+            rows.append((name, text_mb, text_mb / _best_of(fn, repeat)))
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Throughput of the JSON newline repair (MB/s).")
+    parser.add_argument("--sizes", default="0.5,2,8", help="Comma-separated input sizes in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="Best-of N timing runs per case")
+    args = parser.parse_args()
+
+    sizes = [float(x) for x in args.sizes.split(",") if x.strip()]
+    print(f"{'case':<34} {'input MB':>9} {'MB/s':>9}")
+    for name, mb, rate in run(sizes, args.repeat):
+        print(f"{name:<34} {mb:>9.2f} {rate:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+from unittest import mock
+
+# Add repo root to path
+repo_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repo_root))
+
+from schemas.execution_schema import ExecutionRequest, ExecutionResult
+from scripts.consume_execution_request import execute_and_evaluate
+from utils.schema_dump import dump_artifact
+
+
+def sample_request(i: int = 0, files: int = 20) -> Dict[str, object]:
+    """
+    Engineer-shaped request with a task snapshot, so validation has a realistically nested payload.
+    """
+    return {
+        "kind": "execution_request",
+        "task_id": f"T{i}",
+        "milestone_id": "M1",
+        "title": "Scaffold",
+        "payload": {
+            "task_snapshot": {
+                "id": f"T{i}",
+                "description": "Create the app shell " * 8,
+                "execution_hint": "engineer",
+                "outputs": [f"src/file_{n}.tsx" for n in range(files)],
+            },
+        },
+    }
+
+
+def sample_outputs(files: int = 20) -> Dict[str, object]:
+    return {
+        "action": "engineer_execution",
+        "task_id": "T0",
+        "summary": "scaffolded",
+        "files_generated": files,
+        "writes": [{"path": f"/tmp/generated/src/file_{n}.tsx", "sha256": "0" * 64, "bytes": 1024} for n in range(files)],
+    }
+
+
+def legacy_build(req: ExecutionRequest, outputs: Dict[str, object]) -> Dict[str, object]:
+    """
+    Pre-change shape of build_execution_result's tail: construct, dump + re-validate, dump again.
+    """
+    result = ExecutionResult(agent_role="engineer", status="success", request_hash="h", request=req, outputs=outputs)
+    ExecutionResult.model_validate(result.model_dump())
+    return result.model_dump()
+
+
+def fast_build(req: ExecutionRequest, outputs: Dict[str, object]) -> Dict[str, object]:
+    result = ExecutionResult(agent_role="engineer", status="success", request_hash="h", request=req, outputs=outputs)
+    return dump_artifact(result)
+
+
+def _per_call_us(fn: Callable[[], object], iterations: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        best = min(best, time.perf_counter() - t0)
+    return best / iterations * 1e6
+
+
+def run(iterations: int, repeat: int) -> List[Tuple[str, float]]:
+    """
+    Returns [(case, microseconds per request)].
+    """
+    req = ExecutionRequest.model_validate(sample_request())
+    outputs = sample_outputs()
+    assert legacy_build(req, outputs) == fast_build(req, outputs)
+
+    rows = [
+        ("result build: legacy round-trip", _per_call_us(lambda: legacy_build(req, outputs), iterations, repeat)),
+        ("result build: dump_artifact", _per_call_us(lambda: fast_build(req, outputs), iterations, repeat)),
+    ]
+
+    # End to end (note request: execute + write + evaluate). STRICT_SCHEMA_CHECKS=1 is the old behaviour.
+    # Disk writeback dominates here, so modes are interleaved and each run gets a fresh directory.
+    note = {"task_id": "N", "payload": {"action": "write_public_note", "content": "hello\n", "filename": "n.md"}}
+    modes = {"execute_and_evaluate: strict": "1", "execute_and_evaluate: fast": "0"}
+    best = {label: float("inf") for label in modes}
+    for _ in range(repeat):
+        for label, strict in modes.items():
+            with tempfile.TemporaryDirectory() as td, mock.patch.dict(os.environ, {"STRICT_SCHEMA_CHECKS": strict}):
+                best[label] = min(best[label], _per_call_us(lambda: execute_and_evaluate(Path(td), note), iterations // 4 or 1, 1))
+    rows.extend(best.items())
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Per-request pydantic overhead of the consume/evaluate path (µs).")
+    parser.add_argument("--iterations", type=int, default=2000, help="Calls per timing run")
+    parser.add_argument("--repeat", type=int, default=3, help="Best-of N timing runs per case")
+    args = parser.parse_args()
+
+    print(f"{'case':<34} {'µs/request':>11}")
+    for name, us in run(args.iterations, args.repeat):
+        print(f"{name:<34} {us:>11.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
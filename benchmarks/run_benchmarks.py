@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from unittest import mock
+
+# Add repo root to path
+repo_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repo_root))
+
+from benchmarks.synthetic import synthetic_pasted_plan_text, write_requests_ndjson, write_results_ndjson
+from orchestrator_utils import write_engineering_result
+from schemas.engineering_schema import EngineeringResult
+from scripts.consume_execution_request import consume
+from scripts.evaluate_execution_result import evaluate, evaluate_history
+from scripts.replay_execution_request import _read_ndjson, replay, select_request
+from utils.ndjson_index import NdjsonIndex
+from utils.plan_cache import load_plan_with_repair
+
+DEFAULT_RESULTS_PATH = repo_root / "benchmarks" / "results" / "latest.json"
+DEFAULT_BASELINE_PATH = repo_root / "benchmarks" / "baselines" / "baseline.json"
+DEFAULT_THRESHOLD = 0.25
+SERVER_PATH = repo_root / "apps" / "offline-vite-react" / "server" / "main.py"
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    items: int  # units of work per timed run (lines, requests, files...)
+    setup: Callable[[Path], Callable[[], Any]]  # untimed; returns the timed callable
+
+
+def _log_dir(work: Path, lines: int) -> Path:
+    """
+    One synthetic public/ dir per history size, generated once and shared by that size's cases.
+    """
+    public_dir = work / f"public-{lines}"
+    if not (public_dir / "execution_results.ndjson").exists():
+        hashes = write_requests_ndjson(public_dir / "execution_requests.ndjson", lines)
+        write_results_ndjson(public_dir, lines)
+        (public_dir / "hashes.json").write_text(json.dumps([hashes[0], hashes[-1]]), encoding="utf-8")
+    return public_dir
+
+
+def _last_hash(public_dir: Path) -> str:
+    return json.loads((public_dir / "hashes.json").read_text(encoding="utf-8"))[1]
+
+
+def history_cases(lines: int, workers: int) -> List[Case]:
+    def read_ndjson(work: Path):
+        log = _log_dir(work, lines) / "execution_requests.ndjson"
+        return lambda: _read_ndjson(log)
+
+    def select_by_hash(work: Path):
+        public_dir = _log_dir(work, lines)
+        requests, _ = _read_ndjson(public_dir / "execution_requests.ndjson")
+        target = _last_hash(public_dir)  # worst case: the scan reaches the end
+        return lambda: select_request(requests=requests, request_hash=target, index=None)
+
+    def index_rebuild(work: Path):
+        index = NdjsonIndex(_log_dir(work, lines) / "execution_requests.ndjson")
+        return index.rebuild
+
+    def replay_by_hash(work: Path):
+        public_dir = _log_dir(work, lines)
+        NdjsonIndex(public_dir / "execution_requests.ndjson").sync()
+        target = _last_hash(public_dir)
+        return lambda: replay(public_dir=public_dir, request_hash=target)
+
+    def history(work: Path):
+        public_dir = _log_dir(work, lines)
+        return lambda: evaluate_history(public_dir, workers=workers, restart=True)
+
+    return [
+        Case(f"read_ndjson[{lines}]", lines, read_ndjson),
+        Case(f"select_request_by_hash[{lines}]", lines, select_by_hash),
+        Case(f"ndjson_index_rebuild[{lines}]", lines, index_rebuild),
+        Case(f"replay_by_hash[{lines}]", 1, replay_by_hash),
+        Case(f"evaluate_history[{lines}]", lines, history),
+    ]
+
+
+def fixed_cases(api_requests: int) -> List[Case]:
+    def consume_note(work: Path):
+        public_dir = work / "public-consume"
+        public_dir.mkdir(parents=True, exist_ok=True)
+        req = {"task_id": "BENCH", "payload": {"action": "write_public_note", "content": "hi\n", "filename": "c.md"}}
+        (public_dir / "last_execution_request.json").write_text(json.dumps(req), encoding="utf-8")
+        return lambda: consume(public_dir)
+
+    def evaluate_one(work: Path):
+        public_dir = _log_dir(work, 64)
+        line = (public_dir / "execution_results.ndjson").read_text(encoding="utf-8").splitlines()[0]
+        result = json.loads(line)
+        result["outputs"]["writes"] = result["outputs"]["writes"] * 64
+        return lambda: evaluate(public_dir, result)
+
+    def write_result(work: Path):
+        files = [{"path": f"src/bench/f{i}.tsx", "content": f"export const v{i} = {i};\n" * 64} for i in range(200)]
+        result = EngineeringResult.model_validate({"task_id": "BENCH", "summary": "bench", "files": files})
+        root = work / "repo"
+        return lambda: write_engineering_result(result, repo_root=root, force=True)
+
+    def plan_repair(work: Path):
+        path = work / "last_plan.json"
+        path.write_text(synthetic_pasted_plan_text(2000), encoding="utf-8")
+        return lambda: load_plan_with_repair(path)
+
+    def api_execution_request(work: Path):
+        return _api_bench(work / "public-api", api_requests)
+
+    return [
+        Case("consume", 1, consume_note),
+        Case("evaluate[64 writes]", 1, evaluate_one),
+        Case("write_engineering_result[200 files]", 200, write_result),
+        Case("load_plan_with_repair[2000 tasks]", 2000, plan_repair),
+        Case(f"api_execution_request[{api_requests} concurrent]", api_requests, api_execution_request),
+    ]
+
+
+def _api_bench(public_dir: Path, requests: int) -> Callable[[], Any]:
+    """
+    POST /execution-request through the ASGI app (no sockets), `requests` at a time, so the group-commit
+    writer batches them as it would under load. The server's public/ paths are redirected to public_dir.
+    """
+    import httpx
+
+    spec = importlib.util.spec_from_file_location("artifact_server_bench", SERVER_PATH)
+    server = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = server  # dataclasses resolve annotations through sys.modules
+    spec.loader.exec_module(server)
+
+    public_dir.mkdir(parents=True, exist_ok=True)
+    last_path = public_dir / "last_execution_request.json"
+    log_path = public_dir / "execution_requests.ndjson"
+    body = {"task_id": "API", "payload": {"action": "write_public_note", "content": "hi\n"}}
+
+    async def _burst() -> None:
+        writer = server.GroupCommitWriter(log_path, last_path)
+        patches = mock.patch.multiple(
+            server, PUBLIC_DIR=public_dir, LAST_REQ_PATH=last_path, LOG_PATH=log_path, WRITER=writer
+        )
+        with patches:
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                responses = await asyncio.gather(
+                    *(client.post("/execution-request", json=body) for _ in range(requests))
+                )
+            await writer.stop()
+        if any(r.status_code != 200 for r in responses):
+            raise RuntimeError("POST /execution-request failed during benchmark")
+
+    return lambda: asyncio.run(_burst())
+
+
+def _time_case(case: Case, work: Path, repeat: int) -> Dict[str, Any]:
+    fn = case.setup(work)
+    fn()  # warm-up: imports, page cache, lazily built indexes
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    best = min(runs)
+    return {
+        "items": case.items,
+        "best_s": best,
+        "median_s": statistics.median(runs),
+        "per_item_us": best / max(1, case.items) * 1e6,
+    }
+
+
+def run_suite(
+    lines: List[int],
+    repeat: int,
+    workers: int,
+    api_requests: int,
+    only: Optional[str] = None,
+    workdir: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """
+    Runs every case (optionally only names containing `only`) and returns the results document.
+    """
+    cases = [c for n in lines for c in history_cases(n, workers)] + fixed_cases(api_requests)
+    if only:
+        cases = [c for c in cases if only in c.name]
+
+    with tempfile.TemporaryDirectory(dir=workdir) as td:
+        work = Path(td)
+        # Keep manifests / caches inside the scratch dir, never under the repo's cache/.
+        env = {"WRITE_MANIFEST_DIR": str(work / "manifests"), "EVALUATOR_WORKERS": str(workers)}
+        with mock.patch.dict(os.environ, env):
+            results = {}
+            for case in cases:
+                results[case.name] = _time_case(case, work, repeat)
+                r = results[case.name]
+                print(f"{case.name:<44} {r['best_s'] * 1000:>10.1f} ms {r['per_item_us']:>12.2f} us/item", flush=True)
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "lines": lines,
+            "repeat": repeat,
+            "workers": workers,
+        },
+        "cases": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Tuple[str, float, float, float]]:
+    """
+    Returns [(case, baseline_s, current_s, ratio)] for cases slower than baseline by more than `threshold`.
+    Cases missing from either side are not compared.
+    """
+    regressions = []
+    for name, cur in current["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if not base or base["best_s"] <= 0:
+            continue
+        ratio = cur["best_s"] / base["best_s"]
+        if ratio > 1.0 + threshold:
+            regressions.append((name, base["best_s"], cur["best_s"], ratio))
+    return regressions
+
+
+def _write_json(path: Path, obj: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(obj, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    tmp.replace(path)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Execution pipeline benchmark suite with baseline regression check.")
+    parser.add_argument("--lines", default="10000", help="Comma-separated synthetic history sizes (e.g. 10000,100000,1000000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (best is compared)")
+    parser.add_argument("--workers", type=int, default=1, help="EVALUATOR_WORKERS for evaluate_history")
+    parser.add_argument("--api-requests", type=int, default=200, help="Concurrent POSTs per /execution-request run")
+    parser.add_argument("--only", default=None, help="Run only cases whose name contains this string")
+    parser.add_argument("--workdir", default=None, help="Parent directory for synthetic data (default: system temp)")
+    parser.add_argument("--output", default=str(DEFAULT_RESULTS_PATH), help="Where to write the results JSON")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE_PATH), help="Baseline results JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Also write the results as the new baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=float(os.getenv("BENCH_REGRESSION_THRESHOLD", "") or DEFAULT_THRESHOLD),
+        help="Allowed slowdown vs baseline before failing (0.25 = 25%%)",
+    )
+    args = parser.parse_args()
+
+    lines = [int(x) for x in args.lines.split(",") if x.strip()]
+    results = run_suite(
+        lines,
+        repeat=max(1, args.repeat),
+        workers=max(1, args.workers),
+        api_requests=max(1, args.api_requests),
+        only=args.only,
+        workdir=Path(args.workdir) if args.workdir else None,
+    )
+
+    _write_json(Path(args.output), results)
+    print(f"Wrote: {args.output}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        _write_json(baseline_path, results)
+        print(f"Saved baseline: {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --save-baseline to create one.")
+        return 0
+
+    regressions = compare(results, json.loads(baseline_path.read_text(encoding="utf-8")), args.threshold)
+    for name, base_s, cur_s, ratio in regressions:
+        print(f"REGRESSION {name}: {base_s * 1000:.1f} ms -> {cur_s * 1000:.1f} ms ({ratio:.2f}x)")
+    if regressions:
+        return 1
+    print(f"No regressions beyond {args.threshold:.0%} of baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
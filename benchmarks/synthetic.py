@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Add repo root to path
+repo_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repo_root))
+
+from utils.request_hash import compute_request_hash
+
+# One in MALFORMED_EVERY log lines is garbage, like a torn or hand-edited line.
+MALFORMED_EVERY = 997
+
+_WORDS = ["scaffold", "vite", "react", "render", "component", "deterministic", "offline", "tâche", "☃"]
+
+
+def synthetic_request(i: int, rng: random.Random) -> Dict[str, Any]:
+    """
+    A write_public_note request as the artifact server logs it (created_at + _meta with memoized hash).
+    """
+    content = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(10, 60))) + "\n"
+    req: Dict[str, Any] = {
+        "kind": "execution_request",
+        "task_id": f"BENCH-{i}",
+        "milestone_id": f"M{i % 10}",
+        "title": f"Synthetic note {i}",
+        "created_at": "2026-01-01T00:00:00+00:00",
+        "payload": {"action": "write_public_note", "content": content, "filename": f"bench/{i % 64}.md"},
+    }
+    req["_meta"] = {"source_ip": "127.0.0.1", "received_at": "2026-01-01T00:00:00+00:00"}
+    return req
+
+
+def write_requests_ndjson(path: Path, lines: int, seed: int = 0) -> List[str]:
+    """
+    Streams `lines` requests to an execution_requests.ndjson log. Returns the request hashes in order.
+    """
+    rng = random.Random(seed)
+    hashes: List[str] = []
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(lines):
+            if i % MALFORMED_EVERY == MALFORMED_EVERY - 1:
+                f.write('{"task_id": "torn\n')
+                continue
+            req = synthetic_request(i, rng)
+            hashes.append(compute_request_hash(req))
+            f.write(json.dumps(req, ensure_ascii=False, separators=(",", ":")) + "\n")
+    return hashes
+
+
+def write_results_ndjson(public_dir: Path, lines: int, files: int = 64, seed: int = 0) -> None:
+    """
+    Streams `lines` success ExecutionResults to execution_results.ndjson. Their write records point at
+    `files` real notes under public_dir/generated/bench/, so evaluation checks hit the disk.
+    """
+    rng = random.Random(seed)
+    gen_dir = public_dir / "generated" / "bench"
+    gen_dir.mkdir(parents=True, exist_ok=True)
+    records = []
+    for n in range(files):
+        data = f"note {n}\n".encode("utf-8")
+        target = gen_dir / f"{n}.md"
+        target.write_bytes(data)
+        records.append({"path": str(target), "sha256": hashlib.sha256(data).hexdigest(), "bytes": len(data)})
+
+    with (public_dir / "execution_results.ndjson").open("w", encoding="utf-8") as f:
+        for i in range(lines):
+            req = synthetic_request(i, rng)
+            rec = records[i % files]
+            result = {
+                "kind": "execution_result",
+                "agent_role": "engineer",
+                "status": "success",
+                "request_hash": compute_request_hash(req),
+                "request": {k: v for k, v in req.items() if k != "_meta"},
+                "outputs": {
+                    "action": "write_public_note",
+                    "note_path": rec["path"],
+                    "note_sha256": rec["sha256"],
+                    "note_bytes": rec["bytes"],
+                    "writes": [rec],
+                },
+                "error": None,
+            }
+            f.write(json.dumps(result, sort_keys=True, separators=(",", ":"), ensure_ascii=False) + "\n")
+
+
+def synthetic_plan_dict(tasks: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    A Plan-schema dict with `tasks` tasks over ten milestones; each depends on up to two earlier tasks.
+    """
+    rng = random.Random(seed)
+    milestones: List[Dict[str, Any]] = [{"name": f"Milestone {m}", "tasks": []} for m in range(10)]
+    for i in range(tasks):
+        depends = sorted({f"T-{rng.randrange(i)}" for _ in range(min(i, 2))})
+        milestones[i * 10 // max(1, tasks)]["tasks"].append(
+            {
+                "id": f"T-{i}",
+                "description": " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 40))),
+                "depends_on": depends,
+                "outputs": [f"src/module_{i}.tsx"],
+                "execution_hint": "engineer",
+                "task_type": "single_file",
+                "output_files": [f"src/module_{i}.tsx"],
+            }
+        )
+    return {"milestones": milestones, "assumptions": ["synthetic"], "risks": []}
+
+
+def synthetic_pasted_plan_text(tasks: int, seed: int = 0) -> str:
+    """
+    synthetic_plan_dict as pretty JSON with literal newlines pasted into descriptions
+    (the legacy last_plan.json damage load_plan_with_repair fixes).
+    """
+    text = json.dumps(synthetic_plan_dict(tasks, seed), ensure_ascii=False, indent=2)
+    return text.replace("scaffold ", "scaffold\n").replace("render ", "render\t")
@@ -1,28 +1,49 @@
 from __future__ import annotations
 
+import asyncio
 import os
+import weakref
 from pathlib import Path
-from google import genai
-from google.genai.errors import ClientError
+from typing import Dict, Iterable, List, Optional
 
-from agents.pm_agent import PMAgent
-from agents.planner_agent import PlannerAgent
 from agents.engineer_agent import EngineerAgent
-from orchestrator_utils import select_executable_task, write_engineering_result
-from utils.plan_cache import load_plan_with_repair, save_plan
+from orchestrator_utils import engineer_tasks, run_plan_tasks, write_engineering_result, write_file_artifact
+from utils.genai_retry import is_quota_error
+from utils.plan_cache import PlanCache, idea_key, load_plan_with_repair
+from utils.tracing import TRACE_FILENAME, span, trace
+from utils.usage_ledger import usage_context
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(1, int(raw))
+    except ValueError:
+        return default
+
 
 class Orchestrator:
-    def __init__(self):
-        self.repo_root = Path(__file__).parent
+    def __init__(self, repo_root: Optional[Path] = None):
+        self.repo_root = repo_root or Path(__file__).parent
 
         # Free-tier friendly controls (read OFFLINE first)
         self.offline = os.getenv("OFFLINE_MODE", "0").strip() == "1"
         self.cache_dir = self.repo_root / "cache"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
 
-        self.cached_prd_path = self.cache_dir / "last_prd.txt"
-        self.cached_plan_path = self.cache_dir / "last_plan.json"
-        self.cached_idea_path = self.cache_dir / "last_idea.txt"
+        self.plan_cache = PlanCache(self.cache_dir)
+        self._import_legacy_cache()
+
+        # arun(): max in-flight model calls per provider, shared by all ideas on one event loop.
+        self.provider_concurrency: Dict[str, int] = {
+            "openai": _env_int("OPENAI_MAX_CONCURRENCY", 4),
+            "gemini": _env_int("GEMINI_MAX_CONCURRENCY", 4),
+        }
+        # Semaphores bind to the loop they are first used on, so each running loop gets its own set
+        # (an orchestrator may be reused across asyncio.run() calls).
+        self._provider_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
 
         # OFFLINE: no API key required, no client needed
         if self.offline:
@@ -37,28 +58,67 @@ class Orchestrator:
         if not api_key:
             raise RuntimeError("GENAI_API_KEY not found in environment variables.")
 
-        self.client = genai.Client(api_key=api_key)
+        # Provider SDKs load only on this path; OFFLINE runs never import google.genai / openai.
+        from agents.pm_agent import PMAgent
+        from agents.planner_agent import PlannerAgent
+        from utils.clients import get_genai_client
 
-        self.pm = PMAgent(self.client)
+        self.client = get_genai_client(api_key)
+
+        # PM runs on OpenAI and reads OPENAI_API_KEY itself.
+        self.pm = PMAgent()
         self.planner = PlannerAgent(self.client)
         self.engineer = EngineerAgent(self.client)
 
-    def _load_cached(self):
-        if (
-            self.cached_prd_path.exists()
-            and self.cached_plan_path.exists()
-            and self.cached_idea_path.exists()
-        ):
-            cached_idea = self.cached_idea_path.read_text(encoding="utf-8").strip()
-            prd_text = self.cached_prd_path.read_text(encoding="utf-8")
-            plan = load_plan_with_repair(self.cached_plan_path)
-            return cached_idea, prd_text, plan
-        return None
-
-    def _save_cached(self, idea: str, prd_text: str, plan):
-        self.cached_idea_path.write_text(idea, encoding="utf-8")
-        self.cached_prd_path.write_text(prd_text, encoding="utf-8")
-        save_plan(plan, self.cached_plan_path)
+    def _import_legacy_cache(self) -> None:
+        """
+        One-time migration of the old single-slot cache (last_idea.txt / last_prd.txt / last_plan.json).
+        Legacy entries are never served in place of ONLINE generation: their origin is unknown.
+        """
+        legacy_idea_path = self.cache_dir / "last_idea.txt"
+        legacy_prd_path = self.cache_dir / "last_prd.txt"
+        legacy_plan_path = self.cache_dir / "last_plan.json"
+        if not (legacy_idea_path.exists() and legacy_prd_path.exists() and legacy_plan_path.exists()):
+            return
+
+        idea = legacy_idea_path.read_text(encoding="utf-8").strip()
+        if not idea or self.plan_cache.has(idea):
+            return
+
+        try:
+            plan = load_plan_with_repair(legacy_plan_path)
+        except Exception:
+            return
+        prd_text = legacy_prd_path.read_text(encoding="utf-8")
+        self.plan_cache.put(idea, prd_text, plan, source="legacy")
+
+    def _load_cached(self, idea: str, sources: Optional[Iterable[str]] = None):
+        with span("plan_cache.lookup"):
+            cached = self.plan_cache.get(idea, sources=sources)
+        stats = self.plan_cache.stats()
+        outcome = "hit" if cached else "miss"
+        print(
+            f"\nℹ️ Plan cache {outcome} ({idea_key(idea)[:12]}) — "
+            f"hits={stats['hits']} misses={stats['misses']} entries={stats['entries']}\n"
+        )
+        if cached is None:
+            return None
+        return cached.prd_text, cached.plan
+
+    def _save_cached(self, idea: str, prd_text: str, plan, source: str):
+        self.plan_cache.put(idea, prd_text, plan, source=source)
+
+    def _offline_stub(self, idea: str):
+        from utils.offline_seed import (
+            offline_prd_from_idea,
+            offline_plan_dict_for_idea,
+        )
+        from schemas.plan_schema import Plan
+
+        prd_text = offline_prd_from_idea(idea)
+        plan = Plan.model_validate(offline_plan_dict_for_idea(idea))
+        self._save_cached(idea, prd_text, plan, source="offline")
+        return prd_text, plan
 
     def _export_frontend_inputs(self, prd_text: str, plan) -> None:
         """
@@ -67,117 +127,258 @@ class Orchestrator:
         public_dir = self.repo_root / "apps" / "offline-vite-react" / "public"
         public_dir.mkdir(parents=True, exist_ok=True)
 
-        (public_dir / "last_prd.txt").write_text(prd_text, encoding="utf-8")
+        with span("export_frontend_inputs"):
+            (public_dir / "last_prd.txt").write_text(prd_text, encoding="utf-8")
+
+            # Pydantic v2: model_dump_json
+            (public_dir / "last_plan.json").write_text(
+                plan.model_dump_json(indent=2),
+                encoding="utf-8",
+            )
+
+    def run(
+        self,
+        user_input: str,
+        force_write: bool = False,
+        refresh: bool = False,
+        max_parallel: Optional[int] = None,
+    ):
+        """
+        refresh=True skips the plan cache lookup in ONLINE mode (the fresh result is still cached).
 
-        # Pydantic v2: model_dump_json
-        (public_dir / "last_plan.json").write_text(
-            plan.model_dump_json(indent=2),
-            encoding="utf-8",
-        )
+        A plan with one engineer task streams it straight to disk. A plan with several runs them on
+        the dependency scheduler (run_plan), at most max_parallel at a time (default
+        ENGINEER_MAX_PARALLEL or 4); engineering_result is then None and written_paths covers every task.
 
-    def run(self, user_input: str, force_write: bool = False):
-        """
         Returns:
           prd_text: str
           plan: Plan
           engineering_result: EngineeringResult | None
           written_paths: list[str]
+
+        Stage timings are appended to cache/traces.ndjson (see utils.tracing); model calls to the
+        usage ledger, tagged with the idea hash (see utils.usage_ledger).
         """
+        with trace("orchestrator.run", self.cache_dir / TRACE_FILENAME):
+            with usage_context(idea_hash=idea_key(user_input)):
+                return self._run(user_input, force_write=force_write, refresh=refresh, max_parallel=max_parallel)
+
+    def _run(self, user_input: str, force_write: bool, refresh: bool, max_parallel: Optional[int]):
         user_input_clean = user_input.strip()
 
         # ------------------------
         # OFFLINE MODE
         # ------------------------
         if self.offline:
-            cached = self._load_cached()
+            cached = self._load_cached(user_input_clean)
 
-            if not cached:
-                from utils.offline_seed import (
-                    offline_prd_from_idea,
-                    offline_plan_dict_for_idea,
-                )
-                from schemas.plan_schema import Plan
+            if cached:
+                prd_text, plan = cached
+            else:
+                prd_text, plan = self._offline_stub(user_input_clean)
 
-                prd_text = offline_prd_from_idea(user_input_clean)
-                plan = Plan.model_validate(
-                    offline_plan_dict_for_idea(user_input_clean)
-                )
+        # ------------------------
+        # ONLINE MODE
+        # ------------------------
+        else:
+            # Only reuse ONLINE-generated entries; offline stubs must not shadow real planning.
+            cached = None if refresh else self._load_cached(user_input_clean, sources=("online",))
 
-                self._save_cached(user_input_clean, prd_text, plan)
-                cached_idea = user_input_clean
+            if cached:
+                prd_text, plan = cached
             else:
-                cached_idea, prd_text, plan = cached
+                try:
+                    with span("pm.generate_prd"):
+                        prd_artifact = self.pm.generate_prd(user_input_clean)
+                    prd_text = self.planner._format_prd_as_text(prd_artifact.prd)
+                    with span("planner.run"):
+                        plan = self.planner.run(prd_text)
+                    self._save_cached(user_input_clean, prd_text, plan, source="online")
+
+                except Exception as e:
+                    if is_quota_error(e):
+                        cached = self._load_cached(user_input_clean)
+
+                        if cached:
+                            prd_text, plan = cached
+                        else:
+                            print(
+                                "\n⚠️ Quota exhausted and no cache entry for this idea — switching to OFFLINE stub.\n"
+                            )
+                            prd_text, plan = self._offline_stub(user_input_clean)
+                    else:
+                        raise
+
+        self._export_frontend_inputs(prd_text, plan)
+
+        # ------------------------
+        # TASK SELECTION
+        # ------------------------
+        tasks = engineer_tasks(plan)
+        if not tasks:
+            return prd_text, plan, None, []
+
+        # ------------------------
+        # ENGINEER
+        # ------------------------
+        if self.offline:
+            app_marker = self.repo_root / "apps" / "offline-vite-react" / "package.json"
+            if app_marker.exists():
+                print("\nℹ️ OFFLINE_MODE: scaffold already exists — skipping scaffold rewrite.\n")
+                return prd_text, plan, None, []
 
-            if cached_idea != user_input_clean:
-                print("\nℹ️ OFFLINE_MODE: idea changed — regenerating OFFLINE PRD/Plan and overwriting cache.\n")
-                from utils.offline_seed import (
-                    offline_prd_from_idea,
-                    offline_plan_dict_for_idea,
+            print("\nℹ️ OFFLINE_MODE active — running OFFLINE engineer scaffold.\n")
+
+        if len(tasks) > 1:
+            with span("engineer.run_plan"):
+                records = self.run_plan(plan, force_write=force_write, max_parallel=max_parallel)
+            return prd_text, plan, None, [p for r in records for p in r.written]
+
+        task = tasks[0]
+
+        # Files are written as the engineer streams them, not after the whole result arrives.
+        written_paths: List[str] = []
+
+        def _write(f) -> None:
+            written_paths.append(
+                write_file_artifact(f, repo_root=self.repo_root, force=(force_write or self.offline))
+            )
+
+        try:
+            with span("engineer.run_stream"):
+                engineering_result = self.engineer.run_stream(task, on_file=_write)
+        except Exception as e:
+            if is_quota_error(e):
+                print("\n⚠️ Engineer step skipped due to Gemini quota exhaustion.")
+                print("   You can resume later or rerun with OFFLINE_MODE=1.\n")
+                return prd_text, plan, None, []
+            raise
+
+        return prd_text, plan, engineering_result, written_paths
+
+    def run_plan(self, plan, force_write: bool = False, max_parallel: Optional[int] = None):
+        """
+        Executes every engineer task in the plan in dependency order (see run_plan_tasks),
+        writing each EngineeringResult as its task finishes.
+
+        Returns:
+          list[TaskRunRecord] in plan order
+        """
+        def _run_task(task):
+            with span("engineer.run", task_id=task.id):
+                return self.engineer.run(task)
+
+        def _report(record, _result) -> None:
+            print(f"[{record.status}] {record.task_id}" + (f" — {record.error}" if record.error else ""))
+
+        return run_plan_tasks(
+            plan,
+            _run_task,
+            repo_root=self.repo_root,
+            force=(force_write or self.offline),
+            max_parallel=max_parallel,
+            on_result=_report,
+        )
+
+    # ------------------------
+    # ASYNC PIPELINE
+    # ------------------------
+    def _provider_slot(self, provider: str) -> asyncio.Semaphore:
+        semaphores = self._provider_semaphores.setdefault(asyncio.get_running_loop(), {})
+        sem = semaphores.get(provider)
+        if sem is None:
+            sem = asyncio.Semaphore(self.provider_concurrency[provider])
+            semaphores[provider] = sem
+        return sem
+
+    async def arun(
+        self,
+        user_input: str,
+        force_write: bool = False,
+        refresh: bool = False,
+        max_parallel: Optional[int] = None,
+        export: bool = True,
+    ):
+        """
+        Coroutine twin of run(): same cache/quota/OFFLINE semantics and return shape, but model calls
+        go through the async Gemini/OpenAI clients and are bounded per provider, so one event loop
+        can drive many ideas concurrently (see arun_many). Cache, file and SQLite work runs in worker
+        threads so it never stalls the other ideas on the loop.
+
+        export=False skips writing last_prd.txt / last_plan.json for the frontend.
+        """
+        # Each arun() runs in its own task context, so concurrent ideas record separate traces.
+        with trace("orchestrator.arun", self.cache_dir / TRACE_FILENAME):
+            with usage_context(idea_hash=idea_key(user_input)):
+                return await self._arun(
+                    user_input, force_write=force_write, refresh=refresh, max_parallel=max_parallel, export=export
                 )
-                from schemas.plan_schema import Plan
 
-                prd_text = offline_prd_from_idea(user_input_clean)
-                plan = Plan.model_validate(offline_plan_dict_for_idea(user_input_clean))
-                self._save_cached(user_input_clean, prd_text, plan)
-                cached_idea = user_input_clean
+    async def _arun(
+        self,
+        user_input: str,
+        force_write: bool,
+        refresh: bool,
+        max_parallel: Optional[int],
+        export: bool,
+    ):
+        user_input_clean = user_input.strip()
 
         # ------------------------
-        # ONLINE MODE
+        # OFFLINE MODE
         # ------------------------
-        else:
-            try:
-                prd_text = self.pm.run(user_input_clean)
-                plan = self.planner.run(prd_text)
-                self._save_cached(user_input_clean, prd_text, plan)
+        if self.offline:
+            cached = await asyncio.to_thread(self._load_cached, user_input_clean)
 
-            except ClientError as e:
-                msg = str(e)
-                if "RESOURCE_EXHAUSTED" in msg or "429" in msg:
-                    cached = self._load_cached()
+            if cached:
+                prd_text, plan = cached
+            else:
+                prd_text, plan = await asyncio.to_thread(self._offline_stub, user_input_clean)
 
-                    if cached:
-                        cached_idea, prd_text, plan = cached
+        # ------------------------
+        # ONLINE MODE
+        # ------------------------
+        else:
+            cached = None
+            if not refresh:
+                cached = await asyncio.to_thread(self._load_cached, user_input_clean, ("online",))
 
-                        if cached_idea != user_input_clean:
+            if cached:
+                prd_text, plan = cached
+            else:
+                try:
+                    async with self._provider_slot("openai"):
+                        with span("pm.generate_prd"):
+                            prd_artifact = await self.pm.agenerate_prd(user_input_clean)
+                    prd_text = self.planner._format_prd_as_text(prd_artifact.prd)
+
+                    async with self._provider_slot("gemini"):
+                        with span("planner.run"):
+                            plan = await self.planner.arun_from_prd_text(prd_text)
+                    await asyncio.to_thread(self._save_cached, user_input_clean, prd_text, plan, "online")
+
+                except Exception as e:
+                    if is_quota_error(e):
+                        cached = await asyncio.to_thread(self._load_cached, user_input_clean)
+
+                        if cached:
+                            prd_text, plan = cached
+                        else:
                             print(
-                                "\n⚠️ Quota exhausted. Cached idea differs — generating a fresh OFFLINE stub.\n"
-                            )
-                            from utils.offline_seed import (
-                                offline_prd_from_idea,
-                                offline_plan_dict_for_idea,
+                                "\n⚠️ Quota exhausted and no cache entry for this idea — switching to OFFLINE stub.\n"
                             )
-                            from schemas.plan_schema import Plan
-
-                            prd_text = offline_prd_from_idea(user_input_clean)
-                            plan = Plan.model_validate(
-                                offline_plan_dict_for_idea(user_input_clean)
-                            )
-                            self._save_cached(user_input_clean, prd_text, plan)
+                            prd_text, plan = await asyncio.to_thread(self._offline_stub, user_input_clean)
                     else:
-                        print(
-                            "\n⚠️ Quota exhausted and no cache available — switching to OFFLINE stub.\n"
-                        )
-                        from utils.offline_seed import (
-                            offline_prd_from_idea,
-                            offline_plan_dict_for_idea,
-                        )
-                        from schemas.plan_schema import Plan
-
-                        prd_text = offline_prd_from_idea(user_input_clean)
-                        plan = Plan.model_validate(
-                            offline_plan_dict_for_idea(user_input_clean)
-                        )
-                        self._save_cached(user_input_clean, prd_text, plan)
-                else:
-                    raise
+                        raise
 
-        self._export_frontend_inputs(prd_text, plan)
+        if export:
+            await asyncio.to_thread(self._export_frontend_inputs, prd_text, plan)
 
         # ------------------------
         # TASK SELECTION
         # ------------------------
-        task = select_executable_task(plan)
-        if task is None or task.task_type != "scaffold":
+        tasks = engineer_tasks(plan)
+        if not tasks:
             return prd_text, plan, None, []
 
         # ------------------------
@@ -191,20 +392,51 @@ class Orchestrator:
 
             print("\nℹ️ OFFLINE_MODE active — running OFFLINE engineer scaffold.\n")
 
+        if len(tasks) > 1:
+            with span("engineer.run_plan"):
+                records = await asyncio.to_thread(self.run_plan, plan, force_write, max_parallel)
+            return prd_text, plan, None, [p for r in records for p in r.written]
+
+        task = tasks[0]
+
         try:
-            engineering_result = self.engineer.run(task)
-        except ClientError as e:
-            msg = str(e)
-            if "RESOURCE_EXHAUSTED" in msg or "429" in msg:
+            async with self._provider_slot("gemini"):
+                with span("engineer.run"):
+                    engineering_result = await self.engineer.arun(task)
+        except Exception as e:
+            if is_quota_error(e):
                 print("\n⚠️ Engineer step skipped due to Gemini quota exhaustion.")
                 print("   You can resume later or rerun with OFFLINE_MODE=1.\n")
                 return prd_text, plan, None, []
             raise
 
-        written_paths = write_engineering_result(
+        written_paths = await asyncio.to_thread(
+            write_engineering_result,
             engineering_result,
             repo_root=self.repo_root,
             force=(force_write or self.offline),
         )
 
         return prd_text, plan, engineering_result, written_paths
+
+    async def arun_many(
+        self,
+        ideas: List[str],
+        force_write: bool = False,
+        refresh: bool = False,
+        max_parallel: Optional[int] = None,
+    ) -> List[object]:
+        """
+        Drives every idea through arun() on the current event loop.
+        Results come back in input order; a failing idea yields its exception instead of a tuple.
+        With more than one idea the frontend exports (last_prd.txt / last_plan.json) are skipped:
+        concurrent ideas would overwrite each other's, and each result is returned anyway.
+        """
+        export = len(ideas) <= 1
+        return await asyncio.gather(
+            *(
+                self.arun(idea, force_write=force_write, refresh=refresh, max_parallel=max_parallel, export=export)
+                for idea in ideas
+            ),
+            return_exceptions=True,
+        )
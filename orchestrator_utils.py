@@ -1,10 +1,17 @@
 from __future__ import annotations
 
+import contextvars
+import hashlib
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List
+from typing import Callable, Dict, List, Optional
 
 from schemas.plan_schema import Plan, Task
-from schemas.engineering_schema import EngineeringResult
+from schemas.engineering_schema import EngineeringResult, FileArtifact
+from scripts.safe_write import DEFAULT_WRITE_WORKERS, WriteManifest, skip_unchanged_default
+from utils.tracing import span
 
 
 ALLOWED_PREFIXES = (
@@ -38,57 +45,154 @@ def _is_allowed_path(rel_path: str) -> bool:
     )
 
 
+def _validate_rel_path(path: str) -> str:
+    rel = path.strip()
+    if not rel:
+        raise ValueError("Empty file path in engineering result")
+
+    # Block absolute paths
+    if Path(rel).is_absolute():
+        raise ValueError(f"Absolute paths are not allowed: {rel}")
+
+    # Block path traversal (../)
+    norm = rel.replace("\\", "/")
+    if ".." in norm.split("/"):
+        raise ValueError(f"Path traversal is not allowed: {rel}")
+
+    # Allowlist enforcement
+    if not _is_allowed_path(rel):
+        raise ValueError(f"Disallowed path from EngineerAgent: {rel}")
+
+    return rel
+
+
+def _write_validated(
+    rel: str,
+    content: str,
+    repo_root: Path,
+    force: bool,
+    manifest: Optional[WriteManifest],
+) -> str:
+    """
+    Write step for an already-validated path whose parent directory exists.
+    """
+    with span("write_file", path=rel):
+        dest = repo_root / rel
+
+        if manifest is not None:
+            data = content.encode("utf-8")
+            digest = hashlib.sha256(data).hexdigest()
+            if manifest.is_unchanged(dest, data, digest):
+                return str(dest)
+
+        if dest.exists() and not force:
+            dest = repo_root / (rel + OUTPUT_SUFFIX_IF_EXISTS)
+
+        dest.write_text(content, encoding="utf-8")
+        if manifest is not None:
+            manifest.record(dest, digest)
+        return str(dest)
+
+
+def _manifest_for(repo_root: Path, skip_unchanged: Optional[bool]) -> Optional[WriteManifest]:
+    if skip_unchanged is None:
+        skip_unchanged = skip_unchanged_default()
+    return WriteManifest.for_dir(repo_root) if skip_unchanged else None
+
+
+def write_file_artifact(
+    f: FileArtifact,
+    repo_root: Path,
+    force: bool = False,
+    skip_unchanged: Optional[bool] = None,
+) -> str:
+    """
+    Writes one file with allowlist + safety checks. Returns the written path.
+    Used directly as the EngineerAgent.run_stream callback so files land as they arrive.
+
+    skip_unchanged (default: WRITE_SKIP_UNCHANGED): if the destination already holds identical bytes
+    it is left untouched (and not diverted to *.generated); the path is still returned.
+    """
+    rel = _validate_rel_path(f.path)
+    (repo_root / rel).parent.mkdir(parents=True, exist_ok=True)
+    manifest = _manifest_for(repo_root, skip_unchanged)
+    try:
+        return _write_validated(rel, f.content, repo_root, force, manifest)
+    finally:
+        if manifest is not None:
+            manifest.flush()
+
+
 def write_engineering_result(
     result: EngineeringResult,
     repo_root: Path,
     force: bool = False,
+    skip_unchanged: Optional[bool] = None,
+    max_workers: Optional[int] = None,
 ) -> List[str]:
     """
     Writes files to disk with allowlist + safety checks.
-    Returns list of written file paths.
-    """
-    written: List[str] = []
+    Returns list of written file paths (in result.files order).
 
-    for f in result.files:
-        rel = f.path.strip()
-        if not rel:
-            raise ValueError("Empty file path in engineering result")
+    All paths are validated before the first write and each directory is created once; the
+    writes themselves run on a thread pool (WRITE_MAX_WORKERS, default 8). The skip-unchanged
+    manifest is saved once, after the last write.
+    """
+    rels = [_validate_rel_path(f.path) for f in result.files]
+    for parent in sorted({(repo_root / rel).parent for rel in rels}):
+        parent.mkdir(parents=True, exist_ok=True)
 
-        # Block absolute paths
-        if Path(rel).is_absolute():
-            raise ValueError(f"Absolute paths are not allowed: {rel}")
+    manifest = _manifest_for(repo_root, skip_unchanged)
+    try:
+        return _write_all(result, rels, repo_root, force, manifest, max_workers)
+    finally:
+        if manifest is not None:
+            manifest.flush()
 
-        # Block path traversal (../)
-        norm = rel.replace("\\", "/")
-        if ".." in norm.split("/"):
-            raise ValueError(f"Path traversal is not allowed: {rel}")
 
-        # Allowlist enforcement
-        if not _is_allowed_path(rel):
-            raise ValueError(f"Disallowed path from EngineerAgent: {rel}")
+def _write_all(
+    result: EngineeringResult,
+    rels: List[str],
+    repo_root: Path,
+    force: bool,
+    manifest: Optional[WriteManifest],
+    max_workers: Optional[int],
+) -> List[str]:
+    def _write(i: int) -> str:
+        return _write_validated(rels[i], result.files[i].content, repo_root, force, manifest)
 
-        dest = repo_root / rel
-        dest.parent.mkdir(parents=True, exist_ok=True)
+    # Repeated paths must keep last-write-wins order (and the *.generated diversion), so stay sequential.
+    if len(set(rels)) != len(rels) or len(rels) < 2:
+        return [_write(i) for i in range(len(rels))]
 
-        if dest.exists() and not force:
-            dest = repo_root / (rel + OUTPUT_SUFFIX_IF_EXISTS)
+    if max_workers is None:
+        try:
+            max_workers = int(os.getenv("WRITE_MAX_WORKERS", "") or DEFAULT_WRITE_WORKERS)
+        except ValueError:
+            max_workers = DEFAULT_WRITE_WORKERS
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(rels)))) as pool:
+        # One context copy per write (taken on this thread) so write spans join the caller's trace.
+        futures = [pool.submit(contextvars.copy_context().run, _write, i) for i in range(len(rels))]
+        return [f.result() for f in futures]
 
-        dest.write_text(f.content, encoding="utf-8")
-        written.append(str(dest))
 
-    return written
+def engineer_tasks(plan: Plan) -> List[Task]:
+    """
+    Every engineer-executable task, in plan order.
+    """
+    return [
+        t
+        for ms in plan.milestones
+        for t in ms.tasks
+        if getattr(t, "execution_hint", "defer") == "engineer"
+    ]
 
 
 def select_executable_task(plan: Plan) -> Task | None:
     """
     Returns the single engineer-executable task, or None.
     """
-    executable: List[Task] = []
-
-    for ms in plan.milestones:
-        for t in ms.tasks:
-            if getattr(t, "execution_hint", "defer") == "engineer":
-                executable.append(t)
+    executable = engineer_tasks(plan)
 
     if not executable:
         return None
@@ -99,3 +203,165 @@ def select_executable_task(plan: Plan) -> Task | None:
         )
 
     return executable[0]
+
+
+DEFAULT_MAX_PARALLEL = 4
+
+
+@dataclass(frozen=True)
+class TaskGraph:
+    """
+    Dependency graph over every task in a Plan.
+    `order` is plan order (milestone by milestone) and is used to break ties deterministically.
+    """
+    tasks: Dict[str, Task]
+    order: List[str]
+    depends_on: Dict[str, List[str]]
+    dependents: Dict[str, List[str]]
+
+
+@dataclass(frozen=True)
+class TaskRunRecord:
+    task_id: str
+    status: str  # "success" | "error" | "skipped"
+    written: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def build_task_graph(plan: Plan) -> TaskGraph:
+    """
+    Builds the graph from all milestones.
+    Raises ValueError on duplicate task ids, unknown depends_on ids, or dependency cycles.
+    """
+    tasks: Dict[str, Task] = {}
+    order: List[str] = []
+
+    for ms in plan.milestones:
+        for t in ms.tasks:
+            if t.id in tasks:
+                raise ValueError(f"Duplicate task id in plan: {t.id}")
+            tasks[t.id] = t
+            order.append(t.id)
+
+    missing = sorted(
+        {f"{tid}->{dep}" for tid in order for dep in tasks[tid].depends_on if dep not in tasks}
+    )
+    if missing:
+        raise ValueError(f"Unknown task ids in depends_on: {', '.join(missing)}")
+
+    depends_on: Dict[str, List[str]] = {tid: list(dict.fromkeys(tasks[tid].depends_on)) for tid in order}
+    dependents: Dict[str, List[str]] = {tid: [] for tid in order}
+    for tid in order:
+        for dep in depends_on[tid]:
+            dependents[dep].append(tid)
+
+    # Kahn's algorithm: anything left unvisited sits on (or behind) a cycle.
+    remaining = {tid: len(depends_on[tid]) for tid in order}
+    queue = [tid for tid in order if remaining[tid] == 0]
+    visited = 0
+    while queue:
+        tid = queue.pop()
+        visited += 1
+        for child in dependents[tid]:
+            remaining[child] -= 1
+            if remaining[child] == 0:
+                queue.append(child)
+
+    if visited != len(order):
+        stuck = [tid for tid in order if remaining[tid] > 0]
+        raise ValueError(f"Dependency cycle detected among tasks: {', '.join(stuck)}")
+
+    return TaskGraph(tasks=tasks, order=order, depends_on=depends_on, dependents=dependents)
+
+
+def run_plan_tasks(
+    plan: Plan,
+    run_task: Callable[[Task], EngineeringResult],
+    repo_root: Path,
+    force: bool = False,
+    max_parallel: Optional[int] = None,
+    on_result: Optional[Callable[[TaskRunRecord, Optional[EngineeringResult]], None]] = None,
+) -> List[TaskRunRecord]:
+    """
+    Executes every engineer task in dependency order on a worker pool.
+
+    - Only execution_hint="engineer" tasks run; deferred tasks count as satisfied dependencies.
+    - Up to max_parallel tasks run concurrently (ENGINEER_MAX_PARALLEL, default 4), each in a copy of the
+      caller's context so usage_context() keys and the active trace follow it onto the worker.
+    - Each EngineeringResult is written with write_engineering_result as soon as its task finishes
+      (writes happen on the calling thread, one result at a time).
+    - A failed task marks everything downstream of it as skipped.
+    Returns one record per engineer task, in plan order.
+    """
+    graph = build_task_graph(plan)
+
+    if max_parallel is None:
+        try:
+            max_parallel = int(os.getenv("ENGINEER_MAX_PARALLEL", "") or DEFAULT_MAX_PARALLEL)
+        except ValueError:
+            max_parallel = DEFAULT_MAX_PARALLEL
+    max_parallel = max(1, max_parallel)
+
+    position = {tid: i for i, tid in enumerate(graph.order)}
+    executable = {
+        tid for tid in graph.order
+        if getattr(graph.tasks[tid], "execution_hint", "defer") == "engineer"
+    }
+
+    records: Dict[str, TaskRunRecord] = {}
+    waiting = {tid: len(graph.depends_on[tid]) for tid in graph.order}
+    failed: set[str] = set()
+    ready: List[str] = []
+
+    def _complete(tid: str) -> None:
+        # Release dependents; a failure upstream propagates as "skipped".
+        for child in graph.dependents[tid]:
+            if tid in failed:
+                failed.add(child)
+            waiting[child] -= 1
+            if waiting[child] == 0:
+                ready.append(child)
+
+    def _emit(record: TaskRunRecord, result: Optional[EngineeringResult]) -> None:
+        records[record.task_id] = record
+        if on_result is not None:
+            on_result(record, result)
+
+    ready.extend(tid for tid in graph.order if waiting[tid] == 0)
+
+    with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+        running: Dict[Future, str] = {}
+
+        while ready or running:
+            ready.sort(key=position.__getitem__)
+            while ready:
+                tid = ready.pop(0)
+                if tid not in executable:
+                    _complete(tid)
+                    continue
+                if tid in failed:
+                    _emit(TaskRunRecord(task_id=tid, status="skipped", error="upstream task failed"), None)
+                    _complete(tid)
+                    continue
+                if len(running) >= max_parallel:
+                    ready.insert(0, tid)
+                    break
+                running[pool.submit(contextvars.copy_context().run, run_task, graph.tasks[tid])] = tid
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in sorted(done, key=lambda f: position[running[f]]):
+                tid = running.pop(fut)
+                try:
+                    result = fut.result()
+                    written = write_engineering_result(result, repo_root=repo_root, force=force)
+                except Exception as e:
+                    failed.add(tid)
+                    _emit(TaskRunRecord(task_id=tid, status="error", error=f"{e.__class__.__name__}: {e}"), None)
+                else:
+                    _emit(TaskRunRecord(task_id=tid, status="success", written=written), result)
+                _complete(tid)
+
+    return [records[tid] for tid in graph.order if tid in records]
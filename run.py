@@ -1,16 +1,40 @@
 from __future__ import annotations
 
+import argparse
+
 from orchestrator import Orchestrator
+from utils.plan_cache import idea_key
+from utils.profiling import profile_run, profiling_requested
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Idea -> PRD -> Plan -> Engineer, interactively.")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the run (cProfile .prof + collapsed stacks under public/profiles/<idea key>/; or PROFILE=1)",
+    )
+    parser.add_argument(
+        "--max-parallel",
+        type=int,
+        default=None,
+        help="Engineer tasks run concurrently for multi-task plans (default: ENGINEER_MAX_PARALLEL or 4)",
+    )
+    args = parser.parse_args()
+
     idea = input("Describe your product idea:\n> ").strip()
     if not idea:
         print("No input provided.")
         return
 
     orch = Orchestrator()
-    prd_text, plan, eng_result, written = orch.run(idea)
+    public_dir = orch.repo_root / "apps" / "offline-vite-react" / "public"
+    with profile_run(public_dir, "run", profiling_requested(args.profile)) as prof:
+        if prof is not None:
+            prof.key = idea_key(idea)[:16]
+        prd_text, plan, eng_result, written = orch.run(idea, max_parallel=args.max_parallel)
+    if prof is not None:
+        print(f"\nProfile: {prof.prof_path}")
 
     print("\n==================== PRD (from PM stub) ====================\n")
     print(prd_text)
@@ -26,7 +50,7 @@ def main():
 
     if eng_result is None:
         if written:
-            print("Engineer ran, but produced no structured output (files were written).")
+            print("Engineer ran the plan's tasks (per-task status above); files were written.")
             print("\nWritten files:")
             for p in written:
                 print(f" - {p}")
@@ -1,43 +1,44 @@
 from __future__ import annotations
 
 import argparse
-import hashlib
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from pydantic import ValidationError
 
 from schemas.execution_schema import ExecutionRequest, ExecutionResult
 from scripts.deterministic_executor import execute
-from scripts.evaluate_execution_result import consume as evaluate_consume
+from scripts.evaluate_execution_result import evaluate, write_evaluation
+from utils.request_hash import canonical_json, canonicalize_request, compute_request_hash, sha256_of
+from utils.memory_budget import memory_scope, memory_stage
+from utils.schema_dump import dump_artifact
+from utils.profiling import profile_run, profiling_requested
+from utils.tracing import TRACE_FILENAME, span, trace
+from utils.usage_ledger import usage_context
 
 
 CONSUMER_VERSION = "v3"
-_REQUEST_NONDTERMINISTIC_KEYS = {"created_at", "_meta"}
 
 # Phase 5 (metadata-only): this consumer produces engineer execution results.
 _AGENT_ROLE = "engineer"
 
+QUEUE_FILENAME = "execution_requests.ndjson"
+QUEUE_OFFSET_FILENAME = "execution_requests.offset.json"
+QUEUE_RESULTS_DIRNAME = "execution_results"
+DEFAULT_QUEUE_WORKERS = 4
+DEFAULT_QUEUE_BATCH_SIZE = 64
 
-def _utc_now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
-
-
-def canonical_json(obj: Any) -> str:
-    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
-
+# _meta.executed_by on a logged request that the artifact server already ran itself (POST /execute).
+# The log keeps it for history/replay; the queue consumer skips it instead of executing it twice.
+EXECUTED_BY_SERVER = "server"
 
-def canonicalize_request(req: Dict[str, Any]) -> Dict[str, Any]:
-    out = dict(req)
-    for k in _REQUEST_NONDTERMINISTIC_KEYS:
-        out.pop(k, None)
-    return out
 
-
-def sha256_of(obj: Any) -> str:
-    return hashlib.sha256(canonical_json(obj).encode("utf-8")).hexdigest()
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
 
 
 def read_json(path: Path) -> Dict[str, Any]:
@@ -101,9 +102,7 @@ def _build_error_result(
         },
     )
 
-    # Strictly validate our own output before writing.
-    ExecutionResult.model_validate(result.model_dump())
-    return result.model_dump()
+    return dump_artifact(result)
 
 
 def build_execution_result(public_dir: Path, req_raw: Dict[str, Any]) -> Dict[str, Any]:
@@ -112,11 +111,15 @@ def build_execution_result(public_dir: Path, req_raw: Dict[str, Any]) -> Dict[st
     - Validate ExecutionRequest immediately.
     - If invalid, return an error ExecutionResult artifact (do not throw).
     - If valid, execute deterministically and return a validated ExecutionResult.
+    - Over MEMORY_BUDGET_MB, the run fails as an error ExecutionResult (MemoryBudgetExceeded).
     """
-    request_hash = sha256_of(canonicalize_request(req_raw))
+    # Recomputed, never taken from _meta: this is the strict boundary.
+    with span("request_hash"):
+        request_hash = compute_request_hash(req_raw)
 
     try:
-        req = ExecutionRequest.model_validate(req_raw)
+        with span("schema_validation", model="ExecutionRequest"):
+            req = ExecutionRequest.model_validate(req_raw)
     except ValidationError as ve:
         return _build_error_result(
             req_raw=req_raw,
@@ -125,48 +128,48 @@ def build_execution_result(public_dir: Path, req_raw: Dict[str, Any]) -> Dict[st
             message=str(ve),
         )
 
-    try:
-        outputs, _writes = execute(
-            public_dir=public_dir,
-            request_hash=request_hash,
-            task_id=req.task_id,
-            payload=req.payload or {},
-        )
-
-        result = ExecutionResult(
-            agent_role=_AGENT_ROLE,
-            status="success",
-            request_hash=request_hash,
-            request=req,
-            outputs=outputs,
-            error=None,
-            _meta={
-                "produced_at": _utc_now_iso(),
-                "consumer_version": CONSUMER_VERSION,
-            },
-        )
-
-        # Strictly validate our own output before writing.
-        ExecutionResult.model_validate(result.model_dump())
-        return result.model_dump()
-
-    except Exception as e:
-        result = ExecutionResult(
-            agent_role=_AGENT_ROLE,
-            status="error",
-            request_hash=request_hash,
-            request=req,
-            outputs={},
-            error={"message": str(e), "type": e.__class__.__name__},
-            _meta={
-                "produced_at": _utc_now_iso(),
-                "consumer_version": CONSUMER_VERSION,
-            },
-        )
-
-        # Strictly validate our own output before writing.
-        ExecutionResult.model_validate(result.model_dump())
-        return result.model_dump()
+    with memory_scope(), usage_context(request_hash=request_hash):
+        try:
+            with memory_stage("build_execution_result"):
+                with span("execute"):
+                    outputs, writes = execute(
+                        public_dir=public_dir,
+                        request_hash=request_hash,
+                        task_id=req.task_id,
+                        payload=req.payload or {},
+                    )
+
+                result = ExecutionResult(
+                    agent_role=_AGENT_ROLE,
+                    status="success",
+                    request_hash=request_hash,
+                    request=req,
+                    outputs=outputs,
+                    error=None,
+                    _meta={
+                        "produced_at": _utc_now_iso(),
+                        "consumer_version": CONSUMER_VERSION,
+                    },
+                )
+
+            # Skips depend on disk state, not on the request: informational only.
+            return dump_artifact(result, meta={"writes_skipped": sum(1 for w in writes if w.skipped)})
+
+        except Exception as e:
+            result = ExecutionResult(
+                agent_role=_AGENT_ROLE,
+                status="error",
+                request_hash=request_hash,
+                request=req,
+                outputs={},
+                error={"message": str(e), "type": e.__class__.__name__},
+                _meta={
+                    "produced_at": _utc_now_iso(),
+                    "consumer_version": CONSUMER_VERSION,
+                },
+            )
+
+            return dump_artifact(result)
 
 
 def consume(public_dir: Path) -> Dict[str, Any]:
@@ -174,15 +177,120 @@ def consume(public_dir: Path) -> Dict[str, Any]:
     STRICT BOUNDARY:
     - Never crash on missing/invalid request.
     - Always write a visible ExecutionResult artifact and append to NDJSON history.
+    - Stage timings are appended to traces.ndjson (see utils.tracing).
     """
     request_path = public_dir / "last_execution_request.json"
     result_path = public_dir / "last_execution_result.json"
     log_path = public_dir / "execution_results.ndjson"
 
+    with trace("consume", public_dir / TRACE_FILENAME):
+        try:
+            with span("read_request"):
+                req_raw = read_json(request_path)
+        except Exception as e:
+            # Missing file / invalid JSON should still produce visible artifacts
+            result = _build_error_result(
+                req_raw=None,
+                request_hash="",
+                error_type=e.__class__.__name__,
+                message=str(e),
+            )
+        else:
+            result = build_execution_result(public_dir, req_raw)
+
+        with span("publish"):
+            atomic_write(result_path, json.dumps(result, indent=2, ensure_ascii=False) + "\n")
+            append_ndjson(log_path, result)
+
+        if result.get("status") == "success":
+            # Evaluate the in-memory result (same bytes as last_execution_result.json, already validated)
+            # instead of reading it back and validating it again.
+            evaluation = evaluate(public_dir, result, prevalidated=True)
+            with span("publish"):
+                write_evaluation(public_dir, evaluation)
+
+    return result
+
+
+def execute_and_evaluate(
+    public_dir: Path, req_raw: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    In-process consume without touching last_*.json: build the ExecutionResult and, on success,
+    its EvaluationResult. Nothing is published; see publish_result.
+    """
+    with trace("execute_and_evaluate", public_dir / TRACE_FILENAME):
+        result = build_execution_result(public_dir, req_raw)
+        evaluation = evaluate(public_dir, result, prevalidated=True) if result.get("status") == "success" else None
+    return result, evaluation
+
+
+def publish_result(
+    public_dir: Path,
+    result: Dict[str, Any],
+    evaluation: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Make results visible: overwrite last_execution_result.json, append execution_results.ndjson,
+    and (if present) publish the evaluation the same way.
+    """
+    atomic_write(
+        public_dir / "last_execution_result.json",
+        json.dumps(result, indent=2, ensure_ascii=False) + "\n",
+    )
+    append_ndjson(public_dir / "execution_results.ndjson", result)
+    if evaluation is not None:
+        write_evaluation(public_dir, evaluation)
+
+
+def _read_queue_offset(path: Path) -> Tuple[int, int]:
+    """
+    Returns (byte_offset, consumed_count). Missing/corrupt offset files restart from the beginning.
+    """
+    if not path.exists():
+        return 0, 0
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return int(data.get("offset", 0)), int(data.get("consumed", 0))
+    except Exception:
+        return 0, 0
+
+
+def _read_queue_batch(queue_path: Path, offset: int, limit: int) -> Tuple[List[Tuple[int, bytes]], int]:
+    """
+    Reads up to `limit` complete lines starting at byte `offset`.
+    Returns ([(line_offset, line_bytes)], next_offset). A trailing line without a newline is
+    still being written by the producer and is left for the next drain.
+    """
+    lines: List[Tuple[int, bytes]] = []
+    pos = offset
+    with queue_path.open("rb") as f:
+        f.seek(offset)
+        while len(lines) < limit:
+            line = f.readline()
+            if not line or not line.endswith(b"\n"):
+                break
+            lines.append((pos, line))
+            pos += len(line)
+    return lines, pos
+
+
+def _process_queue_line(public_dir: Path, line_offset: int, line: bytes) -> Optional[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+    """
+    Worker body: parse + execute + evaluate one queued request.
+    Returns (execution_result, evaluation_result | None), or None for blank lines and requests the
+    server already executed.
+    """
+    # Only the very first line of a file can carry a UTF-8 BOM.
+    text = line.decode("utf-8-sig" if line_offset == 0 else "utf-8", errors="replace").strip()
+    if not text:
+        return None
+
     try:
-        req_raw = read_json(request_path)
+        req_raw = json.loads(text)
+        if not isinstance(req_raw, dict):
+            raise ValueError("Queued execution request is not a JSON object")
     except Exception as e:
-        # Missing file / invalid JSON should still produce visible artifacts
         result = _build_error_result(
             req_raw=None,
             request_hash="",
@@ -190,15 +298,81 @@ def consume(public_dir: Path) -> Dict[str, Any]:
             message=str(e),
         )
     else:
-        result = build_execution_result(public_dir, req_raw)
+        meta = req_raw.get("_meta")
+        if isinstance(meta, dict) and meta.get("executed_by") == EXECUTED_BY_SERVER:
+            return None
+        return execute_and_evaluate(public_dir, req_raw)
 
-    atomic_write(result_path, json.dumps(result, indent=2, ensure_ascii=False) + "\n")
-    append_ndjson(log_path, result)
+    return result, None
 
-    if result.get("status") == "success":
-        evaluate_consume(public_dir)
 
-    return result
+def consume_queue(
+    public_dir: Path,
+    workers: Optional[int] = None,
+    batch_size: int = DEFAULT_QUEUE_BATCH_SIZE,
+    max_items: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Drains unprocessed entries from execution_requests.ndjson.
+
+    - Progress is a committed byte offset in execution_requests.offset.json, advanced only after a
+      batch's artifacts are written, so a crash re-processes at most one batch.
+    - Requests in a batch execute concurrently on `workers` threads (EXECUTION_QUEUE_WORKERS, default 4).
+    - Entries logged by the server's POST /execute (_meta.executed_by == "server") are skipped: the
+      server already ran and published them.
+    - Artifacts are written in queue order regardless of completion order:
+        - execution_results/<ordinal>-<hash12>.json per request
+        - execution_results.ndjson / evaluation_results.ndjson appends
+        - last_execution_result.json / last_evaluation_result.json for the final entry
+    Requests in the same batch that write the same output path race; queue them separately if that matters.
+    Returns the execution results processed by this call, in queue order.
+    """
+    queue_path = public_dir / QUEUE_FILENAME
+    offset_path = public_dir / QUEUE_OFFSET_FILENAME
+    results_dir = public_dir / QUEUE_RESULTS_DIRNAME
+
+    if workers is None:
+        try:
+            workers = int(os.getenv("EXECUTION_QUEUE_WORKERS", "") or DEFAULT_QUEUE_WORKERS)
+        except ValueError:
+            workers = DEFAULT_QUEUE_WORKERS
+    workers = max(1, workers)
+    batch_size = max(1, batch_size)
+
+    if not queue_path.exists():
+        return []
+
+    offset, consumed = _read_queue_offset(offset_path)
+    if offset > queue_path.stat().st_size:
+        # Log was truncated/rotated underneath us: start over.
+        offset, consumed = 0, 0
+
+    processed: List[Dict[str, Any]] = []
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while max_items is None or len(processed) < max_items:
+            limit = batch_size if max_items is None else min(batch_size, max_items - len(processed))
+            lines, next_offset = _read_queue_batch(queue_path, offset, limit)
+            if not lines:
+                break
+
+            outcomes = list(pool.map(lambda item: _process_queue_line(public_dir, *item), lines))
+
+            for outcome in outcomes:
+                if outcome is None:
+                    continue
+                result, evaluation = outcome
+                consumed += 1
+
+                name = f"{consumed:08d}-{(result.get('request_hash') or 'invalid')[:12]}.json"
+                atomic_write(results_dir / name, json.dumps(result, indent=2, ensure_ascii=False) + "\n")
+                publish_result(public_dir, result, evaluation)
+                processed.append(result)
+
+            offset = next_offset
+            atomic_write(offset_path, json.dumps({"offset": offset, "consumed": consumed}) + "\n")
+
+    return processed
 
 
 def main() -> int:
@@ -208,12 +382,51 @@ def main() -> int:
         default="apps/offline-vite-react/public",
         help="Path to public directory",
     )
+    parser.add_argument(
+        "--queue",
+        action="store_true",
+        help="Drain unprocessed entries from execution_requests.ndjson instead of last_execution_request.json",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker threads for --queue (default: EXECUTION_QUEUE_WORKERS or 4)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=(
+            "Profile the run (cProfile .prof + collapsed stacks under <public>/profiles/<request_hash>/, "
+            "or profiles/queue-<start offset>/ with --queue; or PROFILE=1)"
+        ),
+    )
     args = parser.parse_args()
 
     repo_root = Path(__file__).resolve().parent.parent
     public_dir = (repo_root / args.public).resolve()
 
-    consume(public_dir)
+    with profile_run(public_dir, f"consume-{CONSUMER_VERSION}", profiling_requested(args.profile)) as prof:
+        if args.queue:
+            # One profile per invocation (however many batches it drains), keyed by the queue offset it
+            # started from. The queue workers show up in the .collapsed samples, not in the .prof.
+            start_offset, _ = _read_queue_offset(public_dir / QUEUE_OFFSET_FILENAME)
+            processed = consume_queue(public_dir, workers=args.workers)
+            key = f"queue-{start_offset}"
+        else:
+            result = consume(public_dir)
+            key = result.get("request_hash") or "invalid"
+        if prof is not None:
+            prof.key = key
+
+    if prof is not None:
+        print(f"Profile: {prof.prof_path}")
+        print(f"Collapsed stacks: {prof.collapsed_path}")
+
+    if args.queue:
+        print(f"Consumed {len(processed)} queued request(s) from: {public_dir / QUEUE_FILENAME}")
+        print(f"Appended: {public_dir / 'execution_results.ndjson'}")
+        return 0
 
     print(f"Wrote: {public_dir / 'last_execution_result.json'}")
     print(f"Appended: {public_dir / 'execution_results.ndjson'}")
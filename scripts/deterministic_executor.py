@@ -7,10 +7,9 @@ from typing import Any, Dict, List, Tuple
 repo_root = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(repo_root))
 
-from google import genai
-from agents.engineer_agent import EngineerAgent
-from schemas.plan_schema import Task
-from scripts.safe_write import WriteRecord, safe_write_text
+from scripts.safe_write import SafeBatchWriter, WriteRecord, safe_write_text
+from utils.clients import get_engineer_agent
+from utils.tracing import span
 
 
 def execute(
@@ -43,8 +42,11 @@ def execute(
                 "but only 'engineer' tasks can be executed"
             )
         
-        # Create Task object
-        task = Task.model_validate(task_data)
+        # Create Task object (schema imported here: note-only requests never need it)
+        from schemas.plan_schema import Task
+
+        with span("schema_validation", model="Task"):
+            task = Task.model_validate(task_data)
         
         # Initialize Engineer agent
         import os
@@ -52,20 +54,18 @@ def execute(
         if not genai_key:
             raise ValueError("GENAI_API_KEY environment variable not set")
         
-        genai_client = genai.Client(api_key=genai_key)
-        engineer = EngineerAgent(genai_client)
-        
-        # Execute task
-        result = engineer.run(task)
+        # Process-wide agent on a pooled client: batch consumption reuses connections.
+        engineer = get_engineer_agent(genai_key)
         
-        # Write generated files
-        for file_artifact in result.files:
-            rec = safe_write_text(
-                allowlist_dir=allow_dir,
-                relative_path=file_artifact.path,
-                content=file_artifact.content,
-            )
-            writes.append(rec)
+        # Execute task; each streamed file is validated on arrival and written on the writer's pool
+        with SafeBatchWriter(allow_dir) as writer:
+            with span("engineer.run_stream"):
+                result = engineer.run_stream(
+                    task,
+                    on_file=lambda f: writer.submit(f.path, f.content),
+                )
+            with span("write_wait"):
+                writes.extend(writer.records())
         
         # Build outputs
         outputs = {
@@ -73,10 +73,7 @@ def execute(
             "task_id": task_id,
             "summary": result.summary,
             "files_generated": len(result.files),
-            "writes": [
-                {"path": rec.path, "sha256": rec.sha256, "bytes": rec.bytes}
-                for rec in writes
-            ],
+            "writes": [rec.as_output() for rec in writes],
         }
         
         return outputs, writes
@@ -105,7 +102,7 @@ def execute(
             "note_path": rec.path,
             "note_sha256": rec.sha256,
             "note_bytes": rec.bytes,
-            "writes": [{"path": rec.path, "sha256": rec.sha256, "bytes": rec.bytes}],
+            "writes": [rec.as_output()],
         }
         
         return outputs, writes
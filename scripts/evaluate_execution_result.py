@@ -3,18 +3,29 @@ from __future__ import annotations
 import argparse
 import hashlib
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from pydantic import ValidationError
 
 from schemas.evaluation_schema import EvaluationResult
 from schemas.execution_schema import ExecutionResult
+from utils.memory_budget import MemoryBudgetExceeded, memory_scope, memory_stage
+from utils.schema_dump import dump_artifact, strict_schema_checks
+from utils.tracing import TRACE_FILENAME, span, trace
 
 
 EVALUATOR_VERSION = "v1"
 
+# Write verification: chunked hashing on a pool, plus a stat-keyed cache of files already verified.
+VERIFY_CACHE_FILENAME = ".write_verification_cache.json"
+VERIFY_CACHE_MAX_ENTRIES = 10_000
+DEFAULT_VERIFY_WORKERS = 8
+_HASH_CHUNK_BYTES = 1024 * 1024
+
 # _meta is intentionally NOT required (nondeterministic transport metadata)
 _REQUIRED_EXECUTION_RESULT_KEYS = {
     "kind",
@@ -26,6 +37,16 @@ _REQUIRED_EXECUTION_RESULT_KEYS = {
 }
 
 
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(1, int(raw))
+    except ValueError:
+        return default
+
+
 def _utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
@@ -96,9 +117,90 @@ def _check_outputs_shape(execution_result: Dict[str, Any]) -> Tuple[bool, List[s
     return True, []
 
 
+def _hash_file(path: Path) -> Tuple[str, int]:
+    """
+    Chunked SHA-256 (bounded memory regardless of file size). Returns (hexdigest, bytes read).
+    """
+    h = hashlib.sha256()
+    size = 0
+    buf = bytearray(_HASH_CHUNK_BYTES)
+    view = memoryview(buf)
+    with path.open("rb") as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+            size += n
+    return h.hexdigest(), size
+
+
+def _verify_key(path: Path, st: os.stat_result, expected_sha: Any, expected_bytes: Any) -> str:
+    return f"{path}|{st.st_ino}|{st.st_size}|{st.st_mtime_ns}|{expected_sha}|{expected_bytes}"
+
+
+def _load_verify_cache(public_dir: Path) -> Dict[str, int]:
+    try:
+        data = json.loads((public_dir / VERIFY_CACHE_FILENAME).read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save_verify_cache(public_dir: Path, cache: Dict[str, int]) -> None:
+    # Oldest entries first (insertion order); keep the newest VERIFY_CACHE_MAX_ENTRIES.
+    items = list(cache.items())[-VERIFY_CACHE_MAX_ENTRIES:]
+    try:
+        atomic_write(public_dir / VERIFY_CACHE_FILENAME, json.dumps(dict(items)) + "\n")
+    except OSError:
+        # The cache only saves re-reads; never fail an evaluation over it.
+        pass
+
+
+def _verify_one(p: Path, expected_sha: Any, expected_bytes: Any, cache: Dict[str, int]) -> Tuple[str, bool]:
+    """
+    Returns (outcome, cache_hit) where outcome is "ok", "missing", "sha_mismatch" or "bytes_mismatch".
+    Only successful verifications are cached, keyed by (path, inode, size, mtime_ns) and the expected
+    sha / bytes, so a record that expects something else is never answered from the cache.
+    """
+    try:
+        st = p.stat()
+    except FileNotFoundError:
+        return "missing", False
+
+    key = _verify_key(p, st, expected_sha, expected_bytes)
+    if key in cache:
+        return "ok", True
+
+    # Size is known from stat: a mismatch needs no read at all.
+    if isinstance(expected_bytes, int) and st.st_size != expected_bytes and not expected_sha:
+        return "bytes_mismatch", False
+
+    digest, size = _hash_file(p)
+    if expected_sha and digest != expected_sha:
+        return "sha_mismatch", False
+    if isinstance(expected_bytes, int) and size != expected_bytes:
+        return "bytes_mismatch", False
+
+    cache[key] = 1
+    return "ok", False
+
+
 def _check_write_records_exist(
-    public_dir: Path, execution_result: Dict[str, Any]
-) -> Tuple[bool, List[str], Dict[str, Any]]:
+    public_dir: Path,
+    execution_result: Dict[str, Any],
+    verify_cache: Optional[Dict[str, int]] = None,
+) -> Tuple[bool, List[str], Dict[str, Any], int]:
+    """
+    Verifies every write record against disk. Files are hashed on a thread pool (VERIFY_MAX_WORKERS)
+    with chunked reads; files verified before and unchanged since (same inode/size/mtime_ns) are not re-read.
+
+    Returns (ok, reasons, checks, cache_hits). cache_hits depends on cache state, not on the request,
+    so it is reported in _meta rather than in the deterministic checks.
+
+    By default the cache is loaded from / saved to <public>/.write_verification_cache.json; a caller
+    that passes `verify_cache` owns it (batch evaluation keeps one in memory per worker).
+    """
     outputs = execution_result.get("outputs") or {}
     writes = outputs.get("writes")
 
@@ -107,47 +209,56 @@ def _check_write_records_exist(
             "writes_present": False,
             "writes_checked": 0,
             "writes_ok": 0,
-        }
-
-    reasons: List[str] = []
-    checked = 0
-    ok = 0
+        }, 0
 
+    targets: List[Tuple[str, Path, Any, Any]] = []
     for w in writes:
-        checked += 1
         path_str = w.get("path")
-        expected_sha = w.get("sha256")
-        expected_bytes = w.get("bytes")
-
         p = Path(path_str)
         if not p.is_absolute():
             p = (public_dir.parent.parent / p).resolve()
+        targets.append((path_str, p, w.get("sha256"), w.get("bytes")))
 
-        if not p.exists():
-            reasons.append(f"write_file_missing:{path_str}")
-            continue
+    cache = verify_cache if verify_cache is not None else _load_verify_cache(public_dir)
+    cache_size_before = len(cache)
 
-        data = p.read_bytes()
-        if expected_sha and sha256_bytes(data) != expected_sha:
-            reasons.append(f"write_sha_mismatch:{path_str}")
-            continue
+    def _run(t: Tuple[str, Path, Any, Any]) -> Tuple[str, bool]:
+        return _verify_one(t[1], t[2], t[3], cache)
 
-        if isinstance(expected_bytes, int) and len(data) != expected_bytes:
-            reasons.append(f"write_bytes_mismatch:{path_str}")
-            continue
+    if len(targets) > 1:
+        workers = min(len(targets), _env_int("VERIFY_MAX_WORKERS", DEFAULT_VERIFY_WORKERS))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(_run, targets))
+    else:
+        outcomes = [_run(t) for t in targets]
 
-        ok += 1
+    if verify_cache is None and len(cache) != cache_size_before:
+        _save_verify_cache(public_dir, cache)
+
+    reasons: List[str] = []
+    ok = 0
+    hits = 0
+    for (path_str, _, _, _), (outcome, hit) in zip(targets, outcomes):
+        hits += int(hit)
+        if outcome == "ok":
+            ok += 1
+        elif outcome == "missing":
+            reasons.append(f"write_file_missing:{path_str}")
+        elif outcome == "sha_mismatch":
+            reasons.append(f"write_sha_mismatch:{path_str}")
+        else:
+            reasons.append(f"write_bytes_mismatch:{path_str}")
 
     checks = {
         "writes_present": True,
-        "writes_checked": checked,
+        "writes_checked": len(targets),
         "writes_ok": ok,
     }
 
     if reasons:
-        return False, reasons, checks
+        return False, reasons, checks, hits
 
-    return True, [], checks
+    return True, [], checks, hits
 
 
 def _build_fail_result(request_hash: str, reasons: List[str], checks: Dict[str, Any]) -> Dict[str, Any]:
@@ -161,22 +272,40 @@ def _build_fail_result(request_hash: str, reasons: List[str], checks: Dict[str,
             "evaluator_version": EVALUATOR_VERSION,
         },
     )
-    # Strictly validate our own output before writing.
-    EvaluationResult.model_validate(result.model_dump())
-    return result.model_dump()
+    return dump_artifact(result)
 
 
-def evaluate(public_dir: Path, execution_result_raw: Dict[str, Any]) -> Dict[str, Any]:
+def evaluate(
+    public_dir: Path,
+    execution_result_raw: Dict[str, Any],
+    verify_cache: Optional[Dict[str, int]] = None,
+    prevalidated: bool = False,
+) -> Dict[str, Any]:
     """
     STRICT BOUNDARY:
     - Validate ExecutionResult immediately.
     - If invalid, produce a fail EvaluationResult artifact and do NOT run deeper checks.
+    - prevalidated=True: the dict is a dump_artifact() of an ExecutionResult built in this process,
+      so schema validation is skipped (unless STRICT_SCHEMA_CHECKS is set).
+    - Write verification over MEMORY_BUDGET_MB fails the evaluation (memory_budget_exceeded:<stage>).
     """
+    with span("evaluate"), memory_scope():
+        return _evaluate(public_dir, execution_result_raw, verify_cache, prevalidated)
+
+
+def _evaluate(
+    public_dir: Path,
+    execution_result_raw: Dict[str, Any],
+    verify_cache: Optional[Dict[str, int]],
+    prevalidated: bool,
+) -> Dict[str, Any]:
     checks: Dict[str, Any] = {}
     reasons: List[str] = []
 
     try:
-        ExecutionResult.model_validate(execution_result_raw)
+        if not prevalidated or strict_schema_checks():
+            with span("schema_validation", model="ExecutionResult"):
+                ExecutionResult.model_validate(execution_result_raw)
         checks["execution_result_schema_valid"] = True
     except ValidationError:
         checks["execution_result_schema_valid"] = False
@@ -198,7 +327,13 @@ def evaluate(public_dir: Path, execution_result_raw: Dict[str, Any]) -> Dict[str
     checks["outputs_shape_valid"] = ok
     reasons.extend(r)
 
-    ok, r, write_checks = _check_write_records_exist(public_dir, execution_result_raw)
+    try:
+        with span("verify_writes"), memory_stage("check_write_records"):
+            ok, r, write_checks, cache_hits = _check_write_records_exist(
+                public_dir, execution_result_raw, verify_cache
+            )
+    except MemoryBudgetExceeded as e:
+        ok, r, write_checks, cache_hits = False, [f"memory_budget_exceeded:{e.stage}"], {}, 0
     checks["write_records_valid"] = ok
     checks.update(write_checks)
     reasons.extend(r)
@@ -216,9 +351,7 @@ def evaluate(public_dir: Path, execution_result_raw: Dict[str, Any]) -> Dict[str
         },
     )
 
-    # Strictly validate our own output before writing.
-    EvaluationResult.model_validate(result.model_dump())
-    return result.model_dump()
+    return dump_artifact(result, meta={"writes_cache_hits": cache_hits})
 
 
 def consume(public_dir: Path) -> Dict[str, Any]:
@@ -228,30 +361,195 @@ def consume(public_dir: Path) -> Dict[str, Any]:
     - Always write a visible EvaluationResult artifact and append to NDJSON history.
     """
     execution_result_path = public_dir / "last_execution_result.json"
-    eval_result_path = public_dir / "last_evaluation_result.json"
-    eval_log_path = public_dir / "evaluation_results.ndjson"
 
-    try:
-        execution_result = read_json(execution_result_path)
-    except Exception as e:
-        evaluation_result = _build_fail_result(
-            request_hash="",
-            reasons=["missing_or_invalid_execution_result"],
-            checks={
-                "execution_result_schema_valid": False,
-                "error_type": e.__class__.__name__,
-            },
-        )
-    else:
-        evaluation_result = evaluate(public_dir, execution_result)
+    with trace("evaluate_consume", public_dir / TRACE_FILENAME):
+        try:
+            execution_result = read_json(execution_result_path)
+        except Exception as e:
+            evaluation_result = _build_fail_result(
+                request_hash="",
+                reasons=["missing_or_invalid_execution_result"],
+                checks={
+                    "execution_result_schema_valid": False,
+                    "error_type": e.__class__.__name__,
+                },
+            )
+        else:
+            evaluation_result = evaluate(public_dir, execution_result)
+
+        with span("publish"):
+            write_evaluation(public_dir, evaluation_result)
+    return evaluation_result
+
 
+def write_evaluation(public_dir: Path, evaluation_result: Dict[str, Any]) -> None:
+    """
+    Publish an EvaluationResult: overwrite last_evaluation_result.json and append to evaluation_results.ndjson.
+    """
     atomic_write(
-        eval_result_path,
+        public_dir / "last_evaluation_result.json",
         json.dumps(evaluation_result, indent=2, ensure_ascii=False) + "\n",
     )
-    append_ndjson(eval_log_path, evaluation_result)
+    append_ndjson(public_dir / "evaluation_results.ndjson", evaluation_result)
+
+
+# ------------------------
+# Whole-history batch evaluation
+# ------------------------
+HISTORY_SOURCE_FILENAME = "execution_results.ndjson"
+HISTORY_OUTPUT_FILENAME = "evaluation_history.ndjson"
+HISTORY_CHECKPOINT_FILENAME = "evaluation_history.checkpoint.json"
+DEFAULT_HISTORY_BATCH_SIZE = 1024
+
+def _empty_history_state() -> Dict[str, Any]:
+    return {
+        "evaluator_version": EVALUATOR_VERSION,
+        "offset": 0,
+        "output_bytes": 0,
+        "evaluated": 0,
+        "pass": 0,
+        "fail": 0,
+        "malformed": 0,
+        "reasons": {},
+    }
+
+
+def _read_history_checkpoint(path: Path) -> Dict[str, Any]:
+    """
+    Missing/corrupt checkpoints, or ones written by another evaluator version, start over.
+    """
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return _empty_history_state()
+    if not isinstance(data, dict) or data.get("evaluator_version") != EVALUATOR_VERSION:
+        return _empty_history_state()
+    return {**_empty_history_state(), **data}
 
-    return evaluation_result
+
+def _read_history_batch(path: Path, offset: int, limit: int) -> Tuple[List[bytes], int]:
+    """
+    Up to `limit` complete lines from byte `offset`; a trailing partial line is left for the next run.
+    """
+    lines: List[bytes] = []
+    pos = offset
+    with path.open("rb") as f:
+        f.seek(offset)
+        while len(lines) < limit:
+            line = f.readline()
+            if not line or not line.endswith(b"\n"):
+                break
+            lines.append(line)
+            pos += len(line)
+    return lines, pos
+
+
+def _evaluate_history_line(public_dir: str, line: bytes, first_line: bool) -> Optional[Dict[str, Any]]:
+    """
+    Worker-process entry point. Returns None for blank or malformed lines.
+    """
+    if not line.strip():
+        return None
+    try:
+        obj = json.loads(line.decode("utf-8-sig" if first_line else "utf-8"))
+    except Exception:
+        return None
+    if not isinstance(obj, dict):
+        return None
+    # A fresh verification cache per record keeps the consolidated output independent of how
+    # records were spread across workers (_meta.writes_cache_hits is always 0 here).
+    return evaluate(Path(public_dir), obj, verify_cache={})
+
+
+def evaluate_history(
+    public_dir: Path,
+    workers: Optional[int] = None,
+    batch_size: int = DEFAULT_HISTORY_BATCH_SIZE,
+    max_items: Optional[int] = None,
+    restart: bool = False,
+) -> Dict[str, Any]:
+    """
+    Re-evaluates every ExecutionResult in execution_results.ndjson.
+
+    - Records are streamed in batches and evaluated on `workers` processes (EVALUATOR_WORKERS,
+      default: CPU count; 1 evaluates in-process).
+    - Evaluations are appended in history order to evaluation_history.ndjson.
+    - evaluation_history.checkpoint.json records the source offset, the output size and the running
+      counts after every batch, so an interrupted run resumes where it stopped. An output longer
+      than the checkpoint (crash mid-batch) is truncated back to it.
+    - Blank lines are skipped; malformed lines are counted but produce no evaluation.
+    Returns the summary counts (the checkpoint contents).
+    """
+    source = public_dir / HISTORY_SOURCE_FILENAME
+    output = public_dir / HISTORY_OUTPUT_FILENAME
+    checkpoint_path = public_dir / HISTORY_CHECKPOINT_FILENAME
+
+    if workers is None:
+        workers = _env_int("EVALUATOR_WORKERS", os.cpu_count() or 1)
+    workers = max(1, workers)
+    batch_size = max(1, batch_size)
+
+    state = _empty_history_state() if restart else _read_history_checkpoint(checkpoint_path)
+    if not source.exists():
+        return state
+
+    output_size = output.stat().st_size if output.exists() else 0
+    if state["offset"] > source.stat().st_size or output_size < state["output_bytes"]:
+        # Source rotated or output lost: the checkpoint no longer describes these files.
+        state = _empty_history_state()
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with output.open("ab") as f:
+        f.truncate(state["output_bytes"])
+
+    pool: Optional[ProcessPoolExecutor] = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    processed = 0
+    try:
+        while max_items is None or processed < max_items:
+            limit = batch_size if max_items is None else min(batch_size, max_items - processed)
+            lines, next_offset = _read_history_batch(source, state["offset"], limit)
+            if not lines:
+                break
+
+            firsts = [state["offset"] == 0 and i == 0 for i in range(len(lines))]
+            if pool is None:
+                evaluations = [_evaluate_history_line(str(public_dir), l, fl) for l, fl in zip(lines, firsts)]
+            else:
+                evaluations = list(
+                    pool.map(
+                        _evaluate_history_line,
+                        [str(public_dir)] * len(lines),
+                        lines,
+                        firsts,
+                        chunksize=max(1, len(lines) // (workers * 4)),
+                    )
+                )
+
+            out = bytearray()
+            for line, evaluation in zip(lines, evaluations):
+                if evaluation is None:
+                    if line.strip():
+                        state["malformed"] += 1
+                    continue
+                state["evaluated"] += 1
+                state["pass" if evaluation.get("status") == "pass" else "fail"] += 1
+                for reason in evaluation.get("reasons") or []:
+                    # Group per-file reasons (write_sha_mismatch:<path>) by kind to keep the summary bounded.
+                    kind = str(reason).split(":", 1)[0]
+                    state["reasons"][kind] = state["reasons"].get(kind, 0) + 1
+                out += (canonical_json(evaluation) + "\n").encode("utf-8")
+
+            with output.open("ab") as f:
+                f.write(out)
+            state["output_bytes"] += len(out)
+            state["offset"] = next_offset
+            processed += len(lines)
+            atomic_write(checkpoint_path, json.dumps(state, indent=2, sort_keys=True) + "\n")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return state
 
 
 def main() -> int:
@@ -261,11 +559,38 @@ def main() -> int:
         default="apps/offline-vite-react/public",
         help="Path to public directory",
     )
+    parser.add_argument(
+        "--history",
+        action="store_true",
+        help="Re-evaluate every record in execution_results.ndjson (resumes from the checkpoint)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for --history (default: EVALUATOR_WORKERS or CPU count)",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="With --history: ignore the checkpoint and rebuild evaluation_history.ndjson from scratch",
+    )
     args = parser.parse_args()
 
     repo_root = Path(__file__).resolve().parent.parent
     public_dir = (repo_root / args.public).resolve()
 
+    if args.history:
+        summary = evaluate_history(public_dir, workers=args.workers, restart=args.restart)
+        print(
+            f"Evaluated {summary['evaluated']} result(s): "
+            f"{summary['pass']} pass, {summary['fail']} fail, {summary['malformed']} malformed line(s)"
+        )
+        for kind, count in sorted(summary["reasons"].items(), key=lambda kv: (-kv[1], kv[0])):
+            print(f"  {kind}: {count}")
+        print(f"Wrote: {public_dir / HISTORY_OUTPUT_FILENAME}")
+        return 0
+
     consume(public_dir)
 
     print(f"Wrote: {public_dir / 'last_evaluation_result.json'}")
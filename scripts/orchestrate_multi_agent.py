@@ -13,10 +13,13 @@ repo_root = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(repo_root))
 
 from agents.pm_agent import PMAgent
-from agents.planner_agent import PlannerAgent
-from google import genai
 from schemas.plan_schema import Plan
 from schemas.prd_schema import PRDArtifact
+from utils.clients import get_planner_agent
+from utils.plan_cache import idea_key
+from utils.profiling import profile_run, profiling_requested
+from utils.tracing import TRACE_FILENAME, span, trace
+from utils.usage_ledger import usage_context
 
 
 def _utc_now_iso() -> str:
@@ -65,8 +68,21 @@ def orchestrate_multi_agent(
     
     Returns:
         Summary dict with paths to all generated artifacts
+    
+    Stage timings are appended to <artifacts_dir>/traces.ndjson.
     """
     artifacts_dir = artifacts_dir.resolve()
+    with trace("orchestrate_multi_agent", artifacts_dir / TRACE_FILENAME):
+        with usage_context(idea_hash=idea_key(user_requirements)):
+            return _orchestrate(user_requirements, artifacts_dir, openai_api_key, genai_api_key)
+
+
+def _orchestrate(
+    user_requirements: str,
+    artifacts_dir: Path,
+    openai_api_key: str | None,
+    genai_api_key: str | None,
+) -> Dict[str, Any]:
     agent_sequence: List[str] = []
     
     print("=" * 60)
@@ -83,7 +99,8 @@ def orchestrate_multi_agent(
     agent_sequence.append("pm")
     
     pm_agent = PMAgent(api_key=openai_api_key)
-    prd_artifact = pm_agent.generate_prd(user_requirements)
+    with span("pm.generate_prd"):
+        prd_artifact = pm_agent.generate_prd(user_requirements)
     
     # Add agent sequence metadata
     prd_dict = prd_artifact.model_dump()
@@ -109,10 +126,10 @@ def orchestrate_multi_agent(
             "or pass genai_api_key parameter."
         )
     
-    genai_client = genai.Client(api_key=genai_key)
-    planner_agent = PlannerAgent(genai_client)
+    planner_agent = get_planner_agent(genai_key)
     
-    plan = planner_agent.run_from_prd_artifact(prd_path)
+    with span("planner.run"):
+        plan = planner_agent.run_from_prd_artifact(prd_path)
     
     plan_artifact = create_plan_artifact(plan, agent_sequence.copy())
     plan_path = artifacts_dir / "last_plan.json"
@@ -174,6 +191,11 @@ def main() -> int:
         default="apps/offline-vite-react/public",
         help="Path to artifacts directory (default: apps/offline-vite-react/public)",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the run (cProfile .prof + collapsed stacks under <artifacts>/profiles/<idea key>/; or PROFILE=1)",
+    )
     
     args = parser.parse_args()
     
@@ -191,10 +213,15 @@ def main() -> int:
     artifacts_dir = (repo_root / args.artifacts).resolve()
     
     try:
-        result = orchestrate_multi_agent(
-            user_requirements=user_requirements,
-            artifacts_dir=artifacts_dir,
-        )
+        with profile_run(artifacts_dir, "orchestrate_multi_agent", profiling_requested(args.profile)) as prof:
+            if prof is not None:
+                prof.key = idea_key(user_requirements)[:16]
+            result = orchestrate_multi_agent(
+                user_requirements=user_requirements,
+                artifacts_dir=artifacts_dir,
+            )
+        if prof is not None:
+            print(f"Profile: {prof.prof_path}")
         return 0 if result["status"] == "success" else 1
     except Exception as e:
         print(f"\nError: {e}")
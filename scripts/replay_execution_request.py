@@ -5,7 +5,11 @@ import json
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
-from scripts.consume_execution_request import consume, canonicalize_request, sha256_of
+from scripts.consume_execution_request import CONSUMER_VERSION, consume
+from utils.ndjson_index import NdjsonIndex, index_path_for
+from utils.profiling import profile_run, profiling_requested
+from utils.request_hash import compute_request_hash
+from utils.tracing import TRACE_FILENAME, span, trace
 
 
 def _read_ndjson(path: Path) -> Tuple[List[Dict[str, Any]], int]:
@@ -36,7 +40,7 @@ def _read_ndjson(path: Path) -> Tuple[List[Dict[str, Any]], int]:
 
 
 def _compute_request_hash(req_raw: Dict[str, Any]) -> str:
-    return sha256_of(canonicalize_request(req_raw))
+    return compute_request_hash(req_raw)
 
 
 def select_request(
@@ -68,6 +72,35 @@ def select_request(
     return requests[-1]
 
 
+def select_indexed_request(
+    *,
+    index: NdjsonIndex,
+    request_hash: Optional[str],
+    ordinal: Optional[int],
+) -> Tuple[Dict[str, Any], str]:
+    """
+    Same selection rules as select_request, but seeks straight to the chosen line via the sidecar index.
+    Returns (request, request_hash).
+    """
+    count = index.count()
+    if count == 0:
+        raise ValueError("No valid requests found to replay.")
+
+    if request_hash:
+        found = index.find_hash(request_hash)
+        if found is None:
+            raise ValueError(f"request_hash not found in NDJSON: {request_hash}")
+        ordinal = found
+    elif ordinal is not None:
+        if ordinal < 0 or ordinal >= count:
+            raise ValueError(f"index out of range: {ordinal} (valid: 0..{count-1})")
+    else:
+        ordinal = count - 1
+
+    _, _, selected_hash = index.entry(ordinal)
+    return index.read_object(ordinal), selected_hash
+
+
 def atomic_write_json(path: Path, obj: Dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     tmp = path.with_suffix(path.suffix + ".tmp")
@@ -108,8 +141,10 @@ def replay(
 ) -> Dict[str, Any]:
     """
     Deterministic replay:
-    - Read execution_requests.ndjson from public/
-    - Select a request (hash / index / latest)
+    - Read the execution_requests.ndjson sidecar index (execution_requests.ndjson.idx) read-only,
+      scanning only lines appended since it was last written (the server owns the sidecar; a log
+      without one gets it built on its first replay)
+    - Select a request (hash / index / latest) and read only that line
     - Overwrite last_execution_request.json
     - Run consumer, which writes:
         - last_execution_result.json (+ execution_results.ndjson)
@@ -117,19 +152,39 @@ def replay(
     - Inject replay metadata into the latest artifacts for UI visibility
     """
     public_dir = public_dir.resolve()
+    with trace("replay", public_dir / TRACE_FILENAME):
+        return _replay(public_dir, request_hash, index)
+
+
+def _replay(public_dir: Path, request_hash: Optional[str], index: Optional[int]) -> Dict[str, Any]:
     ndjson_path = public_dir / "execution_requests.ndjson"
     last_req_path = public_dir / "last_execution_request.json"
 
-    requests, malformed = _read_ndjson(ndjson_path)
-    chosen = select_request(requests=requests, request_hash=request_hash, index=index)
+    # A log written before indexing has no sidecar yet: build it once so later replays seek instead of
+    # rehashing every line. The last line may still be in flight, so it is left to the in-memory tail.
+    if ndjson_path.exists() and not index_path_for(ndjson_path).exists():
+        with span("index_build"):
+            NdjsonIndex(ndjson_path).rebuild(include_partial=False)
+
+    # Lines the server has not indexed yet (incl. a complete last line without its newline) are
+    # scanned in memory; an existing sidecar is never written from this process.
+    ndjson_index = NdjsonIndex(ndjson_path, read_only=True)
+    with span("index_sync"):
+        ndjson_index.sync(include_partial=True)
+    with span("select_request"):
+        chosen, selected_hash = select_indexed_request(
+            index=ndjson_index,
+            request_hash=request_hash,
+            ordinal=index,
+        )
 
     atomic_write_json(last_req_path, chosen)
 
     result = consume(public_dir)
 
     replay_meta: Dict[str, Any] = {
-        "selected_request_hash": _compute_request_hash(chosen),
-        "malformed_ndjson_lines_ignored": malformed,
+        "selected_request_hash": selected_hash,
+        "malformed_ndjson_lines_ignored": ndjson_index.malformed,
         "selected_index": index,
     }
 
@@ -160,14 +215,40 @@ def main() -> int:
         default=None,
         help="Replay by 0-based index in execution_requests.ndjson (after filtering malformed lines).",
     )
+    parser.add_argument(
+        "--rebuild-index",
+        action="store_true",
+        help=(
+            "Rebuild execution_requests.ndjson.idx from scratch (e.g. for logs written before indexing) and exit. "
+            "Stop the artifact server first: it is the sidecar's only other writer."
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the run (cProfile .prof + collapsed stacks under <public>/profiles/<request_hash>/; or PROFILE=1)",
+    )
 
     args = parser.parse_args()
 
     repo_root = Path(__file__).resolve().parent.parent
     public_dir = (repo_root / args.public).resolve()
 
-    result = replay(public_dir=public_dir, request_hash=args.request_hash, index=args.index)
-
+    if args.rebuild_index:
+        ndjson_index = NdjsonIndex(public_dir / "execution_requests.ndjson")
+        ndjson_index.rebuild()
+        print(f"Rebuilt: {ndjson_index.path}")
+        print(f"Indexed requests: {ndjson_index.count()} (malformed lines: {ndjson_index.malformed})")
+        return 0
+
+    with profile_run(public_dir, f"replay-{CONSUMER_VERSION}", profiling_requested(args.profile)) as prof:
+        result = replay(public_dir=public_dir, request_hash=args.request_hash, index=args.index)
+        if prof is not None:
+            prof.key = result.get("_replay", {}).get("selected_request_hash")
+
+    if prof is not None:
+        print(f"Profile: {prof.prof_path}")
+        print(f"Collapsed stacks: {prof.collapsed_path}")
     print("Replay complete.")
     print(f"Public dir: {public_dir}")
     print(f"Status: {result.get('status')}")
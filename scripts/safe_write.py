@@ -1,8 +1,20 @@
 ﻿from __future__ import annotations
+import contextvars
 import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from utils.tracing import span
+
+DEFAULT_MANIFEST_DIR = Path(__file__).resolve().parent.parent / "cache" / "write_manifests"
+DEFAULT_WRITE_WORKERS = 8
+
+_TRUTHY = {"1", "true", "yes", "y", "on"}
 
 ALLOWED_EXTENSIONS = {
     "", ".txt", ".md", ".json",  # Added "" for files without extension
@@ -18,6 +30,112 @@ class WriteRecord:
     path: str
     sha256: str
     bytes: int
+    skipped: bool = False  # True when identical bytes were already on disk (no write happened)
+
+    def as_output(self) -> Dict[str, Any]:
+        """
+        The write record as it appears in an ExecutionResult's outputs.writes. `skipped` depends on what
+        was already on disk, so it is left out here (the consumer reports it as _meta.writes_skipped).
+        """
+        return {"path": self.path, "sha256": self.sha256, "bytes": self.bytes}
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(1, int(raw))
+    except ValueError:
+        return default
+
+
+def skip_unchanged_default() -> bool:
+    """
+    WRITE_SKIP_UNCHANGED=1 turns on skip-unchanged writes for callers that don't choose explicitly.
+    """
+    return os.getenv("WRITE_SKIP_UNCHANGED", "").strip().lower() in _TRUTHY
+
+
+class WriteManifest:
+    """
+    Stat-keyed digest cache for one output directory: absolute path -> (size, mtime_ns, sha256).
+
+    If a file's size and mtime_ns still match its entry, the recorded digest is trusted and the file
+    is not re-read. The manifest lives under cache/write_manifests/ (outside any watched
+    directory) and is only a cache: a lost or stale entry just costs one re-hash.
+
+    record() only updates memory; writers call flush() once per batch, so the file is rewritten once
+    per batch rather than once per written file.
+    """
+
+    _instances: Dict[str, "WriteManifest"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            self._entries: Dict[str, list] = data if isinstance(data, dict) else {}
+        except Exception:
+            self._entries = {}
+
+    @classmethod
+    def for_dir(cls, base_dir: Path) -> "WriteManifest":
+        """
+        Process-wide manifest for base_dir. WRITE_MANIFEST_DIR overrides the manifest location.
+        """
+        base = str(base_dir.resolve())
+        with cls._instances_lock:
+            inst = cls._instances.get(base)
+            if inst is None:
+                manifest_dir = Path(os.getenv("WRITE_MANIFEST_DIR", "").strip() or DEFAULT_MANIFEST_DIR)
+                name = hashlib.sha256(base.encode("utf-8")).hexdigest()[:16] + ".json"
+                inst = cls(manifest_dir / name)
+                cls._instances[base] = inst
+            return inst
+
+    def is_unchanged(self, target: Path, data: bytes, digest: str) -> bool:
+        """
+        True if `target` already holds exactly `data`. A size mismatch short-circuits without hashing.
+        """
+        try:
+            st = target.stat()
+        except FileNotFoundError:
+            return False
+        if st.st_size != len(data):
+            return False
+
+        key = str(target.resolve())
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return entry[2] == digest
+
+        current = _sha256_bytes(target.read_bytes())
+        self.record(target, current)
+        return current == digest
+
+    def record(self, target: Path, digest: str) -> None:
+        st = target.stat()
+        with self._lock:
+            self._entries[str(target.resolve())] = [st.st_size, st.st_mtime_ns, digest]
+            self._dirty = True
+
+    def flush(self) -> None:
+        """
+        Persist entries recorded since the last flush (no-op when nothing changed).
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(self._entries, sort_keys=True), encoding="utf-8")
+            tmp.replace(self.path)
+            self._dirty = False
 
 
 def _sha256_bytes(data: bytes) -> str:
@@ -31,21 +149,15 @@ def _ensure_within_dir(base: Path, target: Path) -> None:
         raise ValueError(f"Unsafe path (escapes allowlist dir): {target}")
 
 
-def safe_write_text(
-    *,
+def _resolve_target(
     allowlist_dir: Path,
     relative_path: str,
-    content: str,
-    allowed_extensions: Optional[Iterable[str]] = None,
-) -> WriteRecord:
+    exts: Set[str],
+    base_resolved: Optional[Path] = None,
+) -> Path:
     """
-    Deterministic, allow-listed file write.
-    - Writes ONLY under allowlist_dir
-    - Rejects path traversal / escaping
-    - Restricts file extensions
-    - Atomic write
+    Validation shared by single and batched writes. Returns the target path (not yet written).
     """
-    allowlist_dir.mkdir(parents=True, exist_ok=True)
     rel = Path(relative_path)
     
     # Disallow absolute paths and drive-rooted paths
@@ -56,20 +168,171 @@ def safe_write_text(
     target = (allowlist_dir / rel)
     
     # Enforce extension allowlist
-    exts = set(allowed_extensions) if allowed_extensions is not None else ALLOWED_EXTENSIONS
     if target.suffix.lower() not in exts:
         raise ValueError(f"Disallowed extension: {target.suffix} (allowed: {sorted(exts)})")
     
     # Ensure no traversal outside allowlist_dir
-    _ensure_within_dir(allowlist_dir, target)
-    
-    data = content.encode("utf-8")
-    digest = _sha256_bytes(data)
-    
-    # Atomic write
+    if base_resolved is None:
+        _ensure_within_dir(allowlist_dir, target)
+    else:
+        target_resolved = target.resolve()
+        if base_resolved not in target_resolved.parents and base_resolved != target_resolved:
+            raise ValueError(f"Unsafe path (escapes allowlist dir): {target}")
+    return target
+
+
+def _write_target(target: Path, content: str, manifest: Optional[WriteManifest]) -> WriteRecord:
+    """
+    Encode + hash + (skip-unchanged check) + atomic write. The parent directory must already exist.
+    """
+    with span("write_file", path=target.name):
+        data = content.encode("utf-8")
+        digest = _sha256_bytes(data)
+
+        if manifest is not None and manifest.is_unchanged(target, data, digest):
+            return WriteRecord(path=str(target), sha256=digest, bytes=len(data), skipped=True)
+
+        # Atomic write
+        tmp = target.with_suffix(target.suffix + ".tmp")
+        tmp.write_bytes(data)
+        tmp.replace(target)
+
+        if manifest is not None:
+            manifest.record(target, digest)
+
+        return WriteRecord(path=str(target), sha256=digest, bytes=len(data))
+
+
+def safe_write_text(
+    *,
+    allowlist_dir: Path,
+    relative_path: str,
+    content: str,
+    allowed_extensions: Optional[Iterable[str]] = None,
+    skip_unchanged: Optional[bool] = None,
+) -> WriteRecord:
+    """
+    Deterministic, allow-listed file write.
+    - Writes ONLY under allowlist_dir
+    - Rejects path traversal / escaping
+    - Restricts file extensions
+    - Atomic write
+    - skip_unchanged (default: WRITE_SKIP_UNCHANGED): identical bytes on disk are left untouched
+      (no tmp+replace, so file watchers don't fire) and the record is marked skipped
+    """
+    allowlist_dir.mkdir(parents=True, exist_ok=True)
+    exts = set(allowed_extensions) if allowed_extensions is not None else ALLOWED_EXTENSIONS
+    target = _resolve_target(allowlist_dir, relative_path, exts)
+
+    if skip_unchanged is None:
+        skip_unchanged = skip_unchanged_default()
+    manifest = WriteManifest.for_dir(allowlist_dir) if skip_unchanged else None
+
     target.parent.mkdir(parents=True, exist_ok=True)
-    tmp = target.with_suffix(target.suffix + ".tmp")
-    tmp.write_bytes(data)
-    tmp.replace(target)
-    
-    return WriteRecord(path=str(target), sha256=digest, bytes=len(data))
+    try:
+        return _write_target(target, content, manifest)
+    finally:
+        if manifest is not None:
+            manifest.flush()
+
+
+class SafeBatchWriter:
+    """
+    Allow-listed multi-file writer: same rules as safe_write_text, but encode/hash/write run on a
+    thread pool while validation and directory creation stay on the caller's thread.
+
+    - submit() validates immediately (bad paths raise before anything else is queued) and creates
+      each parent directory at most once.
+    - records() waits for all writes and returns WriteRecords in submission order.
+    - Repeated targets are written in submission order (the later submit waits for the earlier one).
+    - close() flushes the skip-unchanged manifest once for the whole batch.
+
+    Usable as the on_file callback of a streaming producer: writes start as files arrive.
+    """
+
+    def __init__(
+        self,
+        allowlist_dir: Path,
+        allowed_extensions: Optional[Iterable[str]] = None,
+        skip_unchanged: Optional[bool] = None,
+        max_workers: Optional[int] = None,
+    ):
+        self.allowlist_dir = allowlist_dir
+        self.exts = set(allowed_extensions) if allowed_extensions is not None else ALLOWED_EXTENSIONS
+        if skip_unchanged is None:
+            skip_unchanged = skip_unchanged_default()
+        self.manifest = WriteManifest.for_dir(allowlist_dir) if skip_unchanged else None
+
+        allowlist_dir.mkdir(parents=True, exist_ok=True)
+        self._base_resolved = allowlist_dir.resolve()
+        self._made_dirs: Set[Path] = set()
+        self._pending: Dict[Path, Future] = {}
+        self._futures: List[Future] = []
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers or _env_int("WRITE_MAX_WORKERS", DEFAULT_WRITE_WORKERS),
+            thread_name_prefix="safe-write",
+        )
+
+    def __enter__(self) -> "SafeBatchWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def validate(self, relative_path: str) -> Path:
+        return _resolve_target(self.allowlist_dir, relative_path, self.exts, self._base_resolved)
+
+    def submit(self, relative_path: str, content: str) -> None:
+        self.submit_target(self.validate(relative_path), content)
+
+    def submit_target(self, target: Path, content: str) -> None:
+        """
+        Queue a write for a target already returned by validate().
+        """
+        parent = target.parent
+        if parent not in self._made_dirs:
+            parent.mkdir(parents=True, exist_ok=True)
+            self._made_dirs.add(parent)
+
+        previous = self._pending.get(target)
+        if previous is not None:
+            # Same tmp file and same destination: keep last-write-wins ordering.
+            wait([previous])
+
+        # Run in a copy of the caller's context so write spans land in the caller's trace.
+        ctx = contextvars.copy_context()
+        fut = self._pool.submit(ctx.run, _write_target, target, content, self.manifest)
+        self._pending[target] = fut
+        self._futures.append(fut)
+
+    def records(self) -> List[WriteRecord]:
+        return [f.result() for f in self._futures]
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+        if self.manifest is not None:
+            self.manifest.flush()
+
+
+def safe_write_many(
+    *,
+    allowlist_dir: Path,
+    files: Sequence[Tuple[str, str]],
+    allowed_extensions: Optional[Iterable[str]] = None,
+    skip_unchanged: Optional[bool] = None,
+    max_workers: Optional[int] = None,
+) -> List[WriteRecord]:
+    """
+    Batched safe_write_text over (relative_path, content) pairs.
+    Every path is validated before the first write; records come back in input order.
+    """
+    with SafeBatchWriter(
+        allowlist_dir,
+        allowed_extensions=allowed_extensions,
+        skip_unchanged=skip_unchanged,
+        max_workers=max_workers,
+    ) as writer:
+        targets = [writer.validate(relative_path) for relative_path, _ in files]
+        for target, (_, content) in zip(targets, files):
+            writer.submit_target(target, content)
+        return writer.records()
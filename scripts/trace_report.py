@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List
+
+# Add repo root to path
+repo_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repo_root))
+
+from utils.tracing import TRACE_FILENAME, iter_trace_spans, stage_percentiles
+
+DEFAULT_TRACE_PATHS = [
+    repo_root / "apps" / "offline-vite-react" / "public" / TRACE_FILENAME,
+    repo_root / "cache" / TRACE_FILENAME,
+]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Per-stage latency percentiles from traces.ndjson.")
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        help="traces.ndjson files (default: public/traces.ndjson and cache/traces.ndjson)",
+    )
+    parser.add_argument("--stage", default=None, help="Only stages whose name contains this string")
+    parser.add_argument("--sort", choices=["p50", "p95", "p99", "count", "name"], default="p95")
+    args = parser.parse_args()
+
+    paths: List[Path] = [Path(p) for p in args.paths] or DEFAULT_TRACE_PATHS
+    stats = stage_percentiles(iter_trace_spans(paths))
+    if args.stage:
+        stats = {k: v for k, v in stats.items() if args.stage in k}
+    if not stats:
+        print(f"No spans found in: {', '.join(str(p) for p in paths)}")
+        return 1
+
+    if args.sort == "name":
+        order = sorted(stats)
+    else:
+        key = "count" if args.sort == "count" else f"{args.sort}_ms"
+        order = sorted(stats, key=lambda k: stats[k][key], reverse=True)
+
+    print(f"{'stage':<28} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'cpu p50':>10}")
+    for name in order:
+        s = stats[name]
+        print(
+            f"{name:<28} {s['count']:>7} {s['p50_ms']:>10.2f} {s['p95_ms']:>10.2f} "
+            f"{s['p99_ms']:>10.2f} {s['cpu_p50_ms']:>10.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List
+
+# Add repo root to path
+repo_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repo_root))
+
+from utils.usage_ledger import aggregate_usage, iter_usage, usage_ledger_path
+
+GROUPINGS = ("agent", "day", "idea", "model")
+
+
+def _print_table(title: str, stats: dict, sort: str) -> None:
+    if sort == "name":
+        order = sorted(stats)
+    else:
+        order = sorted(stats, key=lambda k: stats[k][sort], reverse=True)
+
+    print(f"\n{title}")
+    print(
+        f"{'':<18} {'calls':>7} {'cached':>7} {'errors':>7} {'retries':>7} "
+        f"{'in tok':>11} {'out tok':>11} {'cost $':>10} {'p50 ms':>10} {'p95 ms':>10}"
+    )
+    for name in order:
+        s = stats[name]
+        print(
+            f"{name:<18} {s['calls']:>7} {s['cache_hits']:>7} {s['errors']:>7} {s['retries']:>7} "
+            f"{s['input_tokens']:>11} {s['output_tokens']:>11} {s['cost_usd']:>10.4f} "
+            f"{s['p50_ms']:>10.1f} {s['p95_ms']:>10.1f}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Token, cost and latency totals from the model-call usage ledger.")
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        help="usage ledger files (default: USAGE_LEDGER_PATH or cache/usage_ledger.ndjson)",
+    )
+    parser.add_argument(
+        "--by",
+        default="agent,day,idea",
+        help=f"Comma-separated groupings to print, from: {', '.join(GROUPINGS)}",
+    )
+    parser.add_argument("--since", default=None, help="Only calls on or after this UTC date (YYYY-MM-DD)")
+    parser.add_argument("--agent", default=None, help="Only calls made by this agent (pm, planner, engineer)")
+    parser.add_argument(
+        "--sort",
+        choices=["cost_usd", "calls", "input_tokens", "output_tokens", "p95_ms", "name"],
+        default="cost_usd",
+    )
+    args = parser.parse_args()
+
+    groupings = [g.strip() for g in args.by.split(",") if g.strip()]
+    unknown = [g for g in groupings if g not in GROUPINGS]
+    if unknown:
+        parser.error(f"unknown grouping(s): {', '.join(unknown)}")
+
+    paths: List[Path] = [Path(p) for p in args.paths] or [usage_ledger_path()]
+    records = [
+        r
+        for r in iter_usage(paths)
+        if (not args.since or str(r.get("ts", ""))[:10] >= args.since)
+        and (not args.agent or r.get("agent") == args.agent)
+    ]
+    if not records:
+        print(f"No model calls found in: {', '.join(str(p) for p in paths)}")
+        return 1
+
+    for by in groupings:
+        _print_table(f"per {by}", aggregate_usage(records, by), args.sort)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
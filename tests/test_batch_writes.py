@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from orchestrator_utils import write_engineering_result
+from schemas.engineering_schema import EngineeringResult, FileArtifact
+from scripts.safe_write import SafeBatchWriter, safe_write_many, safe_write_text
+
+
+def _files(n: int):
+    return [(f"src/mod{i % 7}/file{i}.ts", f"export const v{i} = {i};\n") for i in range(n)]
+
+
+class BatchWriteTests(unittest.TestCase):
+    def test_records_match_sequential_writes_in_input_order(self):
+        files = _files(150)
+        with tempfile.TemporaryDirectory() as td:
+            batched = safe_write_many(allowlist_dir=Path(td) / "a", files=files, max_workers=8)
+            sequential = [
+                safe_write_text(allowlist_dir=Path(td) / "b", relative_path=p, content=c) for p, c in files
+            ]
+
+            self.assertEqual(
+                [(Path(r.path).relative_to(Path(td) / "a"), r.sha256, r.bytes) for r in batched],
+                [(Path(r.path).relative_to(Path(td) / "b"), r.sha256, r.bytes) for r in sequential],
+            )
+            self.assertEqual((Path(td) / "a" / files[-1][0]).read_text(encoding="utf-8"), files[-1][1])
+
+    def test_all_paths_validated_before_any_write(self):
+        with tempfile.TemporaryDirectory() as td:
+            allow = Path(td) / "generated"
+            with self.assertRaises(ValueError):
+                safe_write_many(allowlist_dir=allow, files=_files(5) + [("../escape.md", "x")])
+            self.assertEqual([p for p in allow.rglob("*") if p.is_file()], [])
+
+    def test_repeated_path_keeps_last_write(self):
+        with tempfile.TemporaryDirectory() as td:
+            allow = Path(td) / "generated"
+            with SafeBatchWriter(allow, max_workers=4) as writer:
+                for i in range(20):
+                    writer.submit("same.md", f"v{i}\n")
+                records = writer.records()
+            self.assertEqual(len(records), 20)
+            self.assertEqual((allow / "same.md").read_text(encoding="utf-8"), "v19\n")
+
+    def test_engineering_result_written_in_file_order(self):
+        result = EngineeringResult(
+            task_id="T",
+            summary="s",
+            files=[FileArtifact(path=p, content=c) for p, c in _files(120)],
+        )
+        with tempfile.TemporaryDirectory() as td:
+            written = write_engineering_result(result, repo_root=Path(td), max_workers=8)
+            self.assertEqual(written, [str(Path(td) / f.path) for f in result.files])
+            self.assertTrue(all(Path(p).exists() for p in written))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from benchmarks.run_benchmarks import compare, run_suite
+
+
+class BenchmarkSuiteTests(unittest.TestCase):
+    def test_small_suite_produces_machine_readable_results(self):
+        with tempfile.TemporaryDirectory() as td:
+            results = run_suite([50], repeat=1, workers=1, api_requests=4, only="ndjson", workdir=Path(td))
+
+        self.assertEqual(set(results["cases"]), {"read_ndjson[50]", "ndjson_index_rebuild[50]"})
+        for case in results["cases"].values():
+            self.assertEqual(case["items"], 50)
+            self.assertGreater(case["best_s"], 0)
+        self.assertEqual(results["meta"]["lines"], [50])
+
+    def test_compare_flags_only_slowdowns_beyond_threshold(self):
+        baseline = {"cases": {"a": {"best_s": 1.0}, "b": {"best_s": 1.0}, "gone": {"best_s": 1.0}}}
+        current = {"cases": {"a": {"best_s": 1.2}, "b": {"best_s": 1.3}, "new": {"best_s": 9.0}}}
+
+        regressions = compare(current, baseline, threshold=0.25)
+
+        self.assertEqual([r[0] for r in regressions], ["b"])
+        self.assertAlmostEqual(regressions[0][3], 1.3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import os
+import unittest
+from unittest import mock
+
+from utils import clients
+
+
+class ClientRegistryTests(unittest.TestCase):
+    def setUp(self):
+        clients.clear_registry()
+        self.addCleanup(clients.clear_registry)
+
+    def test_genai_client_and_agents_are_shared_per_key(self):
+        a = clients.get_genai_client("key-a")
+        self.assertIs(a, clients.get_genai_client("key-a"))
+        self.assertIsNot(a, clients.get_genai_client("key-b"))
+
+        engineer = clients.get_engineer_agent("key-a")
+        self.assertIs(engineer, clients.get_engineer_agent("key-a"))
+        self.assertIs(engineer.client, a)
+        self.assertIs(clients.get_planner_agent("key-a").client, a)
+
+    def test_env_key_and_missing_key(self):
+        with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "sk-test"}):
+            self.assertIs(clients.get_openai_client(), clients.get_openai_client("sk-test"))
+
+        with mock.patch.dict(os.environ, {"GENAI_API_KEY": ""}):
+            with self.assertRaises(ValueError):
+                clients.get_genai_client()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from agents.engineer_agent import EngineerAgent
+from schemas.plan_schema import Task
+from utils.rate_limiter import RateLimiter
+from utils.response_cache import ResponseCache
+from utils.stream_json import StreamingArrayParser
+
+
+RESULT = {
+    "task_id": "T-1",
+    "summary": 'Scaffold with "quotes", {braces} and [brackets]',
+    "files": [
+        {"path": "src/a.ts", "content": 'export const s = "}]\\\\";\n'},
+        {"path": "src/b.ts", "content": "// é ☃ {[\n"},
+        {"path": "README.md", "content": "# x\n"},
+    ],
+}
+
+
+def _chunks(text: str, size: int):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+class StreamingArrayParserTests(unittest.TestCase):
+    def test_elements_decode_identically_for_any_chunking(self):
+        text = "```json\n" + json.dumps(RESULT, ensure_ascii=False, indent=2) + "\n```"
+        for size in (1, 2, 3, 7, 64, len(text)):
+            with self.subTest(size=size):
+                parser = StreamingArrayParser("files")
+                files = [obj for chunk in _chunks(text, size) for obj in parser.feed(chunk)]
+                self.assertEqual(files, RESULT["files"])
+                self.assertEqual(parser.finish(), {**RESULT, "files": []})
+
+    def test_missing_commas_and_truncation(self):
+        parser = StreamingArrayParser("files")
+        files = parser.feed('{"files": [{"path": "a", "content": "1"}\n{"path": "b", "content": "2"}], "task_id": "t"}')
+        self.assertEqual([f["path"] for f in files], ["a", "b"])
+
+        truncated = StreamingArrayParser("files")
+        truncated.feed('{"task_id": "t", "files": [{"path": "a"')
+        with self.assertRaises(ValueError):
+            truncated.finish()
+
+
+class _StreamingModels:
+    def __init__(self, text: str, events: list):
+        self.text = text
+        self.events = events
+
+    def generate_content_stream(self, **kwargs):
+        for chunk in _chunks(self.text, 16):
+            self.events.append("chunk")
+            yield SimpleNamespace(text=chunk)
+
+
+class EngineerRunStreamTests(unittest.TestCase):
+    def test_files_are_delivered_before_stream_ends_and_cached(self):
+        task = Task(
+            id="T-1",
+            description="scaffold",
+            depends_on=[],
+            outputs=[],
+            output_files=[],
+            execution_hint="engineer",
+            task_type="scaffold",
+        )
+        events: list = []
+        with tempfile.TemporaryDirectory() as td, mock.patch.dict(
+            os.environ, {"USAGE_LEDGER_PATH": str(Path(td) / "usage.ndjson")}
+        ):
+            agent = EngineerAgent(
+                SimpleNamespace(models=_StreamingModels(json.dumps(RESULT), events)),
+                response_cache=ResponseCache(Path(td) / "c.sqlite3"),
+                rate_limiter=RateLimiter(Path(td) / "rl.sqlite3"),
+            )
+
+            delivered = []
+
+            def on_file(f):
+                events.append(f.path)
+                delivered.append(f.path)
+
+            result = agent.run_stream(task, on_file)
+
+            self.assertEqual(delivered, [f["path"] for f in RESULT["files"]])
+            self.assertEqual(result.model_dump(), RESULT)
+            # The first file was handed over while chunks were still arriving.
+            last_chunk = len(events) - 1 - events[::-1].index("chunk")
+            self.assertLess(events.index("src/a.ts"), last_chunk)
+
+            # Second run is served from the response cache and replays files in order.
+            events.clear()
+            replayed = []
+            agent.run_stream(task, lambda f: replayed.append(f.path))
+            self.assertEqual(replayed, delivered)
+            self.assertEqual(events, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.evaluate_execution_result import _check_write_records_exist, _hash_file
+
+
+def _record(path: Path, data: bytes) -> dict:
+    return {"path": str(path), "sha256": hashlib.sha256(data).hexdigest(), "bytes": len(data)}
+
+
+class WriteVerificationTests(unittest.TestCase):
+    def test_unchanged_files_are_served_from_cache(self):
+        with tempfile.TemporaryDirectory() as td:
+            public_dir = Path(td) / "public"
+            gen = public_dir / "generated"
+            gen.mkdir(parents=True)
+            writes = []
+            for i in range(12):
+                data = f"file {i}\n".encode("utf-8") * (i + 1)
+                (gen / f"f{i}.md").write_bytes(data)
+                writes.append(_record(gen / f"f{i}.md", data))
+            result = {"outputs": {"writes": writes}}
+
+            ok, reasons, checks, hits = _check_write_records_exist(public_dir, result)
+            self.assertTrue(ok, reasons)
+            self.assertEqual((checks["writes_ok"], hits), (12, 0))
+
+            ok, _, checks, hits = _check_write_records_exist(public_dir, result)
+            self.assertTrue(ok)
+            self.assertEqual(hits, 12)
+            # Cache state must not leak into the deterministic checks.
+            self.assertNotIn("writes_cache_hits", checks)
+
+            # Same size, new content and mtime: the cache entry no longer matches and the file is re-hashed.
+            target = gen / "f3.md"
+            target.write_bytes(b"X" * target.stat().st_size)
+            st = target.stat()
+            os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+            (gen / "f5.md").unlink()
+
+            ok, reasons, checks, hits = _check_write_records_exist(public_dir, result)
+            self.assertFalse(ok)
+            self.assertEqual(
+                reasons,
+                [f"write_sha_mismatch:{gen / 'f3.md'}", f"write_file_missing:{gen / 'f5.md'}"],
+            )
+            self.assertEqual((checks["writes_ok"], hits), (10, 10))
+
+    def test_cached_file_still_checks_expected_bytes(self):
+        with tempfile.TemporaryDirectory() as td:
+            public_dir = Path(td) / "public"
+            target = public_dir / "generated" / "a.md"
+            target.parent.mkdir(parents=True)
+            target.write_bytes(b"hello\n")
+            record = _record(target, b"hello\n")
+
+            ok, reasons, _, _ = _check_write_records_exist(public_dir, {"outputs": {"writes": [record]}})
+            self.assertTrue(ok, reasons)
+
+            # Right sha, wrong byte count: must fail exactly as an uncached check would.
+            wrong = {**record, "bytes": record["bytes"] + 1}
+            ok, reasons, _, hits = _check_write_records_exist(public_dir, {"outputs": {"writes": [wrong]}})
+            self.assertFalse(ok)
+            self.assertEqual(hits, 0)
+            self.assertEqual(reasons, [f"write_bytes_mismatch:{target}"])
+
+    def test_chunked_hash_matches_hashlib(self):
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "big.bin"
+            data = os.urandom(3 * 1024 * 1024 + 17)
+            p.write_bytes(data)
+            self.assertEqual(_hash_file(p), (hashlib.sha256(data).hexdigest(), len(data)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,11 @@
 ﻿from __future__ import annotations
 
 import json
+import os
 import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
 from scripts.consume_execution_request import consume
 
@@ -49,6 +51,25 @@ class ExecutorWritesTests(unittest.TestCase):
             # content stable
             self.assertEqual(note_path.read_text(encoding="utf-8"), "hello deterministic world\n")
 
+    def test_skipped_rewrite_keeps_outputs_identical(self):
+        req = {
+            "kind": "execution_request",
+            "task_id": "OFFLINE-NOTE-2",
+            "payload": {"action": "write_public_note", "content": "unchanged\n"},
+        }
+
+        with tempfile.TemporaryDirectory() as td, mock.patch.dict(
+            os.environ, {"WRITE_SKIP_UNCHANGED": "1", "WRITE_MANIFEST_DIR": str(Path(td) / "manifests")}
+        ):
+            public_dir = Path(td) / "public"
+            _write_json(public_dir / "last_execution_request.json", req)
+
+            r1 = consume(public_dir)
+            r2 = consume(public_dir)
+
+            self.assertEqual(r1["outputs"], r2["outputs"])
+            self.assertEqual((r1["_meta"]["writes_skipped"], r2["_meta"]["writes_skipped"]), (0, 1))
+
 
 if __name__ == "__main__":
     unittest.main()
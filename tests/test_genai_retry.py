@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from unittest import mock
+
+from utils.genai_retry import _extract_retry_delay_seconds, call_with_retry, is_quota_error
+
+
+class _RateLimited(Exception):
+    def __init__(self, message: str = "rate limited", status_code: int = 429):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class GenaiRetryTests(unittest.TestCase):
+    def test_status_code_429_is_a_quota_error_with_or_without_the_sdk(self):
+        for sdk_missing in (False, True):
+            # None in sys.modules makes the import raise ImportError, as when the SDK is not installed.
+            modules = {"google.genai.errors": None} if sdk_missing else {}
+            with self.subTest(sdk_missing=sdk_missing), mock.patch.dict(sys.modules, modules):
+                self.assertTrue(is_quota_error(_RateLimited()))
+                self.assertFalse(is_quota_error(_RateLimited(status_code=500)))
+                self.assertFalse(is_quota_error(ValueError("offline stub failed")))
+
+    def test_retries_quota_errors_after_the_server_delay(self):
+        attempts = []
+
+        def _call():
+            attempts.append(1)
+            if len(attempts) < 2:
+                raise _RateLimited("Please retry in 3.5s.")
+            return "ok"
+
+        with mock.patch("utils.genai_retry.time.sleep") as sleep:
+            self.assertEqual(call_with_retry(_call), "ok")
+        sleep.assert_called_once_with(3)
+        self.assertEqual(_extract_retry_delay_seconds("retryDelay': '26s'"), 26)
+
+
+if __name__ == "__main__":
+    unittest.main()
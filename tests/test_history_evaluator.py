@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.consume_execution_request import consume_queue
+from scripts.evaluate_execution_result import (
+    HISTORY_CHECKPOINT_FILENAME,
+    HISTORY_OUTPUT_FILENAME,
+    evaluate_history,
+)
+
+
+def _seed_history(public_dir: Path, n: int) -> None:
+    lines = []
+    for i in range(n):
+        lines.append(json.dumps({
+            "kind": "execution_request",
+            "task_id": f"HIST-{i}",
+            "milestone_id": "MS-HIST",
+            "title": f"History note {i}",
+            "created_at": "2099-01-01T00:00:00+00:00",
+            "payload": {"action": "write_public_note", "content": f"note {i}\n", "filename": f"hist-{i}.md"},
+        }))
+    public_dir.mkdir(parents=True, exist_ok=True)
+    (public_dir / "execution_requests.ndjson").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    consume_queue(public_dir, workers=2)
+
+
+def _history_lines(public_dir: Path):
+    return (public_dir / HISTORY_OUTPUT_FILENAME).read_text(encoding="utf-8").splitlines()
+
+
+class HistoryEvaluatorTests(unittest.TestCase):
+    def test_parallel_matches_serial_and_counts(self):
+        with tempfile.TemporaryDirectory() as td:
+            public_dir = Path(td) / "public"
+            _seed_history(public_dir, 6)
+            with (public_dir / "execution_results.ndjson").open("a", encoding="utf-8") as f:
+                f.write("{not json\n\n")
+            (public_dir / "generated" / "hist-2.md").write_text("tampered\n", encoding="utf-8")
+
+            serial = evaluate_history(public_dir, workers=1, restart=True)
+            serial_lines = _history_lines(public_dir)
+            parallel = evaluate_history(public_dir, workers=2, batch_size=4, restart=True)
+
+            self.assertEqual(_history_lines(public_dir), serial_lines)
+            self.assertEqual(serial, parallel)
+            self.assertEqual((parallel["evaluated"], parallel["pass"], parallel["fail"]), (6, 5, 1))
+            self.assertEqual(parallel["malformed"], 1)
+            self.assertEqual(parallel["reasons"], {"write_sha_mismatch": 1})
+
+    def test_resumes_from_checkpoint_and_repairs_partial_output(self):
+        with tempfile.TemporaryDirectory() as td:
+            public_dir = Path(td) / "public"
+            _seed_history(public_dir, 5)
+
+            first = evaluate_history(public_dir, workers=1, batch_size=2, max_items=2)
+            self.assertEqual(first["evaluated"], 2)
+
+            # Simulate a crash after appending output but before the checkpoint was written.
+            with (public_dir / HISTORY_OUTPUT_FILENAME).open("a", encoding="utf-8") as f:
+                f.write('{"partial": true}\n')
+
+            final = evaluate_history(public_dir, workers=1, batch_size=2)
+            self.assertEqual(final["evaluated"], 5)
+            lines = _history_lines(public_dir)
+            self.assertEqual(len(lines), 5)
+            self.assertTrue(all(json.loads(l)["status"] == "pass" for l in lines))
+
+            # Nothing new: a rerun is a no-op.
+            self.assertEqual(evaluate_history(public_dir, workers=1)["evaluated"], 5)
+            self.assertTrue((public_dir / HISTORY_CHECKPOINT_FILENAME).exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
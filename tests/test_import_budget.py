@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Cold-start entry points. Importing run.py does not call main().
+ENTRY_POINTS = ("run", "scripts.consume_execution_request", "scripts.replay_execution_request")
+
+# Provider SDKs must never load just by importing an entry point (they belong to ONLINE paths only).
+FORBIDDEN_MODULES = ("google.genai", "openai", "httpx")
+
+# Optional cumulative `-X importtime` budget per entry point (best of RUNS), e.g. IMPORT_BUDGET_MS=450
+# (~1.5x the ~0.29s measured for run.py after lazy SDK loading). Off by default: wall-clock timing is
+# flaky on loaded CI machines, and the forbidden-module check already catches an SDK being reloaded.
+RUNS = 3
+
+
+def _import_profile(module: str) -> tuple[float, list[str]]:
+    """
+    Returns (cumulative import ms for `module`, forbidden modules that were loaded) from a fresh interpreter.
+    """
+    probe = (
+        f"import sys, {module}\n"
+        f"print(','.join(m for m in {FORBIDDEN_MODULES!r} if m in sys.modules))"
+    )
+    env = {**os.environ, "OFFLINE_MODE": "1", "PYTHONDONTWRITEBYTECODE": "1"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = None
+    for line in proc.stderr.splitlines():
+        m = re.match(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*(\S+)$", line)
+        if m and m.group(2) == module:
+            cumulative_us = int(m.group(1))
+    if cumulative_us is None:
+        raise AssertionError(f"no importtime entry for {module}:\n{proc.stderr[-2000:]}")
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return cumulative_us / 1000.0, loaded
+
+
+class ImportBudgetTests(unittest.TestCase):
+    def test_entry_points_do_not_import_provider_sdks(self):
+        for module in ENTRY_POINTS:
+            with self.subTest(module=module):
+                _, loaded = _import_profile(module)
+                self.assertEqual(loaded, [], f"{module} imported provider SDKs at startup")
+
+    @unittest.skipUnless(os.getenv("IMPORT_BUDGET_MS"), "set IMPORT_BUDGET_MS to enforce an import-time budget")
+    def test_entry_points_stay_under_import_budget(self):
+        budget_ms = float(os.environ["IMPORT_BUDGET_MS"])
+        for module in ENTRY_POINTS:
+            with self.subTest(module=module):
+                best_ms = min(_import_profile(module)[0] for _ in range(RUNS))
+                self.assertLess(
+                    best_ms,
+                    budget_ms,
+                    f"{module} cold import took {best_ms:.0f}ms (budget {budget_ms:.0f}ms)",
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
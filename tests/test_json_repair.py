@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import io
+import json
+import random
+import unittest
+
+from benchmarks.bench_json_repair import legacy_repair_json_newlines_in_strings, synthetic_pasted_plan
+from utils.json_repair import JsonNewlineRepairer, repair_json_newlines_in_strings, repair_json_stream
+
+
+class JsonRepairTests(unittest.TestCase):
+    def test_repairs_control_chars_inside_strings_only(self):
+        raw = '{\n\t"a": "line1\nline2\r\tend",\n  "b": "x"\n}'
+        out = repair_json_newlines_in_strings(raw)
+        self.assertEqual(out, '{\n\t"a": "line1 line2  end",\n  "b": "x"\n}')
+        self.assertEqual(json.loads(out)["a"], "line1 line2  end")
+
+    def test_escapes_are_respected(self):
+        cases = [
+            r'{"a": "say \"hi\"' + "\n" + r'"}',
+            r'{"a": "c:\\' + '"}\n',
+            '{"a": "keep\\\nthis"}',
+            '{"a": "unclosed\nstring',
+            '"trailing backslash \\',
+        ]
+        for raw in cases:
+            with self.subTest(raw=raw):
+                self.assertEqual(repair_json_newlines_in_strings(raw), legacy_repair_json_newlines_in_strings(raw))
+
+    def test_matches_legacy_on_random_input_and_any_chunking(self):
+        rng = random.Random(17)
+        alphabet = 'ab"\\\n\r\t{}: é'
+        for _ in range(2000):
+            raw = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+            expected = legacy_repair_json_newlines_in_strings(raw)
+            self.assertEqual(repair_json_newlines_in_strings(raw), expected, raw)
+
+            repairer = JsonNewlineRepairer()
+            out, i = [], 0
+            while i < len(raw):
+                step = rng.randint(1, 6)
+                out.append(repairer.feed(raw[i : i + step]))
+                i += step
+            self.assertEqual("".join(out), expected, raw)
+
+    def test_stream_matches_in_memory_repair(self):
+        raw = synthetic_pasted_plan(64 * 1024, seed=3)
+        dst = io.StringIO()
+        read = repair_json_stream(io.StringIO(raw), dst, chunk_chars=997)
+
+        self.assertEqual(read, len(raw))
+        self.assertEqual(dst.getvalue(), legacy_repair_json_newlines_in_strings(raw))
+        json.loads(dst.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from scripts.consume_execution_request import build_execution_result
+from utils.memory_budget import MemoryBudgetExceeded, memory_meta, memory_scope, memory_stage
+
+_NOTE = {"task_id": "MEM", "payload": {"action": "write_public_note", "content": "hi\n", "filename": "m.md"}}
+
+
+def _allocate(mb: int) -> int:
+    blocks = [bytearray(1024 * 1024) for _ in range(mb)]
+    return len(blocks)
+
+
+class MemoryBudgetTests(unittest.TestCase):
+    def test_stage_reports_peak_and_top_sites(self):
+        with mock.patch.dict(os.environ, {"MEMORY_PROFILE": "1", "MEMORY_BUDGET_MB": ""}):
+            with memory_scope():
+                with memory_stage("outer"):
+                    with memory_stage("inner"):
+                        _allocate(4)
+                    kept = bytearray(2 * 1024 * 1024)
+                reports = memory_meta()
+
+        self.assertIsNone(memory_meta())
+        self.assertEqual([r["stage"] for r in reports], ["inner", "outer"])
+        inner, outer = reports
+        self.assertGreaterEqual(inner["peak_mb"], 4)
+        # The inner peak counts toward the outer stage even though the inner stage reset it.
+        self.assertGreaterEqual(outer["peak_mb"], inner["peak_mb"])
+        self.assertGreaterEqual(outer["retained_mb"], 2)
+        self.assertTrue(any("test_memory_budget.py" in s["site"] for s in outer["top"]))
+        self.assertEqual(len(kept), 2 * 1024 * 1024)
+
+    def test_stage_over_budget_raises_after_recording(self):
+        with mock.patch.dict(os.environ, {"MEMORY_BUDGET_MB": "1"}):
+            with memory_scope():
+                with self.assertRaises(MemoryBudgetExceeded) as ctx:
+                    with memory_stage("big"):
+                        _allocate(3)
+                reports = memory_meta()
+
+        self.assertEqual(ctx.exception.stage, "big")
+        self.assertIn("MEMORY_BUDGET_MB=1", str(ctx.exception))
+        self.assertEqual(reports[0]["budget_mb"], 1)
+
+    def test_disabled_stage_records_nothing(self):
+        with mock.patch.dict(os.environ, {"MEMORY_PROFILE": "", "MEMORY_BUDGET_MB": ""}):
+            with memory_scope():
+                with memory_stage("noop"):
+                    _allocate(1)
+                self.assertIsNone(memory_meta())
+
+    def test_execution_result_carries_memory_meta(self):
+        with tempfile.TemporaryDirectory() as td, mock.patch.dict(
+            os.environ, {"MEMORY_PROFILE": "1", "MEMORY_BUDGET_MB": "", "WRITE_MANIFEST_DIR": str(Path(td) / "m")}
+        ):
+            result = build_execution_result(Path(td), json.loads(json.dumps(_NOTE)))
+
+        self.assertEqual(result["status"], "success")
+        self.assertEqual([r["stage"] for r in result["_meta"]["memory"]], ["build_execution_result"])
+
+    def test_execution_over_budget_is_an_error_result(self):
+        with tempfile.TemporaryDirectory() as td, mock.patch.dict(
+            os.environ, {"MEMORY_BUDGET_MB": "0.0001", "WRITE_MANIFEST_DIR": str(Path(td) / "m")}
+        ):
+            result = build_execution_result(Path(td), json.loads(json.dumps(_NOTE)))
+
+        self.assertEqual(result["status"], "error")
+        self.assertEqual(result["error"]["type"], "MemoryBudgetExceeded")
+        self.assertIn("build_execution_result", result["error"]["message"])
+        # A budget alone is enforced without attaching stage reports to the artifact.
+        self.assertNotIn("memory", result.get("_meta") or {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from utils.metrics import MetricsRegistry
+
+SERVER_PATH = Path(__file__).resolve().parent.parent / "apps" / "offline-vite-react" / "server" / "main.py"
+
+
+def _load_server():
+    spec = importlib.util.spec_from_file_location("artifact_server_metrics_test", SERVER_PATH)
+    server = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = server  # dataclasses resolve annotations through sys.modules
+    spec.loader.exec_module(server)
+    return server
+
+
+class MetricsRegistryTests(unittest.TestCase):
+    def test_text_exposition_format(self):
+        registry = MetricsRegistry()
+        requests = registry.counter("reqs_total", "Requests.", ("path",))
+        depth = registry.gauge("depth", "Depth.", ("queue",))
+        latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+
+        requests.inc(path='/a"b')
+        requests.inc(2, path='/a"b')
+        depth.set_function(lambda: 7, queue="jobs")
+        for v in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(v)
+
+        text = registry.render()
+        self.assertIn("# TYPE reqs_total counter\n", text)
+        self.assertIn('reqs_total{path="/a\\"b"} 3\n', text)
+        self.assertIn('depth{queue="jobs"} 7\n', text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 2\n', text)
+        self.assertIn('latency_seconds_bucket{le="1"} 3\n', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 4\n', text)
+        self.assertIn("latency_seconds_sum 3.65\n", text)
+        self.assertIn("latency_seconds_count 4\n", text)
+
+        with self.assertRaises(ValueError):
+            requests.inc(status="200")
+
+
+class ServerMetricsTests(unittest.TestCase):
+    def test_metrics_endpoint_reports_requests_and_writes(self):
+        import httpx
+
+        server = _load_server()
+        body = {"task_id": "M", "payload": {"action": "write_public_note", "content": "hi\n"}}
+
+        with tempfile.TemporaryDirectory() as td:
+            public_dir = Path(td)
+            last_path = public_dir / "last_execution_request.json"
+            log_path = public_dir / "execution_requests.ndjson"
+
+            async def _scrape() -> str:
+                writer = server.GroupCommitWriter(log_path, last_path)
+                with mock.patch.multiple(
+                    server, PUBLIC_DIR=public_dir, LAST_REQ_PATH=last_path, LOG_PATH=log_path, WRITER=writer
+                ):
+                    transport = httpx.ASGITransport(app=server.app)
+                    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                        posts = await asyncio.gather(
+                            *(client.post("/execution-request", json=body) for _ in range(3))
+                        )
+                        self.assertTrue(all(r.status_code == 200 for r in posts))
+                        self.assertEqual((await client.get("/jobs/nope")).status_code, 404)
+                        resp = await client.get("/metrics")
+                    await writer.stop()
+                self.assertTrue(resp.headers["content-type"].startswith("text/plain; version=0.0.4"))
+                return resp.text
+
+            text = asyncio.run(_scrape())
+            log_bytes = log_path.stat().st_size
+
+        self.assertIn(
+            'artifact_server_http_requests_total{method="POST",path="/execution-request",status="200"} 3\n', text
+        )
+        self.assertIn('artifact_server_http_requests_total{method="GET",path="/jobs/{job_id}",status="404"} 1\n', text)
+        self.assertIn(
+            'artifact_server_http_request_duration_seconds_count{method="POST",path="/execution-request"} 3\n', text
+        )
+        self.assertIn(f'artifact_server_bytes_written_total{{file="execution_requests.ndjson"}} {log_bytes}\n', text)
+        self.assertIn('artifact_server_fsync_duration_seconds_count{file="execution_requests.ndjson"}', text)
+        self.assertIn("artifact_server_ndjson_append_duration_seconds_count", text)
+        self.assertIn('artifact_server_queue_depth{queue="jobs"} 0\n', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.replay_execution_request import _read_ndjson, replay
+from utils.ndjson_index import NdjsonIndex
+from utils.request_hash import compute_request_hash
+
+
+def _req(i: int) -> dict:
+    return {
+        "kind": "execution_request",
+        "task_id": f"IDX-{i}",
+        "created_at": f"2099-01-01T00:00:0{i % 10}+00:00",
+        "payload": {"action": "write_public_note", "content": f"note {i}\n", "filename": f"idx-{i}.md"},
+    }
+
+
+def _append(path: Path, text: str) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("ab") as f:
+        offset = f.tell()
+        f.write(text.encode("utf-8"))
+    return offset
+
+
+class NdjsonIndexTests(unittest.TestCase):
+    def test_sync_matches_full_parse_and_catches_up_incrementally(self):
+        with tempfile.TemporaryDirectory() as td:
+            log = Path(td) / "execution_requests.ndjson"
+            _append(log, json.dumps(_req(0)) + "\n")
+            _append(log, "garbage\n\n")
+            _append(log, json.dumps(_req(1)) + "\n")
+
+            index = NdjsonIndex(log)
+            index.sync()
+            self.assertEqual((index.count(), index.malformed), (2, 1))
+
+            # Appended without going through the index: next sync picks it up.
+            _append(log, json.dumps(_req(2)) + "\n")
+            index.sync()
+
+            objs, malformed = _read_ndjson(log)
+            self.assertEqual(index.count(), len(objs))
+            self.assertEqual(index.malformed, malformed)
+            for i, obj in enumerate(objs):
+                self.assertEqual(index.read_object(i), obj)
+                self.assertEqual(index.find_hash(compute_request_hash(obj)), i)
+
+            self.assertIsNone(index.find_hash("0" * 64))
+
+    def test_append_records_offset_without_rescan(self):
+        with tempfile.TemporaryDirectory() as td:
+            log = Path(td) / "execution_requests.ndjson"
+            index = NdjsonIndex(log)
+            for i in range(3):
+                line = json.dumps(_req(i)) + "\n"
+                offset = _append(log, line)
+                index.append(offset, len(line.encode("utf-8")), compute_request_hash(_req(i)))
+
+            self.assertEqual(index.count(), 3)
+            self.assertEqual(index.read_object(1)["task_id"], "IDX-1")
+
+            # A truncated log invalidates the index and triggers a rebuild.
+            log.write_text(json.dumps(_req(7)) + "\n", encoding="utf-8")
+            index.sync()
+            self.assertEqual(index.count(), 1)
+            self.assertEqual(index.read_object(0)["task_id"], "IDX-7")
+
+    def test_replay_by_hash_uses_index(self):
+        with tempfile.TemporaryDirectory() as td:
+            public_dir = Path(td) / "public"
+            log = public_dir / "execution_requests.ndjson"
+            for i in range(3):
+                _append(log, json.dumps(_req(i)) + "\n")
+
+            target = compute_request_hash(_req(1))
+            result = replay(public_dir=public_dir, request_hash=target)
+
+            self.assertEqual(result["status"], "success")
+            self.assertEqual(result["request"]["task_id"], "IDX-1")
+            self.assertEqual(result["_replay"]["selected_request_hash"], target)
+            # A log without a sidecar gets one on its first replay; later replays only read it.
+            idx = public_dir / "execution_requests.ndjson.idx"
+            idx_bytes = idx.read_bytes()
+            self.assertEqual(NdjsonIndex(log, read_only=True).count(), 3)
+
+            _append(log, json.dumps(_req(3)) + "\n")
+            result = replay(public_dir=public_dir, request_hash=compute_request_hash(_req(3)))
+            self.assertEqual(result["request"]["task_id"], "IDX-3")
+            self.assertEqual(idx.read_bytes(), idx_bytes)
+
+    def test_unterminated_last_line_is_indexed_by_replay_and_rebuild(self):
+        with tempfile.TemporaryDirectory() as td:
+            public_dir = Path(td) / "public"
+            log = public_dir / "execution_requests.ndjson"
+            _append(log, json.dumps(_req(0)) + "\n")
+            NdjsonIndex(log).sync()
+            idx_bytes = (public_dir / "execution_requests.ndjson.idx").read_bytes()
+            _append(log, json.dumps(_req(1)) + "\n")
+            _append(log, json.dumps(_req(2)))  # hand-edited log: no trailing newline
+
+            # The server-side sync leaves a possibly half-written last line alone.
+            live = NdjsonIndex(Path(td) / "copy.ndjson")
+            live.log_path.write_bytes(log.read_bytes())
+            live.sync()
+            self.assertEqual(live.count(), 2)
+
+            result = replay(public_dir=public_dir)
+            self.assertEqual(result["request"]["task_id"], "IDX-2")
+            self.assertEqual(result["_replay"]["selected_request_hash"], compute_request_hash(_req(2)))
+            self.assertEqual((public_dir / "execution_requests.ndjson.idx").read_bytes(), idx_bytes)
+
+            result = replay(public_dir=public_dir, request_hash=compute_request_hash(_req(1)))
+            self.assertEqual(result["request"]["task_id"], "IDX-1")
+
+            index = NdjsonIndex(log)
+            index.rebuild()
+            self.assertEqual(index.count(), len(_read_ndjson(log)[0]))
+            self.assertEqual(index.read_object(2)["task_id"], "IDX-2")
+
+
+if __name__ == "__main__":
+    unittest.main()
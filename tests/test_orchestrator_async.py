@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from orchestrator import Orchestrator
+from utils.plan_cache import PlanCache
+
+
+class AsyncOrchestratorTests(unittest.TestCase):
+    def setUp(self):
+        self.td = tempfile.TemporaryDirectory()
+        self.addCleanup(self.td.cleanup)
+        self.root = Path(self.td.name)
+        env = mock.patch.dict(
+            os.environ,
+            {"OFFLINE_MODE": "1", "TRACING": "0", "USAGE_LEDGER": "0", "WRITE_SKIP_UNCHANGED": ""},
+        )
+        env.start()
+        self.addCleanup(env.stop)
+
+    def test_arun_many_keeps_cache_io_off_the_loop_and_skips_shared_exports(self):
+        orch = Orchestrator(repo_root=self.root)
+        lookup_threads = []
+        real_get = PlanCache.get
+
+        def _get(cache, *args, **kwargs):
+            lookup_threads.append(threading.current_thread())
+            return real_get(cache, *args, **kwargs)
+
+        async def _run():
+            loop_thread = threading.current_thread()
+            with mock.patch.object(PlanCache, "get", _get):
+                results = await orch.arun_many(["a todo app", "a habit tracker"])
+            return loop_thread, results
+
+        loop_thread, results = asyncio.run(_run())
+
+        self.assertEqual(len(results), 2)
+        for r in results:
+            self.assertNotIsInstance(r, BaseException)
+        self.assertEqual(len(lookup_threads), 2)
+        self.assertNotIn(loop_thread, lookup_threads)
+
+        public_dir = self.root / "apps" / "offline-vite-react" / "public"
+        self.assertFalse((public_dir / "last_prd.txt").exists())
+        self.assertFalse((public_dir / "last_plan.json").exists())
+
+        # A single idea still exports for the frontend.
+        asyncio.run(orch.arun_many(["a todo app"]))
+        self.assertTrue((public_dir / "last_plan.json").exists())
+
+    def test_provider_slots_survive_a_new_event_loop(self):
+        orch = Orchestrator(repo_root=self.root)
+        orch.provider_concurrency["gemini"] = 1
+
+        async def _contend():
+            async def _hold():
+                async with orch._provider_slot("gemini"):
+                    await asyncio.sleep(0.01)
+
+            await asyncio.gather(_hold(), _hold(), _hold())
+            return orch._provider_slot("gemini")
+
+        first = asyncio.run(_contend())
+        # A second asyncio.run() must not reuse semaphores bound to the first loop.
+        second = asyncio.run(_contend())
+        self.assertIsNot(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
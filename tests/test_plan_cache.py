@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from schemas.plan_schema import Plan
+from utils.offline_seed import offline_plan_dict_for_idea, offline_prd_from_idea
+from utils.plan_cache import PlanCache, idea_key
+
+
+def _plan(idea: str) -> Plan:
+    return Plan.model_validate(offline_plan_dict_for_idea(idea))
+
+
+class PlanCacheTests(unittest.TestCase):
+    def test_alternating_ideas_hit_after_first_run(self):
+        with tempfile.TemporaryDirectory() as td:
+            cache = PlanCache(Path(td))
+
+            for idea in ("bakery site", "gym tracker"):
+                self.assertIsNone(cache.get(idea))
+                cache.put(idea, offline_prd_from_idea(idea), _plan(idea), source="offline")
+
+            # Whitespace-only differences share a key.
+            hit = cache.get("  bakery   site ")
+            self.assertIsNotNone(hit)
+            self.assertEqual(hit.key, idea_key("bakery site"))
+            self.assertEqual(hit.prd_text, offline_prd_from_idea("bakery site"))
+            self.assertIsNotNone(cache.get("gym tracker"))
+
+            # Index survives a fresh instance.
+            stats = PlanCache(Path(td)).stats()
+            self.assertEqual(stats["hits"], 2)
+            self.assertEqual(stats["misses"], 2)
+            self.assertEqual(stats["entries"], 2)
+
+    def test_lookups_write_index_only_when_lru_order_changes(self):
+        with tempfile.TemporaryDirectory() as td:
+            cache = PlanCache(Path(td))
+            for idea in ("bakery site", "gym tracker"):
+                cache.put(idea, offline_prd_from_idea(idea), _plan(idea), source="offline")
+
+            writes = []
+            real_write = cache._write_index
+            cache._write_index = lambda: (writes.append(1), real_write())
+
+            self.assertIsNone(cache.get("unknown idea"))
+            self.assertIsNotNone(cache.get("gym tracker"))  # already most recent
+            self.assertEqual(writes, [])
+
+            self.assertIsNotNone(cache.get("bakery site"))  # moves to the end
+            self.assertEqual(writes, [1])
+            self.assertEqual(PlanCache(Path(td)).stats()["hits"], 2)
+
+    def test_source_filter_counts_as_miss(self):
+        with tempfile.TemporaryDirectory() as td:
+            cache = PlanCache(Path(td))
+            cache.put("idea", "prd", _plan("idea"), source="offline")
+
+            self.assertIsNone(cache.get("idea", sources=("online",)))
+            self.assertIsNotNone(cache.get("idea"))
+
+    def test_lru_eviction_by_entry_count(self):
+        with tempfile.TemporaryDirectory() as td:
+            cache = PlanCache(Path(td), max_entries=2)
+            cache.put("a", "prd-a", _plan("a"))
+            cache.put("b", "prd-b", _plan("b"))
+
+            # Touch "a" so "b" becomes least recently used.
+            self.assertIsNotNone(cache.get("a"))
+            cache.put("c", "prd-c", _plan("c"))
+
+            self.assertTrue(cache.has("a"))
+            self.assertFalse(cache.has("b"))
+            self.assertTrue(cache.has("c"))
+            self.assertFalse((Path(td) / "plans" / idea_key("b")).exists())
+            self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_size_eviction_keeps_newest_entry(self):
+        with tempfile.TemporaryDirectory() as td:
+            cache = PlanCache(Path(td), max_bytes=1)
+            cache.put("a", "prd-a", _plan("a"))
+            cache.put("b", "prd-b", _plan("b"))
+
+            self.assertFalse(cache.has("a"))
+            self.assertTrue(cache.has("b"))
+
+
+if __name__ == "__main__":
+    unittest.main()
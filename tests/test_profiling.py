@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import os
+import pstats
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from scripts import consume_execution_request
+from utils.profiling import profile_run, profiling_requested
+
+
+def _busy(seconds: float) -> int:
+    end = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+class ProfilingTests(unittest.TestCase):
+    def test_profile_run_writes_prof_and_collapsed_keyed_by_hash(self):
+        with tempfile.TemporaryDirectory() as td, mock.patch.dict(os.environ, {"PROFILE_SAMPLE_MS": "1"}):
+            out = Path(td)
+            with profile_run(out, "consume-v3") as prof:
+                _busy(0.1)
+                prof.key = "ab" * 32
+
+            self.assertEqual(prof.prof_path.parent, out / "profiles" / ("ab" * 32))
+            self.assertTrue(prof.prof_path.name.startswith("consume-v3-"))
+            stats = pstats.Stats(str(prof.prof_path))
+            self.assertTrue(any(func[2] == "_busy" for func in stats.stats))
+
+            lines = prof.collapsed_path.read_text(encoding="utf-8").splitlines()
+            self.assertTrue(lines)
+            _, count = lines[0].rsplit(" ", 1)
+            self.assertGreater(int(count), 0)
+            self.assertTrue(any("test_profiling.py:_busy" in line for line in lines))
+
+    def test_disabled_profile_run_writes_nothing(self):
+        with tempfile.TemporaryDirectory() as td:
+            with profile_run(Path(td), "consume", enabled=False) as prof:
+                self.assertIsNone(prof)
+            self.assertFalse((Path(td) / "profiles").exists())
+
+    def test_env_var_enables_profiling(self):
+        with mock.patch.dict(os.environ, {"PROFILE": ""}):
+            self.assertFalse(profiling_requested())
+            self.assertTrue(profiling_requested(True))
+        with mock.patch.dict(os.environ, {"PROFILE": "1"}):
+            self.assertTrue(profiling_requested())
+
+    def test_queue_profiles_are_keyed_per_batch(self):
+        request = {
+            "kind": "execution_request",
+            "task_id": "PROF-1",
+            "payload": {"action": "write_public_note", "content": "profiled\n", "filename": "prof.md"},
+        }
+        with tempfile.TemporaryDirectory() as td, mock.patch.dict(os.environ, {"PROFILE_SAMPLE_MS": "1"}):
+            public_dir = Path(td) / "public"
+            public_dir.mkdir()
+            queue = public_dir / consume_execution_request.QUEUE_FILENAME
+            argv = ["consume_execution_request.py", "--public", str(public_dir), "--queue", "--profile"]
+
+            with open(queue, "a", encoding="utf-8") as f:
+                f.write(json.dumps(request) + "\n")
+            first_end = queue.stat().st_size
+            with mock.patch.object(sys, "argv", argv), mock.patch("builtins.print"):
+                consume_execution_request.main()
+                with open(queue, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({**request, "task_id": "PROF-2"}) + "\n")
+                consume_execution_request.main()
+
+            dirs = sorted(p.name for p in (public_dir / "profiles").iterdir())
+            self.assertEqual(dirs, ["queue-0", f"queue-{first_end}"])
+
+
+if __name__ == "__main__":
+    unittest.main()
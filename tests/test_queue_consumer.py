@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from scripts.consume_execution_request import consume_queue
+
+SERVER_PATH = Path(__file__).resolve().parent.parent / "apps" / "offline-vite-react" / "server" / "main.py"
+
+
+def _load_server():
+    spec = importlib.util.spec_from_file_location("artifact_server_queue_test", SERVER_PATH)
+    server = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = server  # dataclasses resolve annotations through sys.modules
+    spec.loader.exec_module(server)
+    return server
+
+
+def _note_request(i: int) -> dict:
+    return {
+        "kind": "execution_request",
+        "task_id": f"QUEUE-{i}",
+        "milestone_id": "MS-QUEUE",
+        "title": f"Queued note {i}",
+        "created_at": "2099-01-01T00:00:00+00:00",
+        "payload": {
+            "action": "write_public_note",
+            "content": f"queued note {i}\n",
+            "filename": f"queue-{i}.md",
+        },
+    }
+
+
+def _append_line(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _read_ndjson(path: Path) -> list:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+
+class QueueConsumerTests(unittest.TestCase):
+    def test_drains_queue_in_order_and_commits_offset(self):
+        with tempfile.TemporaryDirectory() as td:
+            public_dir = Path(td) / "public"
+            queue = public_dir / "execution_requests.ndjson"
+
+            for i in range(6):
+                _append_line(queue, json.dumps(_note_request(i)) + "\n")
+            _append_line(queue, "{not json\n")
+            # Producer still writing this one: no trailing newline yet.
+            partial = json.dumps(_note_request(99))
+            _append_line(queue, partial[:20])
+
+            processed = consume_queue(public_dir, workers=3, batch_size=4)
+
+            self.assertEqual(len(processed), 7)
+            self.assertEqual(
+                [r["request"]["task_id"] for r in processed[:6]],
+                [f"QUEUE-{i}" for i in range(6)],
+            )
+            self.assertEqual(processed[6]["status"], "error")
+
+            logged = _read_ndjson(public_dir / "execution_results.ndjson")
+            self.assertEqual([r["request_hash"] for r in logged], [r["request_hash"] for r in processed])
+            self.assertEqual(len(_read_ndjson(public_dir / "evaluation_results.ndjson")), 6)
+            self.assertEqual(len(list((public_dir / "execution_results").glob("*.json"))), 7)
+
+            last = json.loads((public_dir / "last_execution_result.json").read_text(encoding="utf-8"))
+            self.assertEqual(last["status"], "error")
+
+            # Nothing new: nothing re-processed.
+            self.assertEqual(consume_queue(public_dir, workers=3), [])
+
+            # Producer finishes the partial line: exactly that entry is consumed next.
+            _append_line(queue, partial[20:] + "\n")
+            more = consume_queue(public_dir, workers=3)
+            self.assertEqual([r["request"]["task_id"] for r in more], ["QUEUE-99"])
+
+            offset = json.loads((public_dir / "execution_requests.offset.json").read_text(encoding="utf-8"))
+            self.assertEqual(offset["offset"], queue.stat().st_size)
+            self.assertEqual(offset["consumed"], 8)
+
+    def test_server_executed_requests_are_not_run_again(self):
+        import httpx
+
+        server = _load_server()
+        body = {"task_id": "SRV-1", "payload": {"action": "write_public_note", "content": "srv\n"}}
+
+        with tempfile.TemporaryDirectory() as td:
+            public_dir = Path(td) / "public"
+            public_dir.mkdir()
+            last_path = public_dir / "last_execution_request.json"
+            log_path = public_dir / "execution_requests.ndjson"
+
+            async def _run() -> None:
+                writer = server.GroupCommitWriter(log_path, last_path)
+                jobs = server.JobQueue(public_dir, workers=1, max_queued=1)
+                with mock.patch.multiple(
+                    server, PUBLIC_DIR=public_dir, LAST_REQ_PATH=last_path, LOG_PATH=log_path, WRITER=writer, JOBS=jobs
+                ):
+                    transport = httpx.ASGITransport(app=server.app)
+                    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                        # Queue full: refused before anything is logged.
+                        self.assertTrue(jobs.reserve())
+                        self.assertEqual((await client.post("/execute", json=body)).status_code, 503)
+                        self.assertFalse(log_path.exists())
+                        jobs.release()
+
+                        resp = await client.post("/execute", json=body)
+                        self.assertEqual(resp.status_code, 202)
+                        job_id = resp.json()["job_id"]
+                        for _ in range(200):
+                            job = (await client.get(f"/jobs/{job_id}")).json()
+                            if job["status"] in ("done", "error"):
+                                break
+                            await asyncio.sleep(0.01)
+                        self.assertEqual(job["status"], "done")
+                    await jobs.stop()
+                    await writer.stop()
+
+            asyncio.run(_run())
+
+            (logged,) = _read_ndjson(log_path)
+            self.assertEqual(logged["_meta"]["executed_by"], "server")
+            results_before = len(_read_ndjson(public_dir / "execution_results.ndjson"))
+
+            # Entries the consumer appends itself are still drained; the server's is skipped.
+            _append_line(log_path, json.dumps(_note_request(0)) + "\n")
+            processed = consume_queue(public_dir, workers=1)
+            self.assertEqual([r["request"]["task_id"] for r in processed], ["QUEUE-0"])
+            self.assertEqual(len(_read_ndjson(public_dir / "execution_results.ndjson")), results_before + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+from utils.rate_limiter import RateLimit, RateLimiter, estimate_tokens
+
+
+class _Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class RateLimiterTests(unittest.TestCase):
+    def test_request_bucket_refills_over_time(self):
+        with tempfile.TemporaryDirectory() as td:
+            clock = _Clock()
+            limiter = RateLimiter(Path(td) / "rl.sqlite3", {"gemini": RateLimit(rpm=2, tpm=0)}, clock=clock)
+
+            self.assertEqual(limiter.try_acquire("gemini:m"), 0.0)
+            self.assertEqual(limiter.try_acquire("gemini:m"), 0.0)
+            self.assertAlmostEqual(limiter.try_acquire("gemini:m"), 30.0)
+
+            clock.now += 30
+            self.assertEqual(limiter.try_acquire("gemini:m"), 0.0)
+
+    def test_token_bucket_and_oversized_request(self):
+        with tempfile.TemporaryDirectory() as td:
+            clock = _Clock()
+            limiter = RateLimiter(Path(td) / "rl.sqlite3", {"openai": RateLimit(rpm=0, tpm=600)}, clock=clock)
+
+            self.assertEqual(limiter.try_acquire("openai:m", 500), 0.0)
+            self.assertAlmostEqual(limiter.try_acquire("openai:m", 200), 10.0)
+
+            # Larger than the whole budget: allowed once the bucket is full again.
+            clock.now += 60
+            self.assertEqual(limiter.try_acquire("openai:m", 10_000), 0.0)
+
+    def test_processes_sharing_a_database_share_the_quota(self):
+        with tempfile.TemporaryDirectory() as td:
+            clock = _Clock()
+            limits = {"gemini": RateLimit(rpm=1, tpm=0)}
+            a = RateLimiter(Path(td) / "rl.sqlite3", limits, clock=clock)
+            b = RateLimiter(Path(td) / "rl.sqlite3", limits, clock=clock)
+
+            self.assertEqual(a.try_acquire("gemini:m"), 0.0)
+            self.assertGreater(b.try_acquire("gemini:m"), 0.0)
+            # Keys are independent.
+            self.assertEqual(b.try_acquire("gemini:other"), 0.0)
+
+    def test_aacquire_waits_for_permit(self):
+        with tempfile.TemporaryDirectory() as td:
+            limiter = RateLimiter(Path(td) / "rl.sqlite3", {"gemini": RateLimit(rpm=60, tpm=0)})
+            while limiter.try_acquire("gemini:m") == 0.0:
+                pass
+
+            async def waiter():
+                loop = asyncio.get_running_loop()
+                started = loop.time()
+                # The event loop stays free while the permit refills (~1s at 60 rpm).
+                ticks = 0
+
+                async def ticker():
+                    nonlocal ticks
+                    while True:
+                        ticks += 1
+                        await asyncio.sleep(0.05)
+
+                t = asyncio.create_task(ticker())
+                await limiter.aacquire("gemini:m")
+                t.cancel()
+                return loop.time() - started, ticks
+
+            elapsed, ticks = asyncio.run(waiter())
+            self.assertGreater(elapsed, 0.5)
+            self.assertGreater(ticks, 5)
+
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens("x" * 40), 10)
+        self.assertEqual(estimate_tokens([{"role": "user", "content": "y" * 8}]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
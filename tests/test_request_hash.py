@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import hashlib
+import random
+import unittest
+
+from utils.request_hash import (
+    canonical_json,
+    canonicalize_request,
+    compute_request_hash,
+    sha256_of,
+)
+
+
+def _legacy_hash(obj) -> str:
+    return hashlib.sha256(canonical_json(obj).encode("utf-8")).hexdigest()
+
+
+def _random_value(rng: random.Random, depth: int = 0):
+    kind = rng.randint(0, 6 if depth < 4 else 3)
+    if kind == 0:
+        return rng.choice([None, True, False])
+    if kind == 1:
+        return rng.choice([0, -7, 10**20, 1.5, -0.0, 1e300, float("inf")])
+    if kind == 2:
+        return "".join(rng.choice('ab"\\\n☃é\x00 ') for _ in range(rng.randint(0, 12)))
+    if kind == 3:
+        return "x" * rng.randint(0, 100_000)
+    if kind == 4:
+        return [_random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    keys = ["task_id", "payload", "created_at", "_meta", "é", ""]
+    return {rng.choice(keys): _random_value(rng, depth + 1) for _ in range(rng.randint(0, 5))}
+
+
+class RequestHashTests(unittest.TestCase):
+    def test_streaming_digest_is_byte_identical(self):
+        rng = random.Random(19)
+        for _ in range(500):
+            obj = _random_value(rng)
+            self.assertEqual(sha256_of(obj), _legacy_hash(obj))
+            if isinstance(obj, dict):
+                self.assertEqual(compute_request_hash(obj), _legacy_hash(canonicalize_request(obj)))
+
+    def test_non_string_keys_follow_json_dumps(self):
+        obj = {2: "a", 1: [1, 2]}
+        self.assertEqual(compute_request_hash(obj), _legacy_hash(canonicalize_request(obj)))
+        with self.assertRaises(TypeError):
+            compute_request_hash({1: "a", "b": 2})
+
+    def test_meta_is_outside_the_hash(self):
+        req = {"task_id": "T1", "payload": {"content": "hi"}}
+        # A caller-supplied _meta.request_hash can't steer identity: it is never read.
+        self.assertEqual(compute_request_hash({**req, "_meta": {"request_hash": "f" * 64}}), compute_request_hash(req))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from agents.planner_agent import PlannerAgent
+from schemas.plan_schema import Plan
+from utils.offline_seed import offline_plan_dict_for_idea
+from utils.rate_limiter import RateLimiter
+from utils.response_cache import ResponseCache, response_cache_key
+
+
+class _FakeModels:
+    def __init__(self, plan: Plan):
+        self.plan = plan
+        self.calls = 0
+
+    def generate_content(self, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(parsed=self.plan, text=None)
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def test_key_depends_on_every_input(self):
+        base = dict(provider="gemini", model="m", prompt="p", schema=Plan, temperature=0.2)
+        k = response_cache_key(**base)
+        self.assertEqual(k, response_cache_key(**base))
+        for field, value in (("model", "m2"), ("prompt", "p2"), ("temperature", 0.3), ("schema", None)):
+            self.assertNotEqual(k, response_cache_key(**{**base, field: value}))
+
+    def test_hit_miss_stats_and_bypass(self):
+        with tempfile.TemporaryDirectory() as td:
+            cache = ResponseCache(Path(td) / "c.sqlite3")
+            self.assertIsNone(cache.get("k"))
+            cache.put("k", '{"a":1}')
+            self.assertEqual(cache.get("k"), '{"a":1}')
+
+            stats = cache.stats()
+            self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+            self.assertEqual(stats["bytes_saved"], len('{"a":1}'))
+            self.assertEqual(stats["hit_rate"], 0.5)
+
+            bypassed = ResponseCache(Path(td) / "c.sqlite3", bypass=True)
+            self.assertIsNone(bypassed.get("k"))
+            self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_ttl_and_size_eviction(self):
+        with tempfile.TemporaryDirectory() as td:
+            db = Path(td) / "ttl.sqlite3"
+            expiring = ResponseCache(db, ttl_seconds=60)
+            expiring.put("k", "v")
+            conn = sqlite3.connect(db)
+            with conn:
+                conn.execute("UPDATE responses SET created_at = created_at - 120")
+            conn.close()
+            self.assertIsNone(expiring.get("k"))
+            self.assertEqual(expiring.stats()["entries"], 0)
+
+            small = ResponseCache(Path(td) / "size.sqlite3", max_bytes=10)
+            small.put("a", "x" * 6)
+            small.put("b", "y" * 6)
+            self.assertIsNone(small.get("a"))
+            self.assertEqual(small.get("b"), "y" * 6)
+            self.assertEqual(small.stats()["evictions"], 1)
+
+    def test_planner_reuses_cached_response(self):
+        plan = Plan.model_validate(offline_plan_dict_for_idea("cache me"))
+        with tempfile.TemporaryDirectory() as td, mock.patch.dict(
+            os.environ, {"USAGE_LEDGER_PATH": str(Path(td) / "usage.ndjson")}
+        ):
+            models = _FakeModels(plan)
+            agent = PlannerAgent(
+                SimpleNamespace(models=models),
+                response_cache=ResponseCache(Path(td) / "c.sqlite3"),
+                rate_limiter=RateLimiter(Path(td) / "rl.sqlite3"),
+            )
+
+            first = agent.run_from_prd_text("# PRD")
+            second = agent.run_from_prd_text("# PRD")
+
+            self.assertEqual(models.calls, 1)
+            self.assertEqual(first.model_dump(), second.model_dump())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import os
+import unittest
+from unittest import mock
+
+from schemas.execution_schema import ExecutionResult
+from utils.schema_dump import dump_artifact
+
+
+def _result() -> ExecutionResult:
+    return ExecutionResult(
+        agent_role="engineer",
+        status="success",
+        request_hash="h",
+        request={"task_id": "T1"},
+        outputs={"writes": []},
+    )
+
+
+class SchemaDumpTests(unittest.TestCase):
+    def test_dump_matches_model_dump(self):
+        result = _result()
+        self.assertEqual(dump_artifact(result), result.model_dump())
+
+    def test_revalidation_only_under_strict_flag(self):
+        result = _result()
+        with mock.patch.object(ExecutionResult, "model_validate", wraps=ExecutionResult.model_validate) as spy:
+            with mock.patch.dict(os.environ, {"STRICT_SCHEMA_CHECKS": ""}):
+                dump_artifact(result)
+            self.assertEqual(spy.call_count, 0)
+
+            with mock.patch.dict(os.environ, {"STRICT_SCHEMA_CHECKS": "1"}):
+                dump_artifact(result)
+            self.assertEqual(spy.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from orchestrator_utils import write_file_artifact
+from schemas.engineering_schema import FileArtifact
+from scripts.safe_write import WriteManifest, safe_write_many, safe_write_text
+
+
+class SkipUnchangedWritesTests(unittest.TestCase):
+    def setUp(self):
+        self.td = tempfile.TemporaryDirectory()
+        self.addCleanup(self.td.cleanup)
+        self.root = Path(self.td.name)
+        env = mock.patch.dict(os.environ, {"WRITE_MANIFEST_DIR": str(self.root / "manifests")})
+        env.start()
+        self.addCleanup(env.stop)
+        WriteManifest._instances.clear()
+        self.addCleanup(WriteManifest._instances.clear)
+
+    def _write(self, content: str):
+        return safe_write_text(
+            allowlist_dir=self.root / "generated",
+            relative_path="src/a.ts",
+            content=content,
+            skip_unchanged=True,
+        )
+
+    def test_identical_bytes_are_not_rewritten(self):
+        first = self._write("export {}\n")
+        self.assertFalse(first.skipped)
+        mtime = Path(first.path).stat().st_mtime_ns
+
+        second = self._write("export {}\n")
+        self.assertTrue(second.skipped)
+        self.assertEqual((second.sha256, second.bytes), (first.sha256, first.bytes))
+        self.assertEqual(Path(second.path).stat().st_mtime_ns, mtime)
+
+        third = self._write("export const x = 1;\n")
+        self.assertFalse(third.skipped)
+        self.assertEqual(Path(third.path).read_text(encoding="utf-8"), "export const x = 1;\n")
+
+    def test_stat_match_skips_rehash_and_survives_new_process(self):
+        self._write("same\n")
+        WriteManifest._instances.clear()  # fresh manifest instance, as in a new consumer process
+
+        with mock.patch.object(Path, "read_bytes", side_effect=AssertionError("old file was re-read")):
+            self.assertTrue(self._write("same\n").skipped)
+
+    def test_batch_saves_manifest_once(self):
+        files = [(f"src/f{i}.ts", f"export const v = {i};\n") for i in range(20)]
+        saves = []
+        real_flush = WriteManifest.flush
+
+        def _flush(manifest):
+            saves.append(manifest._dirty)
+            real_flush(manifest)
+
+        with mock.patch.object(WriteManifest, "flush", _flush):
+            records = safe_write_many(allowlist_dir=self.root / "generated", files=files, skip_unchanged=True)
+        self.assertEqual(saves, [True])
+        self.assertFalse(any(r.skipped for r in records))
+
+        WriteManifest._instances.clear()
+        again = safe_write_many(allowlist_dir=self.root / "generated", files=files, skip_unchanged=True)
+        self.assertTrue(all(r.skipped for r in again))
+        self.assertNotIn("skipped", again[0].as_output())
+
+    def test_default_mode_always_writes(self):
+        with mock.patch.dict(os.environ, {"WRITE_SKIP_UNCHANGED": ""}):
+            safe_write_text(allowlist_dir=self.root / "generated", relative_path="n.md", content="x\n")
+            rec = safe_write_text(allowlist_dir=self.root / "generated", relative_path="n.md", content="x\n")
+        self.assertFalse(rec.skipped)
+
+    def test_engineer_writer_skips_instead_of_diverting(self):
+        repo = self.root / "repo"
+        f = FileArtifact(path="src/main.ts", content="console.log(1)\n")
+        path = write_file_artifact(f, repo, skip_unchanged=True)
+
+        again = write_file_artifact(f, repo, skip_unchanged=True)
+        self.assertEqual(again, path)
+        self.assertFalse((repo / "src" / "main.ts.generated").exists())
+
+        changed = write_file_artifact(FileArtifact(path="src/main.ts", content="x\n"), repo, skip_unchanged=True)
+        self.assertTrue(changed.endswith(".generated"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from agents.engineer_agent import EngineerAgent
+from orchestrator import Orchestrator
+from orchestrator_utils import build_task_graph, run_plan_tasks
+from schemas.engineering_schema import EngineeringResult, FileArtifact
+from schemas.plan_schema import Plan
+from utils.rate_limiter import RateLimiter
+from utils.plan_cache import idea_key
+from utils.response_cache import ResponseCache
+from utils.usage_ledger import iter_usage
+
+
+def _task(tid: str, depends_on=(), hint: str = "engineer") -> dict:
+    t = {
+        "id": tid,
+        "description": f"Task {tid}",
+        "depends_on": list(depends_on),
+        "outputs": [f"{tid} output"],
+        "execution_hint": hint,
+    }
+    if hint == "engineer":
+        t["task_type"] = "single_file"
+    return t
+
+
+def _plan(*milestones) -> Plan:
+    return Plan.model_validate(
+        {"milestones": [{"name": f"M{i}", "tasks": list(tasks)} for i, tasks in enumerate(milestones)]}
+    )
+
+
+def _result(task) -> EngineeringResult:
+    return EngineeringResult(
+        task_id=task.id,
+        summary=f"built {task.id}",
+        files=[FileArtifact(path=f"docs/{task.id}.md", content=f"# {task.id}\n")],
+    )
+
+
+class _TaskModels:
+    """
+    Fake Gemini surface: answers each engineer prompt with one docs/<task id>.md file.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def generate_content(self, **kwargs):
+        tid = re.search(r"^id: (\S+)$", kwargs["contents"], flags=re.MULTILINE).group(1)
+        with self._lock:
+            self.calls.append(tid)
+        result = EngineeringResult(
+            task_id=tid,
+            summary=f"built {tid}",
+            files=[FileArtifact(path=f"docs/{tid}.md", content=f"# {tid}\n")],
+        )
+        return SimpleNamespace(parsed=result, usage_metadata=None)
+
+
+class TaskSchedulerTests(unittest.TestCase):
+    def test_graph_rejects_missing_ids_and_cycles(self):
+        with self.assertRaisesRegex(ValueError, "Unknown task ids"):
+            build_task_graph(_plan([_task("A", ["NOPE"])]))
+
+        with self.assertRaisesRegex(ValueError, "cycle"):
+            build_task_graph(_plan([_task("A", ["C"]), _task("B", ["A"])], [_task("C", ["B"])]))
+
+    def test_runs_in_dependency_order_with_parallelism_cap(self):
+        plan = _plan(
+            [_task("A"), _task("B"), _task("PLAN", hint="defer")],
+            [_task("C", ["A", "B", "PLAN"]), _task("D", ["A"])],
+        )
+        started = []
+        finished = set()
+        lock = threading.Lock()
+        in_flight = [0, 0]  # current, max
+
+        def run_task(task):
+            with lock:
+                for dep in task.depends_on:
+                    if dep != "PLAN":
+                        self.assertIn(dep, finished)
+                started.append(task.id)
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight[1], in_flight[0])
+            time.sleep(0.02)
+            with lock:
+                in_flight[0] -= 1
+                finished.add(task.id)
+            return _result(task)
+
+        streamed = []
+        with tempfile.TemporaryDirectory() as td:
+            records = run_plan_tasks(
+                plan,
+                run_task,
+                repo_root=Path(td),
+                max_parallel=2,
+                on_result=lambda rec, res: streamed.append(rec.task_id),
+            )
+            self.assertTrue((Path(td) / "docs" / "C.md").exists())
+
+        self.assertEqual([r.task_id for r in records], ["A", "B", "C", "D"])
+        self.assertTrue(all(r.status == "success" for r in records))
+        self.assertEqual(sorted(streamed), ["A", "B", "C", "D"])
+        self.assertLessEqual(in_flight[1], 2)
+
+    def test_failure_skips_downstream_tasks(self):
+        plan = _plan([_task("A"), _task("B", ["A"]), _task("C")])
+
+        def run_task(task):
+            if task.id == "A":
+                raise RuntimeError("boom")
+            return _result(task)
+
+        with tempfile.TemporaryDirectory() as td:
+            records = run_plan_tasks(plan, run_task, repo_root=Path(td), max_parallel=4)
+
+        by_id = {r.task_id: r for r in records}
+        self.assertEqual(by_id["A"].status, "error")
+        self.assertEqual(by_id["B"].status, "skipped")
+        self.assertEqual(by_id["C"].status, "success")
+
+    def test_orchestrator_runs_multi_task_plan_end_to_end(self):
+        plan = _plan(
+            [{**_task("A"), "task_type": "scaffold"}, _task("PLAN", hint="defer")],
+            [{**_task("B", ["A"]), "task_type": "doc"}, _task("C", ["A", "PLAN"])],
+        )
+        models = _TaskModels()
+
+        with tempfile.TemporaryDirectory() as td, mock.patch.dict(
+            os.environ,
+            {
+                "OFFLINE_MODE": "1",
+                "WRITE_MANIFEST_DIR": str(Path(td) / "manifests"),
+                "USAGE_LEDGER_PATH": str(Path(td) / "usage.ndjson"),
+                "USAGE_LEDGER": "",
+                "TRACING": "",
+                "TRACE_LOG_PATH": str(Path(td) / "traces.ndjson"),
+            },
+        ):
+            root = Path(td)
+            orch = Orchestrator(repo_root=root)
+            orch.plan_cache.put("multi task idea", "# PRD", plan, source="offline")
+            # Plan comes from the cache; the engineer is the real agent on a fake client.
+            os.environ["OFFLINE_MODE"] = "0"
+            orch.engineer = EngineerAgent(
+                SimpleNamespace(models=models),
+                response_cache=ResponseCache(root / "c.sqlite3"),
+                rate_limiter=RateLimiter(root / "rl.sqlite3"),
+            )
+
+            _, _, result, written = orch.run("multi task idea", max_parallel=2)
+
+            self.assertIsNone(result)
+            self.assertEqual(sorted(Path(p).name for p in written), ["A.md", "B.md", "C.md"])
+            self.assertTrue(all((root / "docs" / f"{t}.md").exists() for t in "ABC"))
+
+            # Worker threads keep the run's usage and trace context.
+            ledger = list(iter_usage([root / "usage.ndjson"]))
+            (traced,) = [json.loads(line) for line in (root / "traces.ndjson").read_text(encoding="utf-8").splitlines()]
+
+        engineer_calls = [r for r in ledger if r["agent"] == "engineer"]
+        self.assertEqual(len(engineer_calls), 3)
+        self.assertEqual({r.get("idea_hash") for r in engineer_calls}, {idea_key("multi task idea")})
+        task_spans = [s for s in traced["spans"] if s["name"] == "engineer.run"]
+        self.assertEqual(sorted(s["task_id"] for s in task_spans), ["A", "B", "C"])
+        self.assertTrue(all(s["parent"] == "engineer.run_plan" for s in task_spans))
+
+        self.assertEqual(models.calls[0], "A")
+        self.assertEqual(sorted(models.calls), ["A", "B", "C"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from scripts.consume_execution_request import consume
+from scripts.safe_write import safe_write_many
+from utils.tracing import iter_trace_spans, percentile, span, stage_percentiles, trace
+
+
+class TracingTests(unittest.TestCase):
+    def setUp(self):
+        self.td = tempfile.TemporaryDirectory()
+        self.addCleanup(self.td.cleanup)
+        self.root = Path(self.td.name)
+        env = mock.patch.dict(os.environ, {"TRACE_LOG_PATH": "", "TRACING": "", "TRACE_ARTIFACT_SPANS": ""})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def _log(self):
+        return [json.loads(line) for line in (self.root / "traces.ndjson").read_text(encoding="utf-8").splitlines()]
+
+    def test_spans_nest_and_nested_traces_join_the_outer_one(self):
+        with trace("outer", self.root / "traces.ndjson"):
+            with span("stage", size=3):
+                with trace("inner", self.root / "other.ndjson"):
+                    pass
+
+        (logged,) = self._log()
+        by_name = {s["name"]: s for s in logged["spans"]}
+        self.assertEqual(by_name["inner"]["parent"], "stage")
+        self.assertEqual(by_name["stage"]["parent"], "outer")
+        self.assertEqual(by_name["stage"]["size"], 3)
+        self.assertIsNone(by_name["outer"]["parent"])
+        self.assertFalse((self.root / "other.ndjson").exists())
+
+    def test_span_outside_trace_and_disabled_tracing_record_nothing(self):
+        with span("orphan"):
+            pass
+        with mock.patch.dict(os.environ, {"TRACING": "0"}):
+            with trace("off", self.root / "traces.ndjson") as active:
+                self.assertIsNone(active)
+        self.assertFalse((self.root / "traces.ndjson").exists())
+
+    def test_pool_writes_are_recorded_in_the_callers_trace(self):
+        with trace("batch", self.root / "traces.ndjson"):
+            safe_write_many(
+                allowlist_dir=self.root / "out",
+                files=[(f"f{i}.txt", "x") for i in range(5)],
+                skip_unchanged=False,
+            )
+        (logged,) = self._log()
+        self.assertEqual(sum(1 for s in logged["spans"] if s["name"] == "write_file"), 5)
+
+    def test_consume_records_trace_in_meta_and_log(self):
+        req = {"task_id": "T1", "payload": {"action": "write_public_note", "content": "hi\n", "filename": "t.md"}}
+        (self.root / "last_execution_request.json").write_text(json.dumps(req), encoding="utf-8")
+
+        result = consume(self.root)
+
+        # Artifacts (and the NDJSON history) only carry the trace_id; the spans live in traces.ndjson.
+        self.assertEqual(set(result["_meta"]["trace"]), {"trace_id"})
+        (logged,) = self._log()
+        self.assertEqual(logged["trace_id"], result["_meta"]["trace"]["trace_id"])
+        names = {s["name"] for s in logged["spans"]}
+        self.assertTrue({"request_hash", "schema_validation", "execute", "write_file", "evaluate"} <= names)
+
+
+        stats = stage_percentiles(iter_trace_spans([self.root / "traces.ndjson"]))
+        self.assertEqual(stats["consume"]["count"], 1)
+
+        with mock.patch.dict(os.environ, {"TRACE_ARTIFACT_SPANS": "1"}):
+            result = consume(self.root)
+        self.assertIn("execute", {s["name"] for s in result["_meta"]["trace"]["spans"]})
+
+    def test_nearest_rank_percentile(self):
+        values = [float(v) for v in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile([7.0], 95), 7.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from agents import pm_agent
+from agents.engineer_agent import EngineerAgent
+from schemas.plan_schema import Task
+from utils.rate_limiter import RateLimiter
+from utils.response_cache import ResponseCache
+from utils.usage_ledger import aggregate_usage, iter_usage, model_call, usage_context
+
+RESULT = {"task_id": "T-1", "summary": "s", "files": [{"path": "src/a.ts", "content": "x\n"}]}
+
+
+class _FailingCompletions:
+    def parse(self, **kwargs):
+        raise RuntimeError("provider down")
+
+
+class _StreamingModels:
+    def generate_content_stream(self, **kwargs):
+        text = json.dumps(RESULT)
+        yield SimpleNamespace(text=text[:10], usage_metadata=None)
+        yield SimpleNamespace(text=text[10:], usage_metadata=None)
+        # Totals arrive after the JSON has already closed (a final empty chunk).
+        yield SimpleNamespace(
+            text="", usage_metadata=SimpleNamespace(prompt_token_count=120, candidates_token_count=30)
+        )
+
+
+def _task() -> Task:
+    return Task(
+        id="T-1",
+        description="scaffold",
+        depends_on=[],
+        outputs=[],
+        output_files=[],
+        execution_hint="engineer",
+        task_type="scaffold",
+    )
+
+
+class UsageLedgerTests(unittest.TestCase):
+    def test_engineer_calls_and_cache_hits_are_recorded(self):
+        with tempfile.TemporaryDirectory() as td, mock.patch.dict(
+            os.environ, {"USAGE_LEDGER_PATH": str(Path(td) / "usage.ndjson"), "USAGE_LEDGER": ""}
+        ):
+            agent = EngineerAgent(
+                SimpleNamespace(models=_StreamingModels()),
+                response_cache=ResponseCache(Path(td) / "c.sqlite3"),
+                rate_limiter=RateLimiter(Path(td) / "rl.sqlite3"),
+            )
+            with usage_context(idea_hash="i" * 64):
+                with usage_context(request_hash="r" * 64):
+                    agent.run_stream(_task(), lambda f: None)
+                    agent.run_stream(_task(), lambda f: None)
+
+            records = list(iter_usage([Path(td) / "usage.ndjson"]))
+
+        self.assertEqual(len(records), 2)
+        call, hit = records
+        self.assertEqual((call["agent"], call["provider"], call["model"]), ("engineer", "gemini", "gemini-2.5-flash"))
+        self.assertEqual((call["input_tokens"], call["output_tokens"], call["retries"]), (120, 30, 0))
+        self.assertFalse(call["cache_hit"])
+        self.assertEqual((call["idea_hash"], call["request_hash"]), ("i" * 64, "r" * 64))
+        self.assertTrue(hit["cache_hit"])
+        self.assertEqual(hit["input_tokens"], 0)
+
+    def test_failed_call_records_error_and_retries(self):
+        with tempfile.TemporaryDirectory() as td, mock.patch.dict(
+            os.environ, {"USAGE_LEDGER_PATH": str(Path(td) / "usage.ndjson"), "USAGE_LEDGER": ""}
+        ):
+            with self.assertRaises(RuntimeError):
+                with model_call("planner", "gemini", "gemini-2.5-flash") as call:
+                    call.attempts = 3
+                    raise RuntimeError("boom")
+            (record,) = iter_usage([Path(td) / "usage.ndjson"])
+
+        self.assertEqual(record["retries"], 2)
+        self.assertEqual(record["error"], "RuntimeError")
+
+    def test_pm_counts_provider_attempts(self):
+        calls = []
+        real_model_call = pm_agent.model_call
+
+        @contextmanager
+        def _model_call(*args):
+            with real_model_call(*args) as call:
+                calls.append(call)
+                yield call
+
+        with tempfile.TemporaryDirectory() as td, mock.patch.dict(
+            os.environ, {"USAGE_LEDGER_PATH": str(Path(td) / "usage.ndjson"), "USAGE_LEDGER": ""}
+        ), mock.patch.object(pm_agent, "model_call", _model_call):
+            agent = pm_agent.PMAgent(
+                api_key="test-key",
+                response_cache=ResponseCache(Path(td) / "c.sqlite3"),
+                rate_limiter=RateLimiter(Path(td) / "rl.sqlite3"),
+            )
+            agent.client = SimpleNamespace(
+                beta=SimpleNamespace(chat=SimpleNamespace(completions=_FailingCompletions()))
+            )
+            with self.assertRaises(RuntimeError):
+                agent.generate_prd("a todo app")
+            (record,) = iter_usage([Path(td) / "usage.ndjson"])
+
+        self.assertEqual(calls[0].attempts, 1)
+        self.assertEqual((record["agent"], record["retries"], record["error"]), ("pm", 0, "RuntimeError"))
+
+    def test_disabled_ledger_writes_nothing(self):
+        with tempfile.TemporaryDirectory() as td, mock.patch.dict(
+            os.environ, {"USAGE_LEDGER_PATH": str(Path(td) / "usage.ndjson"), "USAGE_LEDGER": "0"}
+        ):
+            with model_call("pm", "openai", "gpt-4o-mini"):
+                pass
+            self.assertFalse((Path(td) / "usage.ndjson").exists())
+
+    def test_aggregate_costs_and_groups(self):
+        records = [
+            {"ts": "2026-01-01T10:00:00+00:00", "agent": "pm", "model": "gpt-4o-mini", "input_tokens": 1_000_000,
+             "output_tokens": 1_000_000, "latency_ms": 900.0, "retries": 0, "cache_hit": False, "idea_hash": "a" * 64},
+            {"ts": "2026-01-01T11:00:00+00:00", "agent": "pm", "model": "gpt-4o-mini", "input_tokens": 0,
+             "output_tokens": 0, "latency_ms": 2.0, "retries": 0, "cache_hit": True, "idea_hash": "a" * 64},
+            {"ts": "2026-01-02T10:00:00+00:00", "agent": "planner", "model": "gemini-2.5-flash",
+             "input_tokens": 100, "output_tokens": 10, "latency_ms": 300.0, "retries": 1, "cache_hit": False},
+        ]
+
+        by_agent = aggregate_usage(records, "agent")
+        self.assertEqual(by_agent["pm"]["calls"], 2)
+        self.assertEqual(by_agent["pm"]["cache_hits"], 1)
+        self.assertAlmostEqual(by_agent["pm"]["cost_usd"], 0.75)
+        # Cache hits do not drag the provider latency percentiles down.
+        self.assertEqual(by_agent["pm"]["p50_ms"], 900.0)
+        self.assertEqual(by_agent["planner"]["retries"], 1)
+
+        self.assertEqual(sorted(aggregate_usage(records, "day")), ["2026-01-01", "2026-01-02"])
+        self.assertEqual(sorted(aggregate_usage(records, "idea")), ["-", "a" * 16])
+
+
+if __name__ == "__main__":
+    unittest.main()
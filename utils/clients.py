@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple, TypeVar
+
+if TYPE_CHECKING:
+    import httpx
+    from google import genai
+    from openai import OpenAI
+
+    from agents.engineer_agent import EngineerAgent
+    from agents.planner_agent import PlannerAgent
+
+T = TypeVar("T")
+
+DEFAULT_MAX_CONNECTIONS = 32
+DEFAULT_MAX_KEEPALIVE = 16
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(1, int(raw))
+    except ValueError:
+        return default
+
+
+def _pool_limits() -> "httpx.Limits":
+    import httpx
+
+    return httpx.Limits(
+        max_connections=_env_int("HTTP_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS),
+        max_keepalive_connections=_env_int("HTTP_MAX_KEEPALIVE", DEFAULT_MAX_KEEPALIVE),
+        keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY,
+    )
+
+
+_registry: Dict[Tuple[str, str], Any] = {}
+_registry_lock = threading.Lock()
+
+
+def _get_or_create(kind: str, key: str, factory: Callable[[], T]) -> T:
+    with _registry_lock:
+        obj = _registry.get((kind, key))
+        if obj is None:
+            obj = factory()
+            _registry[(kind, key)] = obj
+        return obj
+
+
+def _require_key(api_key: Optional[str], env_name: str, label: str) -> str:
+    key = (api_key or os.getenv(env_name, "")).strip()
+    if not key:
+        raise ValueError(f"{label} API key required. Set {env_name} environment variable or pass api_key.")
+    return key
+
+
+def get_genai_client(api_key: Optional[str] = None) -> "genai.Client":
+    """
+    Process-wide Gemini client per API key (defaults to GENAI_API_KEY).
+    Its HTTP pool keeps connections alive, so repeated requests skip TCP/TLS setup.
+    """
+    key = _require_key(api_key, "GENAI_API_KEY", "Google GenAI")
+
+    def _create() -> "genai.Client":
+        from google import genai
+        from google.genai import types
+
+        limits = _pool_limits()
+        return genai.Client(
+            api_key=key,
+            http_options=types.HttpOptions(
+                client_args={"limits": limits},
+                async_client_args={"limits": limits},
+            ),
+        )
+
+    return _get_or_create("genai", key, _create)
+
+
+def get_openai_client(api_key: Optional[str] = None) -> "OpenAI":
+    """
+    Process-wide synchronous OpenAI client per API key (defaults to OPENAI_API_KEY), on a keep-alive pool.
+    Async clients are not pooled here: their connections belong to the event loop that opened them.
+    """
+    key = _require_key(api_key, "OPENAI_API_KEY", "OpenAI")
+
+    def _create() -> "OpenAI":
+        import httpx
+        from openai import OpenAI
+
+        return OpenAI(api_key=key, http_client=httpx.Client(limits=_pool_limits()))
+
+    return _get_or_create("openai", key, _create)
+
+
+def get_engineer_agent(api_key: Optional[str] = None) -> "EngineerAgent":
+    """
+    Shared EngineerAgent bound to the pooled Gemini client. The agent is stateless between runs.
+    """
+    from agents.engineer_agent import EngineerAgent
+
+    client = get_genai_client(api_key)
+    return _get_or_create("engineer", _client_id(client), lambda: EngineerAgent(client))
+
+
+def get_planner_agent(api_key: Optional[str] = None) -> "PlannerAgent":
+    """
+    Shared PlannerAgent bound to the pooled Gemini client.
+    """
+    from agents.planner_agent import PlannerAgent
+
+    client = get_genai_client(api_key)
+    return _get_or_create("planner", _client_id(client), lambda: PlannerAgent(client))
+
+
+def _client_id(client: Any) -> str:
+    return str(id(client))
+
+
+def clear_registry() -> None:
+    """
+    Drop every pooled client/agent (e.g. after rotating API keys). Open connections are closed lazily by GC.
+    """
+    with _registry_lock:
+        _registry.clear()
@@ -1,14 +1,33 @@
 from __future__ import annotations
 
+import asyncio
 import re
 import time
-from typing import Callable, TypeVar
-
-from google.genai.errors import ClientError
+from typing import Awaitable, Callable, TypeVar
 
 T = TypeVar("T")
 
 
+def is_quota_error(e: BaseException) -> bool:
+    """
+    True for provider 429s: any error carrying code / status_code 429 (Gemini ClientError, OpenAI
+    RateLimitError), and Gemini ClientErrors that mention RESOURCE_EXHAUSTED.
+    google.genai is imported here rather than at module top so OFFLINE paths never load the SDK;
+    without the SDK installed the status-code check alone decides, so the original error is not masked.
+    """
+    if getattr(e, "code", None) == 429 or getattr(e, "status_code", None) == 429:
+        return True
+    try:
+        from google.genai.errors import ClientError
+    except ImportError:
+        return False
+
+    if not isinstance(e, ClientError):
+        return False
+    msg = str(e)
+    return "RESOURCE_EXHAUSTED" in msg or "429" in msg
+
+
 def call_with_retry(fn: Callable[[], T], max_retries: int = 2) -> T:
     """
     Retry Gemini calls on 429 RESOURCE_EXHAUSTED using server-provided retryDelay when present.
@@ -16,17 +35,33 @@ def call_with_retry(fn: Callable[[], T], max_retries: int = 2) -> T:
     for attempt in range(max_retries + 1):
         try:
             return fn()
-        except ClientError as e:
-            msg = str(e)
-            if "RESOURCE_EXHAUSTED" not in msg and "429" not in msg:
+        except Exception as e:
+            if not is_quota_error(e):
                 raise
 
-            delay = _extract_retry_delay_seconds(msg) or 30
+            delay = _extract_retry_delay_seconds(str(e)) or 30
             if attempt == max_retries:
                 raise
             time.sleep(delay)
 
 
+async def acall_with_retry(fn: Callable[[], Awaitable[T]], max_retries: int = 2) -> T:
+    """
+    Async twin of call_with_retry: awaits asyncio.sleep so other coroutines keep running while we back off.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return await fn()
+        except Exception as e:
+            if not is_quota_error(e):
+                raise
+
+            delay = _extract_retry_delay_seconds(str(e)) or 30
+            if attempt == max_retries:
+                raise
+            await asyncio.sleep(delay)
+
+
 def _extract_retry_delay_seconds(text: str) -> int | None:
     # Examples in errors:
     # - "retryDelay': '26s'"
@@ -1,60 +1,99 @@
 # utils/json_repair.py
 from __future__ import annotations
 
-def repair_json_newlines_in_strings(s: str) -> str:
-    """
-    Repairs INVALID JSON produced by copy-pasting, where literal newline characters
-    appear inside quoted strings.
+import re
+from typing import TextIO
 
-    Deterministic rule:
-      - If we are inside a JSON string (between unescaped double quotes),
-        convert literal '\n' and '\r' to a single space.
-      - Otherwise, leave characters unchanged.
+# Slow path for the rare segment holding an escaped control char (backslash + literal newline),
+# which the rule keeps as-is: escape pairs are copied, bare control chars replaced.
+_ESCAPE_OR_CONTROL = re.compile(r"(\\.)|[\n\r\t]", re.DOTALL)
 
-    This does NOT attempt to fix other JSON issues.
+DEFAULT_CHUNK_CHARS = 1024 * 1024
+
+
+def _repair_string_segment(seg: str) -> str:
+    if "\\" in seg and ("\\\n" in seg or "\\\r" in seg or "\\\t" in seg):
+        return _ESCAPE_OR_CONTROL.sub(lambda m: m.group(1) or " ", seg)
+    # Chained replace rather than str.translate: translate drops to a per-character slow path on
+    # non-ASCII text, replace stays a C search either way.
+    return seg.replace("\n", " ").replace("\r", " ").replace("\t", " ")
+
+
+def _odd_trailing_backslashes(seg: str) -> bool:
+    return (len(seg) - len(seg.rstrip("\\"))) % 2 == 1
+
+
+class JsonNewlineRepairer:
     """
-    out: list[str] = []
-    in_string = False
-    escape = False
-
-    for ch in s:
-        if in_string:
-            if escape:
-                # Previous char was a backslash, so this char is escaped.
-                out.append(ch)
-                escape = False
-                continue
+    Incremental form of repair_json_newlines_in_strings: feed() text in arbitrary chunks and get the
+    repaired text back; string/escape state carries over between chunks.
+
+    Each chunk is split on '"' and segments alternate outside/inside a string, except where a quote is
+    escaped (odd run of backslashes before it). Only inside segments are rewritten, and the chunk is
+    re-joined on '"', so the per-character work all happens in C.
+    """
+
+    def __init__(self) -> None:
+        self.in_string = False
+        self.escape = False
 
-            if ch == "\\":  # start escape sequence inside string
-                out.append(ch)
-                escape = True
+    def feed(self, chunk: str) -> str:
+        head = ""
+        if self.escape and chunk:
+            # Previous chunk ended on a backslash: this char is escaped (kept as-is, even a newline).
+            head, chunk = chunk[0], chunk[1:]
+            self.escape = False
+
+        parts = chunk.split('"')
+        last = len(parts) - 1
+        in_string = self.in_string
+
+        for k, seg in enumerate(parts):
+            if not in_string:
+                # Outside a string every quote opens one.
+                if k != last:
+                    in_string = True
                 continue
 
-            if ch == '"':  # end string
-                out.append(ch)
+            escaped = False
+            if seg:
+                parts[k] = _repair_string_segment(seg)
+                escaped = _odd_trailing_backslashes(seg)
+            if k == last:
+                self.escape = escaped
+            elif not escaped:
                 in_string = False
-                continue
 
-            # The actual repair: literal newline/carriage return inside a string
-            if ch == "\n" or ch == "\r":
-                out.append(" ")
-                continue
+        self.in_string = in_string
+        return head + '"'.join(parts)
 
-            # Optional: tabs inside strings are legal if escaped; literal tab is a control char.
-            # If your pasted JSON includes literal tabs, fix them too:
-            if ch == "\t":
-                out.append(" ")
-                continue
 
-            out.append(ch)
-            continue
+def repair_json_newlines_in_strings(s: str) -> str:
+    """
+    Repairs INVALID JSON produced by copy-pasting, where literal newline characters
+    appear inside quoted strings.
 
-        # not in string
-        if ch == '"':
-            out.append(ch)
-            in_string = True
-            continue
+    Deterministic rule:
+      - If we are inside a JSON string (between unescaped double quotes),
+        convert literal '\n', '\r' and '\t' to a single space each.
+      - Otherwise, leave characters unchanged.
+
+    This does NOT attempt to fix other JSON issues.
+    """
+    return JsonNewlineRepairer().feed(s)
 
-        out.append(ch)
 
-    return "".join(out)
+def repair_json_stream(src: TextIO, dst: TextIO, chunk_chars: int = DEFAULT_CHUNK_CHARS) -> int:
+    """
+    Streams src -> dst applying repair_json_newlines_in_strings, holding one chunk at a time.
+    Returns the number of characters read.
+    """
+    repairer = JsonNewlineRepairer()
+    total = 0
+    while True:
+        chunk = src.read(chunk_chars)
+        if not chunk:
+            break
+        total += len(chunk)
+        dst.write(repairer.feed(chunk))
+    return total
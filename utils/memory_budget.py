@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import os
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_TOP_N = 10
+DEFAULT_TRACE_FRAMES = 1
+
+_TRUTHY = {"1", "true", "yes", "y", "on"}
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+_MB = 1024 * 1024
+
+# Reports of the stages closed so far in the current memory_scope(); None outside a scope.
+_reports: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("memory_reports", default=None)
+# Open stages of this context, innermost last; each is a one-item list holding the highest peak
+# reached by its already-closed children (a child's reset_peak() would otherwise hide it).
+_stack: ContextVar[Tuple[List[int], ...]] = ContextVar("memory_stack", default=())
+
+# tracemalloc is process-wide: started by the first open stage, stopped when the last one closes
+# (unless something else had already started it).
+_lock = threading.Lock()
+_open_stages = 0
+_started_here = False
+
+
+class MemoryBudgetExceeded(RuntimeError):
+    def __init__(self, stage: str, peak_bytes: int, budget_bytes: int):
+        self.stage = stage
+        self.peak_bytes = peak_bytes
+        self.budget_bytes = budget_bytes
+        super().__init__(
+            f"memory budget exceeded in {stage}: peak {peak_bytes / _MB:.1f} MB "
+            f"> MEMORY_BUDGET_MB={budget_bytes / _MB:g}"
+        )
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, "") or default)
+    except ValueError:
+        return default
+
+
+def memory_budget_bytes() -> Optional[int]:
+    """
+    MEMORY_BUDGET_MB: ceiling on the memory a single stage may allocate (peak above what was live
+    when it started). Unset, empty or <= 0 means no ceiling.
+    """
+    raw = os.getenv("MEMORY_BUDGET_MB", "").strip()
+    try:
+        mb = float(raw) if raw else 0.0
+    except ValueError:
+        return None
+    return int(mb * _MB) if mb > 0 else None
+
+
+def memory_profiling_enabled() -> bool:
+    """
+    MEMORY_PROFILE=1 turns on tracemalloc snapshots; setting MEMORY_BUDGET_MB implies it.
+    """
+    return os.getenv("MEMORY_PROFILE", "").strip().lower() in _TRUTHY or memory_budget_bytes() is not None
+
+
+def memory_reports_requested() -> bool:
+    """
+    Only an explicit MEMORY_PROFILE=1 puts stage reports into artifacts; a MEMORY_BUDGET_MB ceiling
+    on its own is enforced without attaching them.
+    """
+    return os.getenv("MEMORY_PROFILE", "").strip().lower() in _TRUTHY
+
+
+def memory_meta() -> Optional[List[Dict[str, Any]]]:
+    """
+    Stage reports recorded so far in the current scope, for an artifact's _meta, or None.
+    """
+    reports = _reports.get()
+    return list(reports) if reports else None
+
+
+@contextmanager
+def memory_scope() -> Iterator[None]:
+    """
+    Collects the reports of every memory_stage() closed inside it so dump_artifact() can attach them
+    as _meta.memory. Nested scopes join the enclosing one. No-op unless memory profiling is enabled.
+    """
+    if _reports.get() is not None or not memory_profiling_enabled():
+        yield
+        return
+    token = _reports.set([])
+    try:
+        yield
+    finally:
+        _reports.reset(token)
+
+
+def _acquire() -> None:
+    global _open_stages, _started_here
+    with _lock:
+        if _open_stages == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(max(1, _env_int("MEMORY_TRACE_FRAMES", DEFAULT_TRACE_FRAMES)))
+            _started_here = True
+        _open_stages += 1
+
+
+def _release() -> None:
+    global _open_stages, _started_here
+    with _lock:
+        _open_stages -= 1
+        if _open_stages == 0 and _started_here:
+            tracemalloc.stop()
+            _started_here = False
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        )
+    )
+
+
+def _site(filename: str, lineno: int) -> str:
+    path = Path(filename)
+    try:
+        path = path.resolve().relative_to(_REPO_ROOT)
+    except (OSError, ValueError):
+        pass
+    return f"{path.as_posix()}:{lineno}"
+
+
+def _top_sites(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, limit: int) -> List[Dict[str, Any]]:
+    top = []
+    for stat in after.compare_to(before, "lineno"):
+        if len(top) >= limit:
+            break
+        if stat.size_diff <= 0:
+            continue
+        frame = stat.traceback[0]
+        top.append({"site": _site(frame.filename, frame.lineno), "kb": round(stat.size_diff / 1024, 1), "count": stat.count_diff})
+    return top
+
+
+@contextmanager
+def memory_stage(name: str) -> Iterator[None]:
+    """
+    Measures the enclosed block with tracemalloc and records a report in the current memory_scope():
+      stage, peak_mb (highest allocation above what was live on entry), retained_mb (still held on
+      exit) and top (allocation sites that grew the most between the entry and exit snapshots).
+
+    Raises MemoryBudgetExceeded after the block when peak_mb is over MEMORY_BUDGET_MB; the report is
+    recorded first so the error artifact still shows it (with MEMORY_PROFILE=1). Peaks are process-wide, so stages running
+    concurrently on other threads count against each other. No-op unless memory profiling is enabled.
+    """
+    if not memory_profiling_enabled():
+        yield
+        return
+
+    _acquire()
+    try:
+        before = _snapshot()
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        frame = [0]
+        token = _stack.set(_stack.get() + (frame,))
+        try:
+            yield
+        finally:
+            _stack.reset(token)
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, frame[0])
+            parents = _stack.get()
+            if parents:
+                parents[-1][0] = max(parents[-1][0], peak)
+            after = _snapshot()
+
+        peak_bytes = max(0, peak - start_bytes)
+        budget = memory_budget_bytes()
+        report: Dict[str, Any] = {
+            "stage": name,
+            "peak_mb": round(peak_bytes / _MB, 3),
+            "retained_mb": round(max(0, current - start_bytes) / _MB, 3),
+            "top": _top_sites(before, after, max(0, _env_int("MEMORY_TOP_N", DEFAULT_TOP_N))),
+        }
+        if budget is not None:
+            report["budget_mb"] = round(budget / _MB, 3)
+        reports = _reports.get()
+        if reports is not None:
+            reports.append(report)
+    finally:
+        _release()
+
+    if budget is not None and peak_bytes > budget:
+        raise MemoryBudgetExceeded(name, peak_bytes, budget)
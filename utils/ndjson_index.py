@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.request_hash import compute_request_hash
+
+
+INDEX_SUFFIX = ".idx"
+
+# Fixed-width ASCII layout so any record can be located with one seek:
+#   header:  "NDJSONIDX1 <covered_bytes:016x> <malformed_lines:08x> <records:012x>\n"
+#   record:  "<line_offset:016x> <line_length:08x> <request_hash:64>\n"   (one per valid JSON object)
+_MAGIC = b"NDJSONIDX1"
+_HEADER_LEN = len(_MAGIC) + 1 + 16 + 1 + 8 + 1 + 12 + 1
+_HASH_LEN = 64
+_RECORD_LEN = 16 + 1 + 8 + 1 + _HASH_LEN + 1
+_HASH_COL = 16 + 1 + 8 + 1
+
+# Record blocks scanned per read when searching by hash (multiple of _RECORD_LEN keeps records whole).
+_SCAN_BLOCK = _RECORD_LEN * 8192
+
+
+def index_path_for(log_path: Path) -> Path:
+    return log_path.with_name(log_path.name + INDEX_SUFFIX)
+
+
+def _decode_line(line: bytes, offset: int) -> str:
+    # Only the very first line of a file can carry a UTF-8 BOM.
+    return line.decode("utf-8-sig" if offset == 0 else "utf-8")
+
+
+class NdjsonIndex:
+    """
+    Sidecar byte-offset index for an append-only NDJSON log (<log>.idx).
+
+    Ordinals count valid JSON objects only (malformed lines are skipped but counted), matching the
+    replay runner's historical `_read_ndjson` semantics.
+
+    - sync(): incrementally indexes whatever was appended since the last sync (rebuilds if the log shrank).
+    - append() / append_many(): record lines the caller just appended, without rescanning the log.
+    - read_object(ordinal) / find_hash(request_hash): seek straight to the line.
+
+    Single-writer: the log's producer (artifact server) is expected to be the only appender, and the
+    only writer of the sidecar. Other processes (replay) open it with read_only=True: sync() then
+    snapshots the sidecar header and keeps the not-yet-indexed tail of the log in memory instead of
+    writing it back.
+    """
+
+    def __init__(
+        self,
+        log_path: Path,
+        hash_fn: Callable[[Dict[str, Any]], str] = compute_request_hash,
+        read_only: bool = False,
+    ):
+        self.log_path = log_path
+        self.path = index_path_for(log_path)
+        self.hash_fn = hash_fn
+        self.read_only = read_only
+        # read_only state, filled by sync(): sidecar header snapshot + in-memory records past it.
+        self._snapshot: Optional[Tuple[int, int, int]] = None
+        self._tail: List[Tuple[int, int, str]] = []
+        self._tail_malformed = 0
+
+    # ------------------------
+    # Header
+    # ------------------------
+    def _read_header(self) -> Optional[Tuple[int, int, int]]:
+        """
+        Returns (covered_bytes, malformed_lines, records). The header is rewritten after the records
+        it describes, so anything past `records` is an interrupted write and gets overwritten.
+        """
+        if not self.path.exists():
+            return None
+        with self.path.open("rb") as f:
+            raw = f.read(_HEADER_LEN)
+        parts = raw.split()
+        if len(raw) != _HEADER_LEN or len(parts) != 4 or parts[0] != _MAGIC:
+            return None
+        try:
+            return int(parts[1], 16), int(parts[2], 16), int(parts[3], 16)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _header_bytes(covered: int, malformed: int, records: int) -> bytes:
+        return _MAGIC + b" " + f"{covered:016x} {malformed:08x} {records:012x}\n".encode("ascii")
+
+    @staticmethod
+    def _record_bytes(offset: int, length: int, request_hash: str) -> bytes:
+        return f"{offset:016x} {length:08x} {request_hash:<{_HASH_LEN}.{_HASH_LEN}}\n".encode("ascii")
+
+    def _indexed(self) -> Tuple[int, int, int]:
+        """
+        (covered_bytes, malformed_lines, records) backed by the sidecar file.
+        """
+        if self.read_only and self._snapshot is not None:
+            return self._snapshot
+        return self._read_header() or (0, 0, 0)
+
+    @property
+    def malformed(self) -> int:
+        return self._indexed()[1] + self._tail_malformed
+
+    def count(self) -> int:
+        return self._indexed()[2] + len(self._tail)
+
+    # ------------------------
+    # Maintenance
+    # ------------------------
+    def rebuild(self, include_partial: bool = True) -> None:
+        """
+        Reindex the whole log, by default including a complete trailing line that lacks its newline
+        (include_partial=False leaves it alone, in case its producer is still writing it).
+        """
+        if self.read_only:
+            raise RuntimeError(f"read-only index cannot be rebuilt: {self.path}")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("wb") as f:
+            f.write(self._header_bytes(0, 0, 0))
+        self.sync(include_partial=include_partial)
+
+    def _scan(self, start: int, include_partial: bool) -> Iterator[Tuple[int, int, Optional[str]]]:
+        """
+        Yields (line_offset, line_length, request_hash or None if malformed) for each non-blank line
+        from `start`. An unterminated last line may still be mid-append, so it is only yielded when
+        include_partial is set AND it already parses as a JSON object.
+        """
+        with self.log_path.open("rb") as log:
+            log.seek(start)
+            pos = start
+            for line in log:
+                terminated = line.endswith(b"\n")
+                if not terminated and not include_partial:
+                    return
+                if line.strip():
+                    try:
+                        obj = json.loads(_decode_line(line, pos))
+                    except Exception:
+                        obj = None
+                    if isinstance(obj, dict):
+                        yield pos, len(line), self.hash_fn(obj)
+                    elif terminated:
+                        yield pos, len(line), None
+                pos += len(line)
+
+    def sync(self, include_partial: bool = False) -> None:
+        """
+        Index complete lines between the covered offset and EOF (plus a parseable unterminated last
+        line with include_partial). In read_only mode the new records are kept in memory only.
+        """
+        if not self.log_path.exists():
+            return
+
+        header = self._read_header()
+        log_size = self.log_path.stat().st_size
+        if header is None or header[0] > log_size:
+            header = (0, 0, 0)
+            if not self.read_only:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("wb") as f:
+                    f.write(self._header_bytes(*header))
+
+        if self.read_only:
+            self._snapshot = header
+            self._tail = []
+            self._tail_malformed = 0
+            if header[0] < log_size:
+                for offset, length, request_hash in self._scan(header[0], include_partial):
+                    if request_hash is None:
+                        self._tail_malformed += 1
+                    else:
+                        self._tail.append((offset, length, request_hash))
+            return
+
+        covered, malformed, count = header
+        if covered == log_size:
+            return
+
+        with self.path.open("r+b") as f:
+            f.seek(_HEADER_LEN + count * _RECORD_LEN)
+            pos = covered
+            records = bytearray()
+            for offset, length, request_hash in self._scan(covered, include_partial):
+                if request_hash is None:
+                    malformed += 1
+                else:
+                    records += self._record_bytes(offset, length, request_hash)
+                    count += 1
+                    if len(records) >= _SCAN_BLOCK:
+                        f.write(records)
+                        records.clear()
+                pos = offset + length
+
+            f.write(records)
+            f.truncate()
+            f.seek(0)
+            f.write(self._header_bytes(pos, malformed, count))
+
+    def append(self, offset: int, length: int, request_hash: str) -> None:
+        """
+        Record a single line the caller appended at `offset`.
+        """
+        self.append_many(offset, [(length, request_hash)])
+
+    def append_many(self, offset: int, lines: List[Tuple[int, str]]) -> None:
+        """
+        Record consecutive lines the caller appended starting at `offset`, as (length, request_hash).
+        Falls back to sync() if the index is missing or lagging behind the log.
+        """
+        if self.read_only:
+            raise RuntimeError(f"read-only index cannot be appended to: {self.path}")
+        header = self._read_header()
+        if header is None or header[0] != offset:
+            self.sync()
+            return
+
+        _, malformed, count = header
+        records = bytearray()
+        for length, request_hash in lines:
+            records += self._record_bytes(offset, length, request_hash)
+            offset += length
+
+        with self.path.open("r+b") as f:
+            f.seek(_HEADER_LEN + count * _RECORD_LEN)
+            f.write(records)
+            f.seek(0)
+            f.write(self._header_bytes(offset, malformed, count + len(lines)))
+
+    # ------------------------
+    # Lookups
+    # ------------------------
+    def entry(self, ordinal: int) -> Tuple[int, int, str]:
+        """
+        Returns (line_offset, line_length, request_hash) for the ordinal-th valid object.
+        """
+        n = self.count()
+        if ordinal < 0 or ordinal >= n:
+            raise IndexError(f"index out of range: {ordinal} (valid: 0..{n - 1})")
+        indexed = self._indexed()[2]
+        if ordinal >= indexed:
+            return self._tail[ordinal - indexed]
+        with self.path.open("rb") as f:
+            f.seek(_HEADER_LEN + ordinal * _RECORD_LEN)
+            raw = f.read(_RECORD_LEN)
+        return int(raw[0:16], 16), int(raw[17:25], 16), raw[_HASH_COL:_HASH_COL + _HASH_LEN].decode("ascii")
+
+    def read_object(self, ordinal: int) -> Dict[str, Any]:
+        offset, length, _ = self.entry(ordinal)
+        with self.log_path.open("rb") as f:
+            f.seek(offset)
+            line = f.read(length)
+        return json.loads(_decode_line(line, offset))
+
+    def find_hash(self, request_hash: str) -> Optional[int]:
+        """
+        Ordinal of the FIRST object whose request hash matches, or None.
+        Scans only the fixed-width index records (no JSON parsing or hashing of the log).
+        """
+        needle = request_hash.encode("ascii", errors="replace")
+        n = self._indexed()[2]
+        if len(needle) != _HASH_LEN:
+            return None
+        if n == 0:
+            return self._find_in_tail(request_hash, 0)
+
+        with self.path.open("rb") as f:
+            f.seek(_HEADER_LEN)
+            base = 0
+            while base < n:
+                block = f.read(min(_SCAN_BLOCK, (n - base) * _RECORD_LEN))
+                if not block:
+                    return None
+                start = 0
+                while True:
+                    pos = block.find(needle, start)
+                    if pos == -1:
+                        break
+                    if pos % _RECORD_LEN == _HASH_COL:
+                        return base + pos // _RECORD_LEN
+                    start = pos + 1
+                base += len(block) // _RECORD_LEN
+        return self._find_in_tail(request_hash, n)
+
+    def _find_in_tail(self, request_hash: str, base: int) -> Optional[int]:
+        for i, (_, _, h) in enumerate(self._tail):
+            if h == request_hash:
+                return base + i
+        return None
@@ -1,31 +1,46 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import os
+import shutil
+import threading
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
 
 from schemas.plan_schema import Plan
 from utils.json_repair import repair_json_newlines_in_strings
+from utils.tracing import span
 
 
 DEFAULT_PLAN_CACHE = Path("cache/last_plan.json")
 
+PLAN_CACHE_INDEX_VERSION = 1
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
 
 def load_plan_with_repair(path: Path = DEFAULT_PLAN_CACHE) -> Plan:
     raw = path.read_text(encoding="utf-8")
 
     # Fast path: valid JSON already
     try:
-        return Plan.model_validate_json(raw)
+        with span("schema_validation", model="Plan"):
+            return Plan.model_validate_json(raw)
     except Exception:
         pass
 
-    # Repair legacy pasted JSON
-    repaired = repair_json_newlines_in_strings(raw)
+    # Repair legacy pasted JSON (rebinding drops the unrepaired copy before parsing)
+    with span("json_repair", chars=len(raw)):
+        raw = repair_json_newlines_in_strings(raw)
 
     # Must be valid JSON after repair
-    data = json.loads(repaired)
+    data = json.loads(raw)
+    del raw
 
-    plan = Plan.model_validate(data)
+    with span("schema_validation", model="Plan"):
+        plan = Plan.model_validate(data)
 
     # Canonicalize (permanent fix)
     path.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
@@ -39,3 +54,214 @@ def save_plan(plan: Plan, path: Path = DEFAULT_PLAN_CACHE) -> None:
         json.dumps(plan.model_dump(), ensure_ascii=False, indent=2) + "\n",
         encoding="utf-8",
     )
+
+
+def normalize_idea(idea: str) -> str:
+    """
+    Ideas that differ only in surrounding/repeated whitespace share a cache entry.
+    """
+    return " ".join(idea.split())
+
+
+def idea_key(idea: str) -> str:
+    return hashlib.sha256(normalize_idea(idea).encode("utf-8")).hexdigest()
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        return default
+
+
+@dataclass(frozen=True)
+class CachedPlan:
+    key: str
+    idea: str
+    prd_text: str
+    plan: Plan
+    source: str
+
+
+class PlanCache:
+    """
+    Content-addressed PRD/Plan cache holding many ideas.
+
+    Layout (under cache_dir):
+      - plan_index.json            key -> entry metadata, kept in LRU order + hit/miss stats
+      - plans/<key>/prd.txt        PRD text
+      - plans/<key>/plan.json      Plan (written/read via save_plan / load_plan_with_repair)
+
+    Lookup is a single dict access on the in-memory index; entry files are only read on a hit.
+    Eviction drops least-recently-used entries until both max_entries and max_bytes hold.
+    Thread-safe (Orchestrator.arun runs lookups off the event loop, several ideas at once).
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.cache_dir = cache_dir
+        self.entries_dir = cache_dir / "plans"
+        self.index_path = cache_dir / "plan_index.json"
+        self.max_entries = max_entries if max_entries is not None else _env_int(
+            "PLAN_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES
+        )
+        self.max_bytes = max_bytes if max_bytes is not None else _env_int(
+            "PLAN_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES
+        )
+        self._lock = threading.RLock()
+        self._index = self._read_index()
+
+    # ------------------------
+    # Index persistence
+    # ------------------------
+    def _empty_index(self) -> Dict[str, Any]:
+        return {
+            "version": PLAN_CACHE_INDEX_VERSION,
+            "entries": {},
+            "stats": {"hits": 0, "misses": 0, "evictions": 0},
+        }
+
+    def _read_index(self) -> Dict[str, Any]:
+        if not self.index_path.exists():
+            return self._empty_index()
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except Exception:
+            # A corrupt index only costs us cache hits; never block a run on it.
+            return self._empty_index()
+        if not isinstance(data, dict) or data.get("version") != PLAN_CACHE_INDEX_VERSION:
+            return self._empty_index()
+        data.setdefault("entries", {})
+        data.setdefault("stats", {"hits": 0, "misses": 0, "evictions": 0})
+        return data
+
+    def _write_index(self) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(self.index_path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self._index, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        tmp.replace(self.index_path)
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.entries_dir / key
+
+    # ------------------------
+    # Public API
+    # ------------------------
+    def has(self, idea: str) -> bool:
+        """
+        Index-only membership check (does not touch LRU order or hit/miss stats).
+        """
+        with self._lock:
+            return idea_key(idea) in self._index["entries"]
+
+    def get(self, idea: str, sources: Optional[Iterable[str]] = None) -> Optional[CachedPlan]:
+        """
+        Returns the cached PRD/Plan for this idea, or None.
+        If `sources` is given, entries produced by any other source count as a miss.
+        """
+        with self._lock:
+            return self._get(idea_key(idea), sources)
+
+    def _get(self, key: str, sources: Optional[Iterable[str]]) -> Optional[CachedPlan]:
+        entries: Dict[str, Any] = self._index["entries"]
+        stats: Dict[str, int] = self._index["stats"]
+
+        meta = entries.get(key)
+        if meta is not None and sources is not None and meta.get("source") not in set(sources):
+            meta = None
+
+        cached: Optional[CachedPlan] = None
+        changed = False
+        if meta is not None:
+            entry_dir = self._entry_dir(key)
+            try:
+                prd_text = (entry_dir / "prd.txt").read_text(encoding="utf-8")
+                plan = load_plan_with_repair(entry_dir / "plan.json")
+            except Exception:
+                # Entry files vanished or are unreadable: drop the entry.
+                entries.pop(key, None)
+                changed = True
+            else:
+                cached = CachedPlan(
+                    key=key,
+                    idea=meta.get("idea", ""),
+                    prd_text=prd_text,
+                    plan=plan,
+                    source=meta.get("source", ""),
+                )
+                # LRU: most recently used entries live at the end of the index.
+                if next(reversed(entries)) != key:
+                    entries[key] = entries.pop(key)
+                    changed = True
+
+        if cached is None:
+            stats["misses"] = stats.get("misses", 0) + 1
+        else:
+            stats["hits"] = stats.get("hits", 0) + 1
+
+        # A lookup only rewrites the index when it changed LRU order or dropped an entry; the hit/miss
+        # counters ride along with the next write.
+        if changed:
+            self._write_index()
+        return cached
+
+    def put(self, idea: str, prd_text: str, plan: Plan, source: str = "online") -> str:
+        """
+        Stores (or replaces) the entry for this idea and applies eviction. Returns the cache key.
+        """
+        with self._lock:
+            return self._put(idea, prd_text, plan, source)
+
+    def _put(self, idea: str, prd_text: str, plan: Plan, source: str) -> str:
+        key = idea_key(idea)
+        entry_dir = self._entry_dir(key)
+        entry_dir.mkdir(parents=True, exist_ok=True)
+
+        prd_path = entry_dir / "prd.txt"
+        plan_path = entry_dir / "plan.json"
+        prd_path.write_text(prd_text, encoding="utf-8")
+        save_plan(plan, plan_path)
+
+        entries: Dict[str, Any] = self._index["entries"]
+        entries.pop(key, None)
+        entries[key] = {
+            "idea": normalize_idea(idea),
+            "source": source,
+            "bytes": prd_path.stat().st_size + plan_path.stat().st_size,
+        }
+
+        self._evict(keep=key)
+        self._write_index()
+        return key
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries: Dict[str, Any] = self._index["entries"]
+            return {
+                **self._index["stats"],
+                "entries": len(entries),
+                "bytes": sum(int(e.get("bytes", 0)) for e in entries.values()),
+            }
+
+    def _evict(self, keep: str) -> None:
+        entries: Dict[str, Any] = self._index["entries"]
+        stats: Dict[str, int] = self._index["stats"]
+        total = sum(int(e.get("bytes", 0)) for e in entries.values())
+
+        while len(entries) > 1 and (
+            len(entries) > self.max_entries or total > self.max_bytes
+        ):
+            oldest = next(iter(entries))
+            if oldest == keep:
+                break
+            meta = entries.pop(oldest)
+            total -= int(meta.get("bytes", 0))
+            shutil.rmtree(self._entry_dir(oldest), ignore_errors=True)
+            stats["evictions"] = stats.get("evictions", 0) + 1
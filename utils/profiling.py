@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import cProfile
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, Optional
+
+PROFILES_DIRNAME = "profiles"
+DEFAULT_SAMPLE_INTERVAL_MS = 5.0
+
+_TRUTHY = {"1", "true", "yes", "y", "on"}
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def profiling_requested(flag: bool = False) -> bool:
+    """
+    True if the caller's --profile flag is set or PROFILE=1 is in the environment.
+    """
+    return flag or os.getenv("PROFILE", "").strip().lower() in _TRUTHY
+
+
+def _sample_interval_s() -> float:
+    try:
+        ms = float(os.getenv("PROFILE_SAMPLE_MS", "") or DEFAULT_SAMPLE_INTERVAL_MS)
+    except ValueError:
+        ms = DEFAULT_SAMPLE_INTERVAL_MS
+    return max(0.5, ms) / 1000.0
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{Path(code.co_filename).name}:{code.co_name}".replace(";", ":")
+
+
+class StackSampler:
+    """
+    Pure-Python sampling profiler: a daemon thread snapshots every other thread's stack each interval
+    (sys._current_frames) and counts identical stacks. collapsed() renders them in the folded format
+    flamegraph.pl / speedscope / inferno read: "thread;outer;...;leaf count".
+    """
+
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)).replace(";", ":"))
+                self.counts[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in sorted(self.counts.items()))
+
+
+class ProfileSession:
+    """
+    Handle yielded by profile_run(). Set `key` (e.g. the request_hash) once it is known; it names the
+    output directory so profiles of the same request from different versions sit side by side.
+    """
+
+    def __init__(self, label: str):
+        self.label = label
+        self.key: Optional[str] = None
+        self.prof_path: Optional[Path] = None
+        self.collapsed_path: Optional[Path] = None
+
+
+@contextmanager
+def profile_run(out_dir: Path, label: str, enabled: bool = True) -> Iterator[Optional[ProfileSession]]:
+    """
+    Wraps a run in cProfile plus the stack sampler and writes, on exit (also on error):
+      <out_dir>/profiles/<key>/<label>-<utc stamp>.prof       (pstats / snakeviz)
+      <out_dir>/profiles/<key>/<label>-<utc stamp>.collapsed  (flamegraph input)
+    Yields None (and does nothing) when not enabled.
+
+    cProfile only records the thread that entered profile_run. Work on worker threads (consumer
+    --queue workers, the engineer DAG scheduler, the batch writer pool) is covered by the stack
+    sampler's .collapsed file, which samples every thread.
+    """
+    if not enabled:
+        yield None
+        return
+
+    session = ProfileSession(label)
+    profiler = cProfile.Profile()
+    sampler = StackSampler(_sample_interval_s())
+    sampler.start()
+    profiler.enable()
+    try:
+        yield session
+    finally:
+        profiler.disable()
+        sampler.stop()
+
+        key = _UNSAFE_NAME.sub("_", session.key or "unkeyed")
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        target_dir = out_dir / PROFILES_DIRNAME / key
+        target_dir.mkdir(parents=True, exist_ok=True)
+        base = f"{_UNSAFE_NAME.sub('_', label)}-{stamp}"
+
+        session.prof_path = target_dir / f"{base}.prof"
+        profiler.dump_stats(str(session.prof_path))
+        session.collapsed_path = target_dir / f"{base}.collapsed"
+        session.collapsed_path.write_text(sampler.collapsed(), encoding="utf-8")
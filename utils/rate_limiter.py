@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+
+DEFAULT_RATE_LIMIT_PATH = Path(__file__).resolve().parent.parent / "cache" / "rate_limits.sqlite3"
+
+# Per-model quotas (requests/min, tokens/min). Override with <PROVIDER>_RPM / <PROVIDER>_TPM; 0 disables a limit.
+DEFAULT_LIMITS: Dict[str, Dict[str, int]] = {
+    "gemini": {"rpm": 10, "tpm": 250_000},
+    "openai": {"rpm": 500, "tpm": 200_000},
+}
+
+# Upper bound on a single wait so a misconfigured limit can't park a caller forever between checks.
+_MAX_WAIT_SECONDS = 5.0
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        return default
+
+
+def limit_key(provider: str, model: str) -> str:
+    return f"{provider}:{model}"
+
+
+def estimate_tokens(prompt: Any) -> int:
+    """
+    Cheap pre-call estimate (~4 characters per token). `prompt` may be a string or a list of chat messages.
+    """
+    if isinstance(prompt, str):
+        chars = len(prompt)
+    elif isinstance(prompt, list):
+        chars = sum(len(str(m.get("content", ""))) if isinstance(m, dict) else len(str(m)) for m in prompt)
+    else:
+        chars = len(str(prompt))
+    return max(1, chars // 4)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    rpm: int
+    tpm: int
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter shared by every process that points at the same SQLite database.
+
+    Each key (provider:model) has two buckets refilled continuously: one for requests/min and one
+    for tokens/min. A permit is granted only when both buckets can pay; otherwise the caller learns
+    how long to wait. Bucket state is read-modify-written under BEGIN IMMEDIATE, so concurrent
+    orchestrators/consumers draw from one quota instead of each discovering 429s on their own.
+    """
+
+    def __init__(
+        self,
+        db_path: Path = DEFAULT_RATE_LIMIT_PATH,
+        limits: Optional[Dict[str, RateLimit]] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.db_path = db_path
+        self.limits = dict(limits) if limits is not None else {}
+        self.clock = clock
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def limit_for(self, key: str) -> RateLimit:
+        if key in self.limits:
+            return self.limits[key]
+        provider = key.split(":", 1)[0]
+        if provider in self.limits:
+            return self.limits[provider]
+        defaults = DEFAULT_LIMITS.get(provider, {"rpm": 0, "tpm": 0})
+        prefix = provider.upper()
+        return RateLimit(
+            rpm=_env_int(f"{prefix}_RPM", defaults["rpm"]),
+            tpm=_env_int(f"{prefix}_TPM", defaults["tpm"]),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(self.db_path, timeout=30)
+                    with conn:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.execute(
+                            "CREATE TABLE IF NOT EXISTS buckets ("
+                            " key TEXT PRIMARY KEY,"
+                            " requests REAL NOT NULL,"
+                            " tokens REAL NOT NULL,"
+                            " updated_at REAL NOT NULL)"
+                        )
+                    conn.close()
+                    self._initialized = True
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE.
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def try_acquire(self, key: str, tokens: int = 1) -> float:
+        """
+        Takes one request and `tokens` tokens from the key's buckets if both can pay.
+        Returns 0.0 when granted, otherwise the seconds until the permit could be granted.
+        """
+        limit = self.limit_for(key)
+        if limit.rpm <= 0 and limit.tpm <= 0:
+            return 0.0
+
+        # A request larger than the whole per-minute budget can still run once the bucket is full.
+        need = min(max(0, tokens), limit.tpm) if limit.tpm > 0 else 0
+        now = self.clock()
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT requests, tokens, updated_at FROM buckets WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                requests, available, updated = float(limit.rpm), float(limit.tpm), now
+            else:
+                requests, available, updated = row
+
+            elapsed = max(0.0, now - updated)
+            if limit.rpm > 0:
+                requests = min(float(limit.rpm), requests + elapsed * limit.rpm / 60.0)
+            if limit.tpm > 0:
+                available = min(float(limit.tpm), available + elapsed * limit.tpm / 60.0)
+
+            wait = 0.0
+            if limit.rpm > 0 and requests < 1.0:
+                wait = max(wait, (1.0 - requests) * 60.0 / limit.rpm)
+            if limit.tpm > 0 and available < need:
+                wait = max(wait, (need - available) * 60.0 / limit.tpm)
+
+            if wait == 0.0:
+                if limit.rpm > 0:
+                    requests -= 1.0
+                available -= need
+
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets(key, requests, tokens, updated_at) VALUES (?, ?, ?, ?)",
+                (key, requests, available, now),
+            )
+            conn.execute("COMMIT")
+            return wait
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def acquire(self, key: str, tokens: int = 1) -> None:
+        """
+        Blocks (time.sleep) until a permit is granted.
+        """
+        while True:
+            wait = self.try_acquire(key, tokens)
+            if wait <= 0:
+                return
+            time.sleep(min(wait, _MAX_WAIT_SECONDS))
+
+    async def aacquire(self, key: str, tokens: int = 1) -> None:
+        """
+        Awaits a permit with asyncio.sleep so other coroutines keep running while we wait.
+        """
+        while True:
+            wait = await asyncio.to_thread(self.try_acquire, key, tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(min(wait, _MAX_WAIT_SECONDS))
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_default_rate_limiter() -> RateLimiter:
+    """
+    Process-wide limiter shared by all agents. RATE_LIMIT_PATH overrides the database location;
+    every process using the same file shares one quota.
+    """
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            path = os.getenv("RATE_LIMIT_PATH", "").strip()
+            _default_limiter = RateLimiter(Path(path) if path else DEFAULT_RATE_LIMIT_PATH)
+        return _default_limiter
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from json.encoder import encode_basestring
+from typing import Any, Dict, Iterable
+
+
+# Fields that vary between otherwise identical requests (transport timestamps / metadata).
+REQUEST_NONDETERMINISTIC_KEYS = {"created_at", "_meta"}
+
+# json.dumps(sort_keys=True) settings; encode() runs the C encoder, same text as canonical_json.
+_CANONICAL_ENCODER = json.JSONEncoder(sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+_encode_key = encode_basestring  # C str encoder json.dumps uses for dict keys with ensure_ascii=False
+
+# Encoded top-level items are batched up to this many characters per hasher.update().
+_HASH_FLUSH_CHARS = 64 * 1024
+
+
+def canonical_json(obj: Any) -> str:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def canonicalize_request(req: Dict[str, Any]) -> Dict[str, Any]:
+    out = dict(req)
+    for k in REQUEST_NONDETERMINISTIC_KEYS:
+        out.pop(k, None)
+    return out
+
+
+def _sha256_canonical(obj: Any, exclude_keys: Iterable[str] = ()) -> str:
+    """
+    sha256 of canonical_json(obj), byte-identical, without building the whole string: each top-level
+    item is encoded by the C encoder on its own and fed to the hasher. Small items are batched (a
+    typical request is a single update); a large one goes to the hasher as is. exclude_keys drops
+    top-level keys of a dict (same result as canonicalize_request, without the copy).
+    """
+    encode = _CANONICAL_ENCODER.encode
+    if isinstance(obj, dict) and all(isinstance(k, str) for k in obj):
+        keyed = True
+        items = sorted(obj)
+        buf = ["{"]
+        close = "}"
+    elif isinstance(obj, list):
+        keyed = False
+        items = obj
+        buf = ["["]
+        close = "]"
+    else:
+        # Non-str keys (or a scalar) keep json.dumps' own handling.
+        if isinstance(obj, dict) and exclude_keys:
+            obj = {k: v for k, v in obj.items() if k not in exclude_keys}
+        return hashlib.sha256(encode(obj).encode("utf-8")).hexdigest()
+
+    h = hashlib.sha256()
+    size = 0
+    sep = ""
+    for item in items:
+        if keyed:
+            if item in exclude_keys:
+                continue
+            buf += (sep, _encode_key(item), ":")
+            text = encode(obj[item])
+        else:
+            buf.append(sep)
+            text = encode(item)
+        sep = ","
+        if len(text) >= _HASH_FLUSH_CHARS:
+            h.update("".join(buf).encode("utf-8"))
+            h.update(text.encode("utf-8"))
+            buf = []
+            size = 0
+            continue
+        buf.append(text)
+        size += len(text)
+        if size >= _HASH_FLUSH_CHARS:
+            h.update("".join(buf).encode("utf-8"))
+            buf = []
+            size = 0
+    buf.append(close)
+    h.update("".join(buf).encode("utf-8"))
+    return h.hexdigest()
+
+
+def sha256_of(obj: Any) -> str:
+    """
+    sha256 of canonical_json(obj), fed to the hasher incrementally (byte-identical digest).
+    """
+    return _sha256_canonical(obj)
+
+
+def compute_request_hash(req_raw: Dict[str, Any]) -> str:
+    """
+    Semantic identity of an execution request (ignores created_at / _meta).
+    """
+    return _sha256_canonical(req_raw, REQUEST_NONDETERMINISTIC_KEYS)
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+DEFAULT_RESPONSE_CACHE_PATH = Path(__file__).resolve().parent.parent / "cache" / "llm_responses.sqlite3"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_TRUTHY = {"1", "true", "yes", "y", "on"}
+
+
+def _env_truthy(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in _TRUTHY
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        return default
+
+
+@lru_cache(maxsize=None)
+def _schema_fingerprint(schema: Any) -> str:
+    """
+    Pydantic model classes are reduced to their JSON schema so that a schema change
+    (new field, new description) invalidates previously cached responses.
+    """
+    if hasattr(schema, "model_json_schema"):
+        return json.dumps(schema.model_json_schema(), sort_keys=True, separators=(",", ":"))
+    return repr(schema)
+
+
+def response_cache_key(
+    *,
+    provider: str,
+    model: str,
+    prompt: Any,
+    schema: Any,
+    temperature: float,
+) -> str:
+    """
+    Canonical hash of everything that determines a model response.
+    `prompt` may be a string (Gemini contents) or a list of chat messages (OpenAI).
+    """
+    material = {
+        "provider": provider,
+        "model": model,
+        "prompt": prompt,
+        "schema": _schema_fingerprint(schema) if schema is not None else None,
+        "temperature": temperature,
+    }
+    canonical = json.dumps(material, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of structured model responses (stored as JSON text).
+
+    - TTL: entries older than ttl_seconds are treated as misses and deleted.
+    - Size: after each put, least-recently-used entries are evicted until total bytes <= max_bytes.
+    - Bypass: lookups are skipped (always a miss, not counted) but fresh responses are still stored,
+      so a bypassed run refreshes the cache.
+    - Stats: hits / misses / bytes_saved are persisted in the same database.
+
+    One short-lived connection per operation keeps this safe across threads and processes.
+    """
+
+    def __init__(
+        self,
+        db_path: Path = DEFAULT_RESPONSE_CACHE_PATH,
+        ttl_seconds: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        bypass: Optional[bool] = None,
+    ):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else _env_int(
+            "LLM_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS
+        )
+        self.max_bytes = max_bytes if max_bytes is not None else _env_int(
+            "LLM_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES
+        )
+        self.bypass = bypass if bypass is not None else _env_truthy("LLM_CACHE_BYPASS")
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(self.db_path, timeout=30)
+                    with conn:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.execute(
+                            "CREATE TABLE IF NOT EXISTS responses ("
+                            " key TEXT PRIMARY KEY,"
+                            " value TEXT NOT NULL,"
+                            " bytes INTEGER NOT NULL,"
+                            " created_at REAL NOT NULL,"
+                            " last_used REAL NOT NULL)"
+                        )
+                        conn.execute(
+                            "CREATE TABLE IF NOT EXISTS stats ("
+                            " name TEXT PRIMARY KEY,"
+                            " value INTEGER NOT NULL)"
+                        )
+                    conn.close()
+                    self._initialized = True
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, name: str, amount: int = 1) -> None:
+        conn.execute(
+            "INSERT INTO stats(name, value) VALUES (?, ?)"
+            " ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        if self.bypass:
+            return None
+
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT value, bytes, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+
+                if row is not None and self.ttl_seconds > 0 and now - row[2] > self.ttl_seconds:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    row = None
+
+                if row is None:
+                    self._bump(conn, "misses")
+                    return None
+
+                conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                self._bump(conn, "hits")
+                self._bump(conn, "bytes_saved", int(row[1]))
+                return row[0]
+        finally:
+            conn.close()
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses(key, value, bytes, created_at, last_used)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, value, size, now, now),
+                )
+                self._evict(conn)
+        finally:
+            conn.close()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        if self.max_bytes <= 0:
+            return
+        total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for key, size in conn.execute(
+            "SELECT key, bytes FROM responses ORDER BY last_used ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        self._bump(conn, "evictions", evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connect()
+        try:
+            counters = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+            entries, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM responses"
+            ).fetchone()
+        finally:
+            conn.close()
+
+        hits = int(counters.get("hits", 0))
+        misses = int(counters.get("misses", 0))
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": (hits / lookups) if lookups else 0.0,
+            "bytes_saved": int(counters.get("bytes_saved", 0)),
+            "evictions": int(counters.get("evictions", 0)),
+            "entries": int(entries),
+            "bytes": int(total),
+        }
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_response_cache() -> ResponseCache:
+    """
+    Process-wide cache shared by all agents. LLM_CACHE_PATH overrides the database location.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            path = os.getenv("LLM_CACHE_PATH", "").strip()
+            _default_cache = ResponseCache(Path(path) if path else DEFAULT_RESPONSE_CACHE_PATH)
+        return _default_cache
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+from utils.memory_budget import memory_meta, memory_reports_requested
+from utils.tracing import trace_meta
+
+_TRUTHY = {"1", "true", "yes", "y", "on"}
+
+
+def strict_schema_checks() -> bool:
+    """
+    STRICT_SCHEMA_CHECKS=1 re-validates every artifact's dumped dict before it is written
+    (debug aid for schema changes; construction already validated it once).
+    """
+    return os.getenv("STRICT_SCHEMA_CHECKS", "").strip().lower() in _TRUTHY
+
+
+def dump_artifact(model: BaseModel, meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    model_dump() exactly once. The model was validated when it was constructed; the dump -> validate
+    round-trip only runs under STRICT_SCHEMA_CHECKS.
+
+    Inside a trace, _meta.trace carries the trace_id (the spans themselves live in traces.ndjson unless
+    TRACE_ARTIFACT_SPANS=1), and with MEMORY_PROFILE=1 the tracemalloc stage reports of the enclosing
+    memory_scope are attached as _meta.memory (informational: _meta is excluded from hashing and
+    determinism checks). `meta` adds further informational keys (e.g. cache counters).
+    """
+    data = model.model_dump()
+    if strict_schema_checks():
+        type(model).model_validate(data)
+    extra: Dict[str, Any] = dict(meta or {})
+    spans = trace_meta()
+    if spans is not None:
+        extra["trace"] = spans
+    memory = memory_meta() if memory_reports_requested() else None
+    if memory is not None:
+        extra["memory"] = memory
+    if extra:
+        data["_meta"] = extra
+    return data
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, List
+
+
+# Outside strings only these characters change parser state; everything between them is copied verbatim.
+_STRUCTURAL = re.compile(r'["{}\[\]]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_ARRAY_KEY_TAIL = r'"{key}"\s*:\s*$'
+
+
+class StreamingArrayParser:
+    """
+    Incremental parser for one JSON object whose `array_key` member is a list of objects
+    (e.g. EngineeringResult.files), fed in arbitrary text chunks.
+
+    - feed(chunk) returns every array element whose closing brace arrived in this chunk, already json-decoded.
+    - finish() returns the remaining top-level object with the array emptied (e.g. task_id / summary).
+
+    Only the element currently being received is buffered, so memory stays bounded by the largest
+    element instead of the whole response. Text before the first '{' (markdown fences) and after the
+    closing '}' is ignored, and missing commas between elements are tolerated.
+    """
+
+    def __init__(self, array_key: str = "files"):
+        self._array_key_tail = re.compile(_ARRAY_KEY_TAIL.format(key=re.escape(array_key)))
+        self._skeleton: List[str] = []
+        self._element: List[str] = []
+        self._depth = 0
+        self._started = False
+        self._done = False
+        self._in_string = False
+        self._escape = False
+        self._in_array = False
+        self._in_element = False
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def _emit(self, text: str) -> None:
+        if not text:
+            return
+        if self._in_element:
+            self._element.append(text)
+        elif not self._in_array:
+            self._skeleton.append(text)
+        # Separators between array elements are dropped.
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        completed: List[Dict[str, Any]] = []
+        i, n = 0, len(chunk)
+
+        while i < n and not self._done:
+            if not self._started:
+                j = chunk.find("{", i)
+                if j == -1:
+                    break
+                self._started = True
+                self._depth = 1
+                self._emit("{")
+                i = j + 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._emit(chunk[i])
+                    self._escape = False
+                    i += 1
+                    continue
+                m = _STRING_SPECIAL.search(chunk, i)
+                if m is None:
+                    self._emit(chunk[i:])
+                    break
+                j = m.end()
+                self._emit(chunk[i:j])
+                if chunk[j - 1] == "\\":
+                    self._escape = True
+                else:
+                    self._in_string = False
+                i = j
+                continue
+
+            m = _STRUCTURAL.search(chunk, i)
+            if m is None:
+                self._emit(chunk[i:])
+                break
+            j = m.start()
+            self._emit(chunk[i:j])
+            c = chunk[j]
+
+            if c == '"':
+                self._emit(c)
+                self._in_string = True
+            elif c in "{[":
+                if c == "{" and self._in_array and self._depth == 2:
+                    self._in_element = True
+                    self._element = []
+                self._emit(c)
+                if c == "[" and self._depth == 1 and self._array_key_tail.search("".join(self._skeleton[:-1])):
+                    self._in_array = True
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._in_array and self._depth == 1:
+                    self._in_array = False
+                self._emit(c)
+                if self._in_element and self._depth == 2:
+                    self._in_element = False
+                    completed.append(json.loads("".join(self._element)))
+                    self._element = []
+                if self._depth == 0:
+                    self._done = True
+            i = j + 1
+
+        return completed
+
+    def finish(self) -> Dict[str, Any]:
+        if not self._started:
+            raise ValueError("no JSON object found in stream")
+        if not self._done:
+            raise ValueError("stream ended before the JSON object was closed")
+        return json.loads("".join(self._skeleton))
+
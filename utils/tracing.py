@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+TRACE_FILENAME = "traces.ndjson"
+
+_FALSY = {"0", "false", "no", "n", "off"}
+_TRUTHY = {"1", "true", "yes", "y", "on"}
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[str]] = ContextVar("current_span", default=None)
+
+# Traces from concurrent workers share one log file; each line is written under this lock.
+_log_lock = threading.Lock()
+
+
+def tracing_enabled() -> bool:
+    """
+    TRACING=0 turns span recording off entirely (span() becomes a no-op).
+    """
+    return os.getenv("TRACING", "").strip().lower() not in _FALSY
+
+
+class Trace:
+    """
+    Spans recorded during one traced run (a consume, a replay, an orchestrator run...).
+
+    Spans are flat dicts in completion order: name, parent, wall_ms, cpu_ms plus any attributes.
+    cpu_ms is the recording thread's CPU time, so waits on the network or disk show up as
+    wall_ms >> cpu_ms. Thread-safe: spans may close on worker threads.
+    """
+
+    def __init__(self, name: str):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self.spans.append(record)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = list(self.spans)
+        return {"trace_id": self.trace_id, "name": self.name, "started_at": self.started_at, "spans": spans}
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def artifact_spans_enabled() -> bool:
+    """
+    TRACE_ARTIFACT_SPANS=1 copies the full span list into every artifact's _meta.trace. Off by
+    default: the spans already go to traces.ndjson, and artifacts only carry the trace_id to join on.
+    """
+    return os.getenv("TRACE_ARTIFACT_SPANS", "").strip().lower() in _TRUTHY
+
+
+def trace_meta() -> Optional[Dict[str, Any]]:
+    """
+    The active trace for an artifact's _meta ({"trace_id"}, or the full snapshot with
+    TRACE_ARTIFACT_SPANS=1), or None when nothing is being traced.
+    """
+    active = _current_trace.get()
+    if active is None:
+        return None
+    if artifact_spans_enabled():
+        return active.to_dict()
+    return {"trace_id": active.trace_id}
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[None]:
+    """
+    Times the enclosed block as a stage of the active trace. Without an active trace this only
+    costs a context-variable lookup.
+    """
+    active = _current_trace.get()
+    if active is None:
+        yield
+        return
+
+    parent = _current_span.get()
+    token = _current_span.set(name)
+    wall0 = time.perf_counter()
+    cpu0 = time.thread_time()
+    error: Optional[str] = None
+    try:
+        yield
+    except BaseException as e:
+        error = e.__class__.__name__
+        raise
+    finally:
+        record: Dict[str, Any] = {
+            "name": name,
+            "parent": parent,
+            "wall_ms": round((time.perf_counter() - wall0) * 1000, 3),
+            "cpu_ms": round((time.thread_time() - cpu0) * 1000, 3),
+        }
+        if attrs:
+            record.update(attrs)
+        if error:
+            record["error"] = error
+        _current_span.reset(token)
+        active.add(record)
+
+
+@contextmanager
+def trace(name: str, log_path: Optional[Path] = None) -> Iterator[Optional[Trace]]:
+    """
+    Starts a trace whose root span is `name`, and appends it as one line to `log_path` on exit
+    (TRACE_LOG_PATH overrides the path for every trace).
+
+    Nested calls join the enclosing trace as a plain span, so e.g. replay -> consume -> evaluate is
+    one trace logged once by the outermost caller. Yields None when tracing is disabled.
+    """
+    if _current_trace.get() is not None:
+        with span(name):
+            yield _current_trace.get()
+        return
+
+    if not tracing_enabled():
+        yield None
+        return
+
+    active = Trace(name)
+    token = _current_trace.set(active)
+    try:
+        with span(name):
+            yield active
+    finally:
+        _current_trace.reset(token)
+        target = os.getenv("TRACE_LOG_PATH", "").strip() or log_path
+        if target:
+            append_trace(Path(target), active)
+
+
+def append_trace(path: Path, active: Trace) -> None:
+    line = json.dumps(active.to_dict(), ensure_ascii=False, separators=(",", ":")) + "\n"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _log_lock:
+        with path.open("a", encoding="utf-8") as f:
+            f.write(line)
+
+
+# ------------------------
+# Reading traces back
+# ------------------------
+def iter_trace_spans(paths: Iterable[Path]) -> Iterator[Dict[str, Any]]:
+    """
+    Every span of every trace in the given traces.ndjson files. Malformed lines are skipped.
+    """
+    for path in paths:
+        if not path.exists():
+            continue
+        with path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    spans = json.loads(line).get("spans") or []
+                except Exception:
+                    continue
+                for s in spans:
+                    if isinstance(s, dict) and "name" in s:
+                        yield s
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted, non-empty list.
+    """
+    rank = max(1, math.ceil(len(sorted_values) * pct / 100))
+    return sorted_values[rank - 1]
+
+
+def stage_percentiles(spans: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """
+    Per span name: count, p50/p95/p99 wall_ms and p50 cpu_ms.
+    """
+    wall: Dict[str, List[float]] = {}
+    cpu: Dict[str, List[float]] = {}
+    for s in spans:
+        wall.setdefault(s["name"], []).append(float(s.get("wall_ms", 0.0)))
+        cpu.setdefault(s["name"], []).append(float(s.get("cpu_ms", 0.0)))
+
+    out: Dict[str, Dict[str, float]] = {}
+    for name, values in wall.items():
+        values.sort()
+        cpu_values = sorted(cpu[name])
+        out[name] = {
+            "count": len(values),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+            "cpu_p50_ms": percentile(cpu_values, 50),
+        }
+    return out
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from utils.tracing import percentile
+
+DEFAULT_USAGE_LEDGER_PATH = Path(__file__).resolve().parent.parent / "cache" / "usage_ledger.ndjson"
+
+# List prices in USD per million tokens (input, output). Used by the report only, so updating a price
+# re-costs the whole ledger; models missing here are reported with zero cost.
+MODEL_PRICES_USD_PER_MTOK: Dict[str, tuple] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gemini-2.5-flash": (0.30, 2.50),
+}
+
+_FALSY = {"0", "false", "no", "n", "off"}
+
+# request_hash / idea_hash of the run the calls belong to (see usage_context).
+_usage_keys: ContextVar[Dict[str, str]] = ContextVar("usage_keys", default={})
+
+_ledger_lock = threading.Lock()
+
+
+def usage_ledger_enabled() -> bool:
+    """
+    USAGE_LEDGER=0 stops recording model calls.
+    """
+    return os.getenv("USAGE_LEDGER", "").strip().lower() not in _FALSY
+
+
+def usage_ledger_path() -> Path:
+    """
+    USAGE_LEDGER_PATH overrides the ledger location (default cache/usage_ledger.ndjson).
+    """
+    raw = os.getenv("USAGE_LEDGER_PATH", "").strip()
+    return Path(raw) if raw else DEFAULT_USAGE_LEDGER_PATH
+
+
+@contextmanager
+def usage_context(**keys: Optional[str]) -> Iterator[None]:
+    """
+    Tags every model call made inside the block, e.g. usage_context(idea_hash=...) in the orchestrator
+    and usage_context(request_hash=...) in the consumer. Nested contexts add to the enclosing keys.
+    """
+    merged = {**_usage_keys.get(), **{k: v for k, v in keys.items() if v}}
+    token = _usage_keys.set(merged)
+    try:
+        yield
+    finally:
+        _usage_keys.reset(token)
+
+
+class ModelCall:
+    """
+    Handle yielded by model_call(). The agent sets cache_hit, counts provider requests in attempts
+    (retries = attempts - 1) and passes the response (or the last streamed chunk) to set_usage().
+    """
+
+    def __init__(self, agent: str, provider: str, model: str):
+        self.agent = agent
+        self.provider = provider
+        self.model = model
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.attempts = 0
+        self.cache_hit = False
+
+    def set_usage(self, response: Any) -> None:
+        """
+        Reads token counts from an OpenAI response (.usage) or a Gemini response / stream chunk
+        (.usage_metadata). Missing metadata leaves the counts at zero.
+        """
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.input_tokens = int(getattr(usage, "prompt_tokens", 0) or 0)
+            self.output_tokens = int(getattr(usage, "completion_tokens", 0) or 0)
+            return
+        meta = getattr(response, "usage_metadata", None)
+        if meta is not None:
+            self.input_tokens = int(getattr(meta, "prompt_token_count", 0) or 0)
+            self.output_tokens = int(getattr(meta, "candidates_token_count", 0) or 0)
+
+
+@contextmanager
+def model_call(agent: str, provider: str, model: str) -> Iterator[ModelCall]:
+    """
+    Appends one ledger record per model call (cache hits and failures included):
+      ts, agent, provider, model, input_tokens, output_tokens, latency_ms, retries, cache_hit,
+      request_hash / idea_hash from usage_context(), and error (exception class) when the call raised.
+
+    latency_ms covers the whole call as the caller saw it: rate-limiter waits and retry backoff included.
+    """
+    call = ModelCall(agent, provider, model)
+    if not usage_ledger_enabled():
+        yield call
+        return
+
+    t0 = time.perf_counter()
+    error: Optional[str] = None
+    try:
+        yield call
+    except BaseException as e:
+        error = e.__class__.__name__
+        raise
+    finally:
+        record: Dict[str, Any] = {
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "agent": agent,
+            "provider": provider,
+            "model": model,
+            "input_tokens": call.input_tokens,
+            "output_tokens": call.output_tokens,
+            "latency_ms": round((time.perf_counter() - t0) * 1000, 3),
+            "retries": max(0, call.attempts - 1),
+            "cache_hit": call.cache_hit,
+        }
+        record.update(_usage_keys.get())
+        if error:
+            record["error"] = error
+        append_usage(usage_ledger_path(), record)
+
+
+def append_usage(path: Path, record: Dict[str, Any]) -> None:
+    line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _ledger_lock:
+        with path.open("a", encoding="utf-8") as f:
+            f.write(line)
+
+
+# ------------------------
+# Reading the ledger back
+# ------------------------
+def iter_usage(paths: Iterable[Path]) -> Iterator[Dict[str, Any]]:
+    """
+    Every record in the given ledger files. Malformed lines are skipped.
+    """
+    for path in paths:
+        if not path.exists():
+            continue
+        with path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except Exception:
+                    continue
+                if isinstance(record, dict) and "agent" in record:
+                    yield record
+
+
+def call_cost_usd(record: Dict[str, Any]) -> float:
+    price_in, price_out = MODEL_PRICES_USD_PER_MTOK.get(str(record.get("model")), (0.0, 0.0))
+    return (int(record.get("input_tokens") or 0) * price_in + int(record.get("output_tokens") or 0) * price_out) / 1e6
+
+
+def usage_group_key(record: Dict[str, Any], by: str) -> str:
+    if by == "day":
+        return str(record.get("ts") or "")[:10] or "unknown"
+    if by == "idea":
+        return str(record.get("idea_hash") or "")[:16] or "-"
+    return str(record.get(by) or "-")
+
+
+def aggregate_usage(records: Iterable[Dict[str, Any]], by: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Per group (agent / day / idea / model...): calls, cache_hits, errors, retries, input/output
+    tokens, cost_usd and p50/p95 latency_ms of the calls that reached the provider (not cache hits).
+    """
+    out: Dict[str, Dict[str, Any]] = {}
+    latencies: Dict[str, List[float]] = {}
+    for r in records:
+        key = usage_group_key(r, by)
+        g = out.setdefault(
+            key,
+            {"calls": 0, "cache_hits": 0, "errors": 0, "retries": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0},
+        )
+        g["calls"] += 1
+        g["cache_hits"] += 1 if r.get("cache_hit") else 0
+        g["errors"] += 1 if r.get("error") else 0
+        g["retries"] += int(r.get("retries") or 0)
+        g["input_tokens"] += int(r.get("input_tokens") or 0)
+        g["output_tokens"] += int(r.get("output_tokens") or 0)
+        g["cost_usd"] += call_cost_usd(r)
+        if not r.get("cache_hit"):
+            latencies.setdefault(key, []).append(float(r.get("latency_ms") or 0.0))
+
+    for key, g in out.items():
+        values = sorted(latencies.get(key, []))
+        g["p50_ms"] = percentile(values, 50) if values else 0.0
+        g["p95_ms"] = percentile(values, 95) if values else 0.0
+    return out